@@ -1,10 +1,19 @@
 import os
+import time
+
+_import_started = time.perf_counter()
+
+import click
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from flask_migrate import Migrate
 from dotenv import load_dotenv
 from config import config
-from models import db, Club, MeetingTime
-from utils.search_engine import ClubSearchEngine
+from models import db, Club, MeetingTime, Category, club_categories
+from utils.search_engine import ClubSearchEngine, search_flight
+from utils import inference_batcher, model_registry, query_cache
+from utils.catalog import current_generation
+from utils.response_cache import ResponseCache
 
 # Load environment variables
 load_dotenv()
@@ -16,13 +25,58 @@ app = Flask(__name__)
 env = os.getenv('FLASK_ENV', 'development')
 app.config.from_object(config[env])
 
-# Initialize database
+# Initialize database (schema changes are Alembic migrations in migrations/, applied with `flask db upgrade`)
 db.init_app(app)
+migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'),
+                  render_as_batch=True)
 
 # Enable CORS for frontend communication
 CORS(app, resources={r"/api/*": {"origins": app.config['CORS_ORIGINS']}})
 
+# Pre-encoded JSON for catalog endpoints, invalidated when the catalog generation changes
+response_cache = ResponseCache()
+
 
+def cached_json_response(key, build_payload):
+    """
+    Serve a catalog payload from the response cache with a strong ETag
+
+    build_payload() is only called on a cache miss; if it returns None, None is
+    returned so the caller can respond with an error. Requests whose If-None-Match
+    matches the ETag get an empty 304.
+    """
+    generation = current_generation()
+    entry = response_cache.get(key, generation)
+    if entry is None:
+        payload = build_payload()
+        if payload is None:
+            return None
+        entry = response_cache.put(key, generation, app.json.dumps(payload).encode('utf-8'))
+
+    body, etag = entry
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def search_request_error(search):
+    """Why a search request is malformed (keywords a string, filters lists of strings), or None"""
+    if not isinstance(search.get('keywords', ''), str):
+        return 'keywords must be a string'
+    for field in ('categories', 'availability'):
+        values = search.get(field, [])
+        if values is not None and not (isinstance(values, list)
+                                       and all(isinstance(value, str) for value in values)):
+            return f'{field} must be a list of strings'
+    return None
+
+
+@app.before_request
+def start_model_warmup():
+    """Load the embedding model in the background once the server takes traffic"""
+    if app.config.get('WARMUP_MODEL'):
+        model_registry.start_warmup()
 
 
 # ==================== ROUTES ====================
@@ -33,24 +87,30 @@ def health_check():
     return jsonify({'status': 'healthy', 'message': 'Backend is running'}), 200
 
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: 200 once the embedding model has been warmed up"""
+    stats = model_registry.get_stats()
+    stats['import_seconds'] = IMPORT_SECONDS
+    stats['query_cache'] = query_cache.get_cache().stats()
+    stats['search_coalescing'] = search_flight.stats()
+    stats['inference'] = inference_batcher.get_batcher().stats()
+    status_code = 200 if stats['ready'] else 503
+    return jsonify(stats), status_code
+
+
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
     """Get list of all unique categories from clubs in the database"""
     try:
-        # Get all unique categories from clubs
-        # Categories are comma-separated strings, so we need to extract and deduplicate
-        all_clubs = Club.query.all()
-        unique_categories = set()
-        
-        for club in all_clubs:
-            if club.categories:
-                # Split comma-separated categories and add to set
-                categories_list = [cat.strip() for cat in club.categories.split(',')]
-                unique_categories.update(categories_list)
-        
-        # Return sorted list of categories
-        categories_list = sorted(list(unique_categories))
-        return jsonify({'categories': categories_list}), 200
+        def build_payload():
+            # Distinct names of categories that at least one club belongs to
+            rows = db.session.query(Category.name).join(
+                club_categories, club_categories.c.category_id == Category.id
+            ).distinct().order_by(Category.name).all()
+            return {'categories': [name for (name,) in rows]}
+
+        return cached_json_response(('categories',), build_payload)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -84,11 +144,16 @@ def search_clubs():
     }
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         # Validate request
         if not data:
             return jsonify({'error': 'Request body is required'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        error = search_request_error(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         keywords = data.get('keywords', '')
         categories = data.get('categories', [])
@@ -97,13 +162,10 @@ def search_clubs():
         # Use search engine to find matching clubs
         results = ClubSearchEngine.search(keywords, categories, availability)
         
-        # Format response
-        clubs_response = []
-        for result in results:
-            club = result['club']
-            club_dict = club.to_dict()
+        # Format response (meeting times for all results are loaded in one query)
+        clubs_response = ClubSearchEngine.serialize_clubs([result['club'] for result in results])
+        for club_dict, result in zip(clubs_response, results):
             club_dict['matchScore'] = result['matchScore']
-            clubs_response.append(club_dict)
         
         return jsonify({'clubs': clubs_response}), 200
         
@@ -111,15 +173,76 @@ def search_clubs():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/search/batch', methods=['POST'])
+def search_clubs_batch():
+    """
+    Run many searches in one request
+    
+    Expected request body:
+    {
+      "searches": [
+        {"keywords": "string", "categories": ["string"], "availability": ["string"]},
+        ...
+      ]
+    }
+    
+    Returns:
+    {
+      "results": [
+        {"clubs": [...]},  (same club objects as /api/search, in request order)
+        ...
+      ]
+    }
+    """
+    try:
+        data = request.get_json(silent=True)
+        
+        # Validate request
+        searches = data.get('searches') if isinstance(data, dict) else None
+        if not isinstance(searches, list) or not all(isinstance(search, dict) for search in searches):
+            return jsonify({'error': 'Request body must contain a list of searches'}), 400
+        max_searches = app.config.get('SEARCH_BATCH_MAX', 500)
+        if len(searches) > max_searches:
+            return jsonify({'error': f'At most {max_searches} searches per batch'}), 400
+        for i, search in enumerate(searches):
+            error = search_request_error(search)
+            if error:
+                return jsonify({'error': f'Search {i}: {error}'}), 400
+        
+        batch_results = ClubSearchEngine.search_batch(searches)
+        
+        # Serialize every distinct club once (meeting times loaded in one query)
+        clubs = {result['club'].id: result['club'] for results in batch_results for result in results}
+        serialized = dict(zip(clubs, ClubSearchEngine.serialize_clubs(list(clubs.values()))))
+        
+        response = []
+        for results in batch_results:
+            clubs_response = []
+            for result in results:
+                club_dict = dict(serialized[result['club'].id])
+                club_dict['matchScore'] = result['matchScore']
+                clubs_response.append(club_dict)
+            response.append({'clubs': clubs_response})
+        
+        return jsonify({'results': response}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/clubs', methods=['GET'])
 def get_all_clubs():
     """Get all clubs (with optional pagination)"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        # Clamp pagination so clients cannot fill the response cache with arbitrary pages
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1),
+                       app.config.get('CLUBS_PER_PAGE_MAX', 100))
         
-        result = ClubSearchEngine.get_all_clubs(page=page, per_page=per_page)
-        return jsonify(result), 200
+        return cached_json_response(
+            ('clubs', page, per_page),
+            lambda: ClubSearchEngine.get_all_clubs(page=page, per_page=per_page)
+        )
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -129,12 +252,14 @@ def get_all_clubs():
 def get_club_detail(club_id):
     """Get detailed information about a specific club"""
     try:
-        club = ClubSearchEngine.get_club_by_id(club_id)
+        response = cached_json_response(
+            ('club', club_id), lambda: ClubSearchEngine.get_club_dict(club_id)
+        )
         
-        if not club:
+        if response is None:
             return jsonify({'error': 'Club not found'}), 404
         
-        return jsonify(club.to_dict()), 200
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -156,16 +281,58 @@ def internal_error(error):
 
 # ==================== CLI COMMANDS ====================
 
+# Revision matching the schema `flask init-db` created before migrations existed
+BASELINE_REVISION = '7a8836eab487'
+
+
+def upgrade_database():
+    """
+    Create the schema or bring it up to date with the migrations
+
+    A database created with db.create_all() before migrations existed has no
+    revision in alembic_version (a failed `flask db upgrade` leaves the table
+    empty), so it is first stamped with the revision its schema matches:
+    head if it already has every model table and column, the baseline
+    otherwise. Must run inside an app context.
+
+    Returns: The revision an unversioned database was stamped with, or None
+    """
+    from alembic.migration import MigrationContext
+    from flask_migrate import stamp, upgrade
+    from sqlalchemy import inspect
+
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    with db.engine.connect() as conn:
+        revision = MigrationContext.configure(conn).get_current_revision()
+    stamped = None
+    if 'clubs' in tables and revision is None:
+        current = all(
+            table.name in tables
+            and {column.name for column in table.columns}
+            <= {column['name'] for column in inspector.get_columns(table.name)}
+            for table in db.metadata.sorted_tables
+        )
+        stamped = 'head' if current else BASELINE_REVISION
+        stamp(revision=stamped)
+    upgrade()
+    return stamped
+
+
 @app.cli.command()
 def init_db():
-    """Initialize the database"""
+    """Create the database, or upgrade an existing one to the current schema"""
     with app.app_context():
-        db.create_all()
+        stamped = upgrade_database()
+        if stamped:
+            print(f"✓ Marked existing database as revision {stamped}")
         print("✓ Database initialized")
 
 
 @app.cli.command()
-def seed_db():
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows inserted per transaction')
+@click.option('--categorize', is_flag=True, help='Categorize clubs without categories by keyword')
+def seed_db(chunk_size, categorize):
     """Seed database with club data from CSV"""
     from utils.db_seed import DatabaseSeeder
     import os
@@ -176,7 +343,7 @@ def seed_db():
         
         if os.path.exists(csv_path):
             print(f"🔄 Loading clubs from {csv_path}...")
-            DatabaseSeeder.seed_from_csv(csv_path)
+            DatabaseSeeder.seed_from_csv(csv_path, chunk_size=chunk_size, categorize=categorize)
         else:
             print(f"⚠ clubs.csv not found at {csv_path}")
             print("📋 Using sample data instead...")
@@ -230,6 +397,62 @@ def seed_db():
         print(f"\n📊 Database stats: {stats}")
 
 
+@app.cli.command()
+@click.option('--file', 'path', default=None, help='CSV or JSON export (default: ../scraping/clubs.csv)')
+@click.option('--keep-missing', is_flag=True, help='Keep clubs that are missing from the export')
+@click.option('--chunk-size', default=1000, show_default=True, help='Changes applied per transaction')
+@click.option('--changes', 'changes_path', default=None, help='Write the change set to this JSON file')
+@click.option('--vectorize', is_flag=True, help='Re-embed the inserted and updated clubs')
+def sync_db(path, keep_missing, chunk_size, changes_path, vectorize):
+    """Sync clubs with a fresh export, applying only inserts, updates and deletes"""
+    from utils.db_seed import DatabaseSeeder
+    import json
+
+    path = path or os.path.join(os.path.dirname(__file__), '..', 'scraping', 'clubs.csv')
+    with app.app_context():
+        if path.endswith('.json'):
+            changes = DatabaseSeeder.sync_from_json(path, delete_missing=not keep_missing, chunk_size=chunk_size)
+        else:
+            changes = DatabaseSeeder.sync_from_csv(path, delete_missing=not keep_missing, chunk_size=chunk_size)
+
+    if changes_path:
+        with open(changes_path, 'w') as f:
+            json.dump(changes, f)
+        print(f"✓ Change set written to {changes_path}")
+
+    touched = changes['inserted'] + changes['updated']
+    if vectorize and touched:
+        from utils.embedding_cache import vectorize_all_clubs
+        result = vectorize_all_clubs(app, club_ids=touched, resume=False)
+        print(f"{'✓' if result['status'] == 'success' else '✗'} {result['message']}")
+
+
+@app.cli.command()
+@click.option('--top-k', default=3, show_default=True, help='Suggestions shown per club')
+@click.option('--min-similarity', default=0.3, show_default=True, help='Minimum cosine similarity to a category')
+@click.option('--apply', is_flag=True, help='Add the best suggestion to each club')
+def suggest_categories(top_k, min_similarity, apply):
+    """Suggest categories for uncategorized clubs from stored summary embeddings"""
+    from utils.categorizer import ClubCategorizer
+    from utils.db_seed import DatabaseSeeder
+
+    with app.app_context():
+        started = time.perf_counter()
+        suggestions = ClubCategorizer.suggest_from_embeddings(top_k=top_k, min_similarity=min_similarity)
+        elapsed = time.perf_counter() - started
+
+        names = dict(db.session.query(Club.id, Club.name).filter(Club.id.in_(list(suggestions))))
+        for club_id, ranked in suggestions.items():
+            formatted = ', '.join(f'{category} ({similarity:.2f})' for category, similarity in ranked) or '-'
+            print(f"  {names.get(club_id, club_id)}: {formatted}")
+        print(f"✓ Scored {len(suggestions)} uncategorized clubs in {elapsed * 1000:.1f}ms")
+
+        if apply:
+            DatabaseSeeder.add_categories({
+                club_id: [ranked[0][0]] for club_id, ranked in suggestions.items() if ranked
+            })
+
+
 @app.cli.command()
 def clear_db():
     """Clear all data from database (WARNING: use with caution)"""
@@ -244,23 +467,117 @@ def clear_db():
 
 
 @app.cli.command()
-def vectorize_clubs():
+def rebuild_availability():
+    """Recompute availability bitmasks from stored meeting times"""
+    from utils.db_seed import DatabaseSeeder
+
+    with app.app_context():
+        DatabaseSeeder.rebuild_availability_masks()
+
+
+@app.cli.command()
+def warmup():
+    """Load the embedding model and report cold start timings"""
+    model_registry.warmup()
+    stats = model_registry.get_stats()
+
+    print(f"✓ App import: {IMPORT_SECONDS:.3f}s")
+    if stats['warmup_error']:
+        print(f"✗ Warmup failed: {stats['warmup_error']}")
+    elif stats['loaded']:
+        print(f"✓ Model '{stats['model']}' load: {stats['load_seconds']:.3f}s")
+        print(f"✓ Warmup (load + first encode): {stats['warmup_seconds']:.3f}s")
+    else:
+        print("⚠ Sentence transformers not available, search uses TF-IDF")
+
+
+@app.cli.command()
+@click.option('--batch-size', default=64, show_default=True, help='Summaries per encode call')
+@click.option('--chunk-size', default=500, show_default=True, help='Clubs committed per transaction')
+@click.option('--workers', default=1, show_default=True, help='Encoder processes')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint of an interrupted run')
+@click.option('--all', 'force', is_flag=True, help='Re-encode clubs whose embedding is up to date')
+def vectorize_clubs(batch_size, chunk_size, workers, restart, force):
     """Pre-compute and store embeddings for all club summaries"""
     from utils.embedding_cache import vectorize_all_clubs
     
-    result = vectorize_all_clubs(app)
+    result = vectorize_all_clubs(
+        app, batch_size=batch_size, chunk_size=chunk_size, workers=workers,
+        resume=not restart, force=force
+    )
     
     if result['status'] == 'success':
         print(f"\n✓ {result['message']}")
     else:
         print(f"\n✗ {result['message']}")
 
+
+@app.cli.command()
+def build_index():
+    """Build the search index (and ANN index if enabled) and export it to INDEX_DIR"""
+    from utils.search_index import SearchIndex
+    from utils.binary_index import BinaryIndex
+
+    with app.app_context():
+        started = time.perf_counter()
+        index = SearchIndex.get()
+        print(f"✓ Search index: {index.size} clubs, {int(index.has_embedding.sum())} embedded "
+              f"({time.perf_counter() - started:.2f}s)")
+        if app.config.get('INDEX_DIR'):
+            index.export(app.config['INDEX_DIR'])
+            print(f"✓ Exported embedding matrix ({index.vectors.nbytes / 1e6:.1f} MB) to {app.config['INDEX_DIR']}")
+
+        started = time.perf_counter()
+        ann = index.ann()
+        if isinstance(ann, BinaryIndex):
+            print(f"✓ Binary codes: {len(ann.rows)} clubs, {ann.nbytes / 1e6:.1f} MB "
+                  f"({time.perf_counter() - started:.2f}s)")
+        elif ann is not None:
+            print(f"✓ ANN index: {ann.n_lists} clusters ({time.perf_counter() - started:.2f}s)")
+        else:
+            print("✓ ANN index disabled (exact search)")
+
+
+@app.cli.command()
+@click.option('--k', default=10, show_default=True, help='Ranking depth compared against float32')
+@click.option('--queries', default=200, show_default=True, help='Stored embeddings used as queries')
+def quantization_report(k, queries):
+    """Compare search rankings and memory of each embedding format against float32"""
+    from utils.search_index import SearchIndex
+    from utils.quantization import ranking_report
+
+    with app.app_context():
+        index = SearchIndex.get()
+        if index.vectors.format != 'float32':
+            # A dequantized matrix is not a float32 reference: it already carries the rounding error
+            print(f"✗ Embeddings are indexed as {index.vectors.format}; the report needs the float32 "
+                  f"originals, run it with EMBEDDING_FORMAT=float32 before switching formats")
+            return
+        embeddings = index.embeddings[index.has_embedding]
+        if len(embeddings) == 0:
+            print("✗ No stored embeddings, run 'flask vectorize-clubs' first")
+            return
+
+        print(f"Current format: {index.vectors.format} ({len(embeddings)} embedded clubs)")
+        k = min(k, len(embeddings))  # ranking_report compares at most every club
+        for row in ranking_report(embeddings, k=k, sample=queries):
+            print(f"  {row['format']:>7}: {row['bytes_per_vector']:>5} B/vector, "
+                  f"{row['matrix_bytes'] / 1e6:8.1f} MB, recall@{k} {row[f'recall_at_{k}']:.3f}, "
+                  f"max error {row['max_similarity_error']:.4f}")
+
+# Time spent importing this module (Flask, models, search utilities)
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
     with app.app_context():
-        # Create tables if they don't exist
-        db.create_all()
+        # Create the schema, or apply pending migrations, as `flask init-db` does
+        upgrade_database()
+
+    if app.config.get('WARMUP_MODEL'):
+        model_registry.start_warmup()
     
     port = int(os.getenv('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=app.config['DEBUG'])
@@ -24,6 +24,37 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
 
+    # Load the embedding model in the background when the server starts taking requests
+    WARMUP_MODEL = os.getenv('WARMUP_MODEL', 'true').lower() == 'true'
+
+    # Search index files (persisted next to clubs.db, shared by all workers)
+    INDEX_DIR = os.getenv('INDEX_DIR', os.path.join(BASE_DIR, 'index'))
+
+    # Query embedding cache: in-process LRU size and files kept in INDEX_DIR/query_embeddings
+    QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', 1024))
+    QUERY_CACHE_DISK_ENTRIES = int(os.getenv('QUERY_CACHE_DISK_ENTRIES', 100000))
+
+    # Ranked results kept per catalog generation for repeated identical searches
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 2048))
+    SEARCH_BATCH_MAX = int(os.getenv('SEARCH_BATCH_MAX', 500))  # Searches per /api/search/batch request
+    CLUBS_PER_PAGE_MAX = int(os.getenv('CLUBS_PER_PAGE_MAX', 100))  # Largest page /api/clubs serves (and caches)
+
+    # Micro-batching of query encoding: texts per model call and how long to wait for more
+    INFERENCE_BATCHING = os.getenv('INFERENCE_BATCHING', 'true').lower() == 'true'
+    INFERENCE_MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', 32))
+    INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', 2.0))
+
+    # Embedding storage and in-memory scoring format: 'float32', 'float16' or 'int8'
+    EMBEDDING_FORMAT = os.getenv('EMBEDDING_FORMAT', 'float32')
+
+    # Approximate nearest neighbor search over embeddings ('none', 'ivf' or 'binary')
+    ANN_BACKEND = os.getenv('ANN_BACKEND', 'none')
+    ANN_MIN_CLUBS = int(os.getenv('ANN_MIN_CLUBS', 20000))  # Exact search below this many embedded clubs
+    ANN_LISTS = int(os.getenv('ANN_LISTS', 0))  # IVF clusters (0: about 4 * sqrt(clubs))
+    ANN_PROBES = int(os.getenv('ANN_PROBES', 16))  # Clusters scanned per query: higher is better recall, slower
+    ANN_TRAIN_ITERATIONS = int(os.getenv('ANN_TRAIN_ITERATIONS', 10))
+    ANN_RERANK = int(os.getenv('ANN_RERANK', 300))  # Binary-code candidates re-scored with full vectors
+
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
 
@@ -44,6 +75,10 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    INDEX_DIR = None  # Keep test indexes in memory only
+    ANN_BACKEND = 'none'
+    WARMUP_MODEL = False
+    INFERENCE_BATCHING = False  # Tests encode inline with fake models
 
 
 # Select configuration based on environment
@@ -0,0 +1,58 @@
+"""baseline schema
+
+Revision ID: 7a8836eab487
+Revises: 
+Create Date: 2026-10-16 22:26:05.449784
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a8836eab487'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Schema created by `flask init-db` before migrations were added; stamp such
+    # databases with this revision (`flask db stamp 7a8836eab487`) instead of running it
+    op.create_table(
+        'clubs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('website_url', sa.String(length=512), nullable=False),
+        sa.Column('picture_id', sa.String(length=255), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('categories', sa.String(length=500), nullable=False),
+        sa.Column('summary_embedding', sa.LargeBinary(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('clubs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_clubs_name'), ['name'], unique=True)
+
+    op.create_table(
+        'meeting_times',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('club_id', sa.Integer(), nullable=False),
+        sa.Column('day_of_week', sa.String(length=10), nullable=False),
+        sa.Column('time_slot', sa.String(length=20), nullable=False),
+        sa.Column('meeting_description', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(['club_id'], ['clubs.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('club_id', 'day_of_week', 'time_slot', name='uq_club_meeting')
+    )
+    with op.batch_alter_table('meeting_times', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_meeting_times_club_id'), ['club_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('meeting_times', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_meeting_times_club_id'))
+    op.drop_table('meeting_times')
+
+    with op.batch_alter_table('clubs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_clubs_name'))
+    op.drop_table('clubs')
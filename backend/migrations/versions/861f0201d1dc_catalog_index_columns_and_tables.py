@@ -0,0 +1,135 @@
+"""catalog index columns and tables
+
+Adds the availability bitmask, source sync and embedding provenance columns,
+the normalized categories tables and the catalog generation table, and fills
+the bitmask and category links from the existing meeting times and
+Club.categories strings.
+
+Revision ID: 861f0201d1dc
+Revises: 7a8836eab487
+Create Date: 2026-10-16 22:26:15.173866
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '861f0201d1dc'
+down_revision = '7a8836eab487'
+branch_labels = None
+depends_on = None
+
+# Bit layout of clubs.availability_mask when this revision was written (see utils/availability.py)
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+TIME_SLOTS = ['Morning', 'Afternoon', 'Evening', 'Night']
+
+clubs = sa.table('clubs', sa.column('id', sa.Integer), sa.column('categories', sa.String),
+                 sa.column('availability_mask', sa.Integer))
+meeting_times = sa.table('meeting_times', sa.column('club_id', sa.Integer),
+                         sa.column('day_of_week', sa.String), sa.column('time_slot', sa.String))
+categories = sa.table('categories', sa.column('id', sa.Integer), sa.column('name', sa.String))
+club_categories = sa.table('club_categories', sa.column('club_id', sa.Integer),
+                           sa.column('category_id', sa.Integer))
+
+
+def upgrade():
+    op.create_table('catalog_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('generation', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_categories_name'), ['name'], unique=True)
+
+    op.create_table('club_categories',
+    sa.Column('club_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['club_id'], ['clubs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('club_id', 'category_id')
+    )
+    with op.batch_alter_table('club_categories', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_club_categories_category_id'), ['category_id'], unique=False)
+
+    with op.batch_alter_table('clubs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('availability_mask', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('source_key', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('source_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('embedding_model', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('embedding_dim', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('embedding_format', sa.String(length=16), nullable=True))
+        batch_op.add_column(sa.Column('embedding_source_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_clubs_source_key'), ['source_key'], unique=True)
+
+    bind = op.get_bind()
+    fill_availability_masks(bind)
+    fill_category_links(bind)
+
+
+def fill_availability_masks(bind):
+    """Pack every club's meeting times into its availability bitmask"""
+    bits = {
+        (day, time_slot): 1 << (day_index * len(TIME_SLOTS) + slot_index)
+        for day_index, day in enumerate(DAYS)
+        for slot_index, time_slot in enumerate(TIME_SLOTS)
+    }
+    masks = {}
+    rows = bind.execute(sa.select(meeting_times.c.club_id, meeting_times.c.day_of_week, meeting_times.c.time_slot))
+    for club_id, day, time_slot in rows:
+        masks[club_id] = masks.get(club_id, 0) | bits.get((day, time_slot), 0)
+    if masks:
+        bind.execute(
+            clubs.update().where(clubs.c.id == sa.bindparam('club_id')).values(availability_mask=sa.bindparam('mask')),
+            [{'club_id': club_id, 'mask': mask} for club_id, mask in masks.items()]
+        )
+
+
+def fill_category_links(bind):
+    """Create a category for every name in the comma-separated Club.categories strings and link clubs to them"""
+    names = {}
+    for club_id, categories_str in bind.execute(sa.select(clubs.c.id, clubs.c.categories)):
+        club_names = []
+        for name in (categories_str or '').split(','):
+            name = name.strip()
+            if name and name not in club_names:
+                club_names.append(name)
+        names[club_id] = club_names
+
+    all_names = sorted({name for club_names in names.values() for name in club_names})
+    if not all_names:
+        return
+    bind.execute(categories.insert(), [{'name': name} for name in all_names])
+    category_ids = dict(bind.execute(sa.select(categories.c.name, categories.c.id)).all())
+    bind.execute(club_categories.insert(), [
+        {'club_id': club_id, 'category_id': category_ids[name]}
+        for club_id, club_names in names.items()
+        for name in club_names
+    ])
+
+
+def downgrade():
+    with op.batch_alter_table('clubs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_clubs_source_key'))
+        batch_op.drop_column('embedding_source_hash')
+        batch_op.drop_column('embedding_format')
+        batch_op.drop_column('embedding_dim')
+        batch_op.drop_column('embedding_model')
+        batch_op.drop_column('source_hash')
+        batch_op.drop_column('source_key')
+        batch_op.drop_column('availability_mask')
+
+    with op.batch_alter_table('club_categories', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_club_categories_category_id'))
+
+    op.drop_table('club_categories')
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_categories_name'))
+
+    op.drop_table('categories')
+    op.drop_table('catalog_state')
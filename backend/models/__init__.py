@@ -8,6 +8,26 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 
 
+# Association between clubs and their categories
+club_categories = db.Table(
+    'club_categories',
+    db.Column('club_id', db.Integer, db.ForeignKey('clubs.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('category_id', db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'),
+              primary_key=True, index=True),
+)
+
+
+class Category(db.Model):
+    """Category a club can belong to (e.g., 'Service')"""
+    __tablename__ = 'categories'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False, unique=True, index=True)
+
+    def __repr__(self):
+        return f'<Category {self.name}>'
+
+
 class Club(db.Model):
     """Club model representing a student organization"""
     __tablename__ = 'clubs'
@@ -17,11 +37,23 @@ class Club(db.Model):
     website_url = db.Column(db.String(512), nullable=False)
     picture_id = db.Column(db.String(255), nullable=True)
     summary = db.Column(db.Text, nullable=False)
-    categories = db.Column(db.String(500), nullable=False)  # Comma-separated or JSON string
+    categories = db.Column(db.String(500), nullable=False)  # Comma-separated display string, normalized in category_list
     summary_embedding = db.Column(db.LargeBinary, nullable=True)  # Stores pre-computed embeddings as binary
+    availability_mask = db.Column(db.Integer, nullable=False, default=0)  # 28-bit day x time slot bitmask of meeting_times
+
+    # Stable identity in the scraped source, used to sync re-scrapes in place
+    source_key = db.Column(db.String(255), nullable=True, unique=True, index=True)  # TerpLink Id (or WebsiteKey)
+    source_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the source record last synced
+
+    # Provenance of summary_embedding, used to re-embed only stale clubs
+    embedding_model = db.Column(db.String(255), nullable=True)  # Model name/version that produced the embedding
+    embedding_dim = db.Column(db.Integer, nullable=True)  # Number of dimensions of the embedding
+    embedding_format = db.Column(db.String(16), nullable=True)  # 'float32' (NULL), 'float16' or 'int8'
+    embedding_source_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the summary that was embedded
 
     # Relationships
     meeting_times = db.relationship('MeetingTime', backref='club', lazy=True, cascade='all, delete-orphan')
+    category_list = db.relationship('Category', secondary=club_categories, lazy=True, backref='clubs')
 
     def to_dict(self):
         """Convert club object to dictionary for JSON responses"""
@@ -65,3 +97,14 @@ class MeetingTime(db.Model):
 
     def __repr__(self):
         return f'<MeetingTime {self.club.name} - {self.day_of_week} {self.time_slot}>'
+
+
+class CatalogState(db.Model):
+    """Single-row table holding the catalog generation, bumped whenever club data changes"""
+    __tablename__ = 'catalog_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CatalogState generation={self.generation}>'
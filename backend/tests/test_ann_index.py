@@ -0,0 +1,135 @@
+"""
+Tests for the approximate nearest neighbor indexes (IVF and binary codes)
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from config import TestingConfig
+from utils.ann_index import IVFIndex
+from utils.binary_index import BinaryIndex, hamming_distances
+from utils.search_index import SearchIndex
+
+
+def clustered_embeddings(n=2000, dim=16, clusters=20, seed=0):
+    """Unit vectors drawn around a few random centers"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.1 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def test_candidates_cover_exact_neighbors():
+    """Probing a few clusters finds nearly all of the exact top results"""
+    embeddings = clustered_embeddings()
+    index = IVFIndex.build(embeddings, np.arange(len(embeddings)), n_lists=20)
+
+    assert sorted(index.list_rows.tolist()) == list(range(len(embeddings)))
+    recalls = []
+    for query in embeddings[:20]:
+        exact = set(np.argsort(-(embeddings @ query))[:10])
+        candidates = index.candidates(query, n_probe=3)
+        recalls.append(len(exact & set(candidates)) / 10)
+        assert len(candidates) < len(embeddings)
+    assert np.mean(recalls) >= 0.9
+
+
+def test_index_persists_and_detects_stale_files(tmp_path):
+    """A saved index is reused for the same embeddings key and rebuilt when it changes"""
+    embeddings = clustered_embeddings(n=200)
+    rows = np.arange(200)
+    built = IVFIndex.load_or_build(embeddings, rows, str(tmp_path), n_lists=8, embeddings_key='a')
+    loaded = IVFIndex.load_or_build(embeddings, rows, str(tmp_path), n_lists=8, embeddings_key='a')
+
+    assert loaded.fingerprint == built.fingerprint
+    np.testing.assert_array_equal(loaded.list_rows, built.list_rows)
+
+    changed = IVFIndex.load_or_build(embeddings[::-1].copy(), rows, str(tmp_path), n_lists=8,
+                                     embeddings_key='b')
+    assert changed.fingerprint != built.fingerprint
+
+    # Without a key there is no way to tell a saved index is stale, so nothing is persisted
+    os.remove(tmp_path / 'ann_ivf.npz')
+    IVFIndex.load_or_build(embeddings, rows, str(tmp_path), n_lists=8)
+    assert not (tmp_path / 'ann_ivf.npz').exists()
+
+
+def test_search_index_scores_only_probed_clusters():
+    """With the IVF backend enabled only candidate rows get a similarity"""
+    app.config.from_object(TestingConfig)
+    embeddings = clustered_embeddings(n=500)
+    index = SearchIndex(np.arange(1, 501), embeddings, np.ones(500, dtype=bool))
+
+    with app.app_context():
+        app.config.update(ANN_BACKEND='ivf', ANN_MIN_CLUBS=0, ANN_LISTS=10, ANN_PROBES=2)
+        try:
+            approximate = index.semantic_similarities(embeddings[0])
+        finally:
+            app.config.from_object(TestingConfig)
+        exact = index.semantic_similarities(embeddings[0])
+
+    scored = np.flatnonzero(approximate)
+    assert 0 < len(scored) < 500
+    np.testing.assert_allclose(approximate[scored], exact[scored], rtol=1e-5)
+    assert np.argmax(approximate) == np.argmax(exact) == 0
+
+
+def test_binary_codes_rank_exact_neighbors_first():
+    """Hamming distance on sign codes keeps the exact neighbors among the re-ranked candidates"""
+    embeddings = clustered_embeddings(n=2000, dim=64)
+    codes = BinaryIndex.build(embeddings, np.arange(len(embeddings)))
+
+    assert codes.nbytes * 32 == embeddings.nbytes
+    distances = codes.distances(embeddings[7])
+    expected = ((embeddings - codes.center > 0) != (embeddings[7] - codes.center > 0)).sum(axis=1)
+    np.testing.assert_array_equal(distances, expected)
+
+    recalls = []
+    for query in embeddings[:20]:
+        exact = set(np.argsort(-(embeddings @ query))[:10])
+        recalls.append(len(exact & set(codes.candidates(query, 200))) / 10)
+    assert np.mean(recalls) >= 0.9
+
+
+def test_hamming_distances_of_long_codes(monkeypatch):
+    """Distances above 255 bits are exact, with and without np.bitwise_count"""
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, 2 ** 63, size=(31, 50), dtype=np.uint64)
+    codes[:, 0] = ~np.uint64(0)
+    code = np.zeros(31, dtype=np.uint64)
+    expected = [sum(bin(int(word)).count('1') for word in column) for column in codes.T]
+
+    np.testing.assert_array_equal(hamming_distances(codes, code), expected)
+    monkeypatch.delattr(np, 'bitwise_count', raising=False)
+    distances = hamming_distances(codes, code)
+    np.testing.assert_array_equal(distances, expected)
+    assert distances[0] == 1984
+    with pytest.raises(ValueError):
+        hamming_distances(np.zeros((32, 1), dtype=np.uint64), np.zeros(32, dtype=np.uint64))
+
+
+def test_search_index_reranks_binary_candidates():
+    """With the binary backend only the re-ranked candidates get an exact similarity"""
+    app.config.from_object(TestingConfig)
+    embeddings = clustered_embeddings(n=500)
+    index = SearchIndex(np.arange(1, 501), embeddings, np.ones(500, dtype=bool))
+
+    with app.app_context():
+        app.config.update(ANN_BACKEND='binary', ANN_MIN_CLUBS=0, ANN_RERANK=50)
+        try:
+            approximate = index.semantic_similarities(embeddings[0])
+        finally:
+            app.config.from_object(TestingConfig)
+        exact = index.semantic_similarities(embeddings[0])
+
+    scored = np.flatnonzero(approximate)
+    assert len(scored) == 50
+    np.testing.assert_allclose(approximate[scored], exact[scored], rtol=1e-5)
+    assert np.argmax(approximate) == 0
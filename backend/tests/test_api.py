@@ -10,9 +10,12 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import app
-from models import db, Club, MeetingTime
+from app import app, response_cache
+from models import db, Club, MeetingTime, Category
 from config import TestingConfig
+from utils.availability import mask_from_slots
+from utils.search_index import SearchIndex
+from utils.search_engine import club_dicts
 
 
 @pytest.fixture
@@ -22,7 +25,13 @@ def client():
     
     with app.app_context():
         db.create_all()
+        SearchIndex.invalidate()
+        response_cache.clear()
+        club_dicts.clear()
         yield app.test_client()
+        SearchIndex.invalidate()
+        response_cache.clear()
+        club_dicts.clear()
         db.session.remove()
         db.drop_all()
 
@@ -33,9 +42,11 @@ def sample_club(client):
     with app.app_context():
         club = Club(
             name='Test Club',
-            url='https://example.com/test',
-            description='A test club',
-            category='Academic'
+            website_url='https://example.com/test',
+            summary='A test club',
+            categories='Academic',
+            category_list=[Category(name='Academic')],
+            availability_mask=mask_from_slots(['Monday-Afternoon', 'Thursday-Evening'])
         )
         db.session.add(club)
         db.session.flush()
@@ -63,6 +74,15 @@ def test_search_clubs_missing_body(client):
     assert response.status_code == 400
 
 
+def test_search_clubs_validation(client):
+    """Malformed single searches are rejected like the same search in a batch"""
+    for payload in ({'keywords': 5}, ['chess'], {'categories': 'Sports'},
+                    {'categories': [None], 'availability': [['x'], 'Monday-Evening']}):
+        response = client.post('/api/search', json=payload)
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+
+
 def test_search_clubs_success(client, sample_club):
     """Test successful club search"""
     payload = {
@@ -97,6 +117,72 @@ def test_search_clubs_empty_result(client):
     assert len(data['clubs']) == 0
 
 
+def test_search_batch(client, sample_club):
+    """Each search in a batch gets the same results as a single search, in order"""
+    searches = [
+        {'keywords': 'test', 'categories': ['Academic'], 'availability': ['Monday-Afternoon']},
+        {'keywords': 'nonexistent', 'categories': ['Sports']},
+        {'keywords': 'TEST ', 'categories': ['academic'], 'availability': ['Monday-Afternoon']},
+    ]
+    response = client.post('/api/search/batch', json={'searches': searches})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+
+    assert len(results) == 3
+    single = client.post('/api/search', json=searches[0]).get_json()
+    assert results[0] == results[2] == single
+    assert results[0]['clubs'][0]['id'] == sample_club
+    assert results[1] == {'clubs': []}
+
+
+def test_search_batch_validation(client):
+    """Malformed or oversized batches are rejected"""
+    assert client.post('/api/search/batch').status_code == 400
+    assert client.post('/api/search/batch', json={'searches': 'chess'}).status_code == 400
+    assert client.post('/api/search/batch', json={'searches': ['chess']}).status_code == 400
+
+    for search in ({'keywords': 3}, {'categories': [None]}, {'categories': 'Sports'},
+                   {'availability': [['Monday-Evening']]}):
+        response = client.post('/api/search/batch', json={'searches': [{}, search]})
+        assert response.status_code == 400
+        assert response.get_json()['error'].startswith('Search 1: ')
+
+    app.config['SEARCH_BATCH_MAX'] = 2
+    response = client.post('/api/search/batch', json={'searches': [{}, {}, {}]})
+    assert response.status_code == 400
+    assert client.post('/api/search/batch', json={'searches': []}).get_json() == {'results': []}
+
+
+def test_search_batch_encodes_queries_together(client, monkeypatch):
+    """Distinct keywords of a batch are encoded in one model call and scored with one matrix product"""
+    import numpy as np
+    from utils import model_registry, query_cache
+    from utils.catalog import commit_catalog_change
+
+    calls = []
+    query_cache.get_cache().clear()
+
+    def fake_encode(texts, **kwargs):
+        calls.append(list(texts))
+        return np.array([[1.0, 0.0] if 'code' in text else [0.0, 1.0] for text in texts], dtype=np.float32)
+
+    monkeypatch.setattr(model_registry, 'is_available', lambda: True)
+    monkeypatch.setattr(model_registry, 'encode', fake_encode)
+    for name, embedding in (('Coders', [1.0, 0.0]), ('Dancers', [0.0, 1.0])):
+        db.session.add(Club(name=name, website_url=f'https://example.com/{name}', summary=name,
+                            categories='Other',
+                            summary_embedding=np.array(embedding, dtype=np.float32).tobytes()))
+    commit_catalog_change()
+
+    searches = [{'keywords': 'code'}, {'keywords': 'dance'}, {'keywords': 'Code'}]
+    results = client.post('/api/search/batch', json={'searches': searches}).get_json()['results']
+
+    assert calls == [['code', 'dance']]
+    assert [result['clubs'][0]['name'] for result in results] == ['Coders', 'Dancers', 'Coders']
+    # 25 for the name hit plus 15 for a perfect semantic match
+    assert results[0]['clubs'][0]['matchScore'] == 40
+
+
 def test_get_all_clubs(client, sample_club):
     """Test get all clubs endpoint"""
     response = client.get('/api/clubs')
@@ -107,6 +193,17 @@ def test_get_all_clubs(client, sample_club):
     assert 'pages' in data
 
 
+def test_get_all_clubs_clamps_pagination(client, sample_club):
+    """Out-of-range page and per_page values are clamped before the payload is cached"""
+    app.config['CLUBS_PER_PAGE_MAX'] = 50
+    data = client.get('/api/clubs?page=0&per_page=100000').get_json()
+    assert data['current_page'] == 1
+    assert len(data['clubs']) == 1
+
+    client.get('/api/clubs?per_page=0')
+    assert {key for key in response_cache._entries if key[0] == 'clubs'} == {('clubs', 1, 50), ('clubs', 1, 1)}
+
+
 def test_get_club_detail(client, sample_club):
     """Test get club detail endpoint"""
     response = client.get(f'/api/clubs/{sample_club}')
@@ -116,6 +213,72 @@ def test_get_club_detail(client, sample_club):
     assert 'meeting_times' in data
 
 
+def test_serialization_loads_meeting_times_in_one_query(client):
+    """Serializing many clubs costs one meeting_times query, not one per club"""
+    from sqlalchemy import event
+    from utils.search_engine import ClubSearchEngine
+
+    for i in range(5):
+        club = Club(name=f'Club {i}', website_url='https://example.com',
+                    summary='A club', categories='Academic')
+        club.meeting_times = [MeetingTime(day_of_week='Monday', time_slot='Evening')]
+        db.session.add(club)
+    db.session.commit()
+    db.session.expire_all()
+    clubs = Club.query.all()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        serialized = ClubSearchEngine.serialize_clubs(clubs)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert len(serialized) == 5
+    assert all(len(club['meeting_times']) == 1 for club in serialized)
+    assert len([s for s in statements if 'meeting_times' in s]) == 1
+
+
+def test_club_detail_etag_and_not_modified(client, sample_club):
+    """Club payloads carry a strong ETag and If-None-Match yields a 304"""
+    response = client.get(f'/api/clubs/{sample_club}')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert not etag.startswith('W/')
+
+    response = client.get(f'/api/clubs/{sample_club}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_club_endpoints_do_not_build_search_index(client, sample_club, monkeypatch):
+    """Listing and fetching clubs serve cached dicts without building the search index"""
+    monkeypatch.setattr(SearchIndex, 'build', classmethod(lambda cls: pytest.fail('index built')))
+
+    assert client.get('/api/clubs').status_code == 200
+    response_cache.clear()
+    assert client.get(f'/api/clubs/{sample_club}').status_code == 200
+    assert len(club_dicts) == 1
+
+
+def test_catalog_generation_invalidates_cached_payloads(client, sample_club):
+    """Seeding bumps the catalog generation so cached payloads are rebuilt"""
+    from utils.db_seed import DatabaseSeeder
+
+    first = client.get('/api/categories')
+    assert json.loads(first.data)['categories'] == ['Academic']
+
+    DatabaseSeeder.seed_from_data([{
+        'name': 'Chess Club', 'website_url': 'https://example.com/chess',
+        'summary': 'Chess', 'categories': 'Recreation', 'meeting_times': []
+    }])
+
+    second = client.get('/api/categories', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert json.loads(second.data)['categories'] == ['Academic', 'Recreation']
+
+
 def test_get_club_detail_not_found(client):
     """Test get club detail with invalid ID"""
     response = client.get('/api/clubs/9999')
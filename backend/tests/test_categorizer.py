@@ -0,0 +1,96 @@
+"""
+Tests for keyword-based club categorization
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, response_cache
+from models import db, Club
+from config import TestingConfig
+from utils.categorizer import ClubCategorizer
+from utils.db_seed import DatabaseSeeder
+from utils.embedding_cache import embedding_to_bytes
+from utils.search_index import SearchIndex
+
+
+@pytest.fixture
+def embedded_clubs():
+    """Clubs with hand-made summary embeddings, one of them without categories"""
+    app.config.from_object(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        SearchIndex.invalidate()
+        response_cache.clear()
+        clubs = [
+            ('Jazz Band', 'Music', [1.0, 0.0, 0.0]),
+            ('Choir', 'Music', [0.9, 0.0, 0.1]),
+            ('Rowing Club', 'Sports', [0.0, 1.0, 0.0]),
+            ('Late Night Jam', '', [0.8, 0.2, 0.0]),
+        ]
+        DatabaseSeeder.seed_from_data([
+            {'name': name, 'website_url': name, 'summary': name, 'categories': categories}
+            for name, categories, _ in clubs
+        ])
+        for name, _, vector in clubs:
+            Club.query.filter_by(name=name).first().summary_embedding = embedding_to_bytes(
+                np.array(vector, dtype=np.float32)
+            )
+        db.session.commit()
+        SearchIndex.invalidate()
+        yield
+        db.session.remove()
+        db.drop_all()
+
+
+def test_keywords_match_whole_words_only():
+    """Short keywords no longer match inside other words ('ai' in 'said', 'art' in 'party')"""
+    assert ClubCategorizer.categorize('Party Planners', 'He said we host a party.') == 'Other'
+    assert ClubCategorizer.categorize('Performing Arts Collective', '') == 'Creative and Performing Arts'
+    assert ClubCategorizer.score('Mental Health Alliance', '')['Health and Wellness'] == 2
+
+
+def test_duplicate_keywords_count_once():
+    """Repeated keywords and repeated mentions don't inflate a category's score"""
+    scores = ClubCategorizer.score('Consulting Club', 'Consulting, consulting and more consulting')
+
+    assert scores == {'Business and Entrepreneurship': 1}
+
+
+def test_categorize_many_matches_categorize():
+    """The batch API returns the same categories as one-by-one calls"""
+    clubs = [
+        ('Jazz Band', 'We play music every week.'),
+        ('Robotics Team', 'Building robots for competitions.'),
+        ('Quiet Readers', 'We read books.'),
+        # 'mental health' must not match across two clubs
+        ('Quiet Mental', ''),
+        ('Health Nuts', None),
+    ]
+
+    assert ClubCategorizer.categorize_many(clubs) == [
+        ClubCategorizer.categorize(name, description) for name, description in clubs
+    ]
+    assert ClubCategorizer.categorize_many(clubs)[2:] == ['Other', 'Other', 'Health and Wellness']
+    assert ClubCategorizer.categorize_many([]) == []
+
+
+def test_embedding_suggestions_for_uncategorized_clubs(embedded_clubs):
+    """Uncategorized clubs are scored against per-category embedding centroids"""
+    club_id = Club.query.filter_by(name='Late Night Jam').first().id
+
+    suggestions = ClubCategorizer.suggest_from_embeddings(top_k=2)
+
+    assert list(suggestions) == [club_id]
+    assert [category for category, _ in suggestions[club_id]] == ['Music', 'Sports']
+    assert suggestions[club_id][0][1] > suggestions[club_id][1][1]
+
+    assert DatabaseSeeder.add_categories({club_id: ['Music']}) == 1
+    assert db.session.get(Club, club_id).categories == 'Music'
+    assert ClubCategorizer.suggest_from_embeddings() == {}
@@ -0,0 +1,186 @@
+"""
+Tests for database seeding and category normalization
+"""
+
+import pytest
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, response_cache
+from models import db, Club, Category, club_categories
+from config import TestingConfig
+from utils.db_seed import DatabaseSeeder
+from utils.availability import SLOT_BITS
+from utils.search_engine import ClubSearchEngine
+from utils.search_index import SearchIndex
+
+SAMPLE_CLUBS = [
+    {
+        'name': 'Service Club',
+        'website_url': 'https://example.com/service',
+        'summary': 'Volunteering around campus.',
+        'categories': 'Service',
+        'meeting_times': ['Monday Evening']
+    },
+    {
+        'name': 'Community Service Network',
+        'website_url': 'https://example.com/network',
+        'summary': 'A network of service organizations.',
+        'categories': 'Community Service, Professional',
+        'meeting_times': ['Tuesday Evening']
+    },
+    {
+        'name': 'Jazz Band',
+        'website_url': 'https://example.com/jazz',
+        'summary': 'Jazz music.',
+        'categories': ['Creative and Performing Arts'],
+        'meeting_times': ['Wednesday Evening']
+    }
+]
+
+
+@pytest.fixture
+def client():
+    """Test client with the sample clubs seeded"""
+    app.config.from_object(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        SearchIndex.invalidate()
+        response_cache.clear()
+        DatabaseSeeder.seed_from_data(SAMPLE_CLUBS)
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_seed_populates_category_table(client):
+    """Seeding normalizes categories into the association table"""
+    club = Club.query.filter_by(name='Community Service Network').first()
+
+    assert sorted(c.name for c in club.category_list) == ['Community Service', 'Professional']
+    assert Category.query.count() == 4
+    assert db.session.query(club_categories).count() == 4
+
+
+def test_category_filter_matches_whole_names(client):
+    """'Service' no longer matches 'Community Service' as a substring"""
+    results = ClubSearchEngine.search('', ['service'], [])
+
+    assert [r['club'].name for r in results] == ['Service Club']
+    assert results[0]['matchScore'] == 40
+
+
+def test_categories_endpoint_and_stats(client):
+    """Distinct categories and per-category counts come from the association table"""
+    response = client.get('/api/categories')
+    data = json.loads(response.data)
+
+    assert data['categories'] == [
+        'Community Service', 'Creative and Performing Arts', 'Professional', 'Service'
+    ]
+    assert DatabaseSeeder.get_stats()['categories'] == {
+        'Community Service': 1, 'Creative and Performing Arts': 1, 'Professional': 1, 'Service': 1
+    }
+
+
+def test_rebuild_category_links(client):
+    """Links can be rebuilt from the comma-separated categories column"""
+    db.session.execute(club_categories.delete())
+    db.session.commit()
+
+    assert DatabaseSeeder.rebuild_category_links() == 4
+    assert len(Club.query.filter_by(name='Community Service Network').first().category_list) == 2
+
+
+def test_bulk_ingest_skips_existing_and_duplicate_names(client):
+    """Chunked ingest writes new clubs, meeting times and links, skipping known names"""
+    new_clubs = [
+        {'name': 'Service Club', 'summary': 'Already seeded.', 'categories': 'Service'},
+        {'name': 'Chess Club', 'summary': 'Chess.', 'categories': 'Recreation, Academic',
+         'meeting_times': "['Friday Night', 'Friday Night', 'Someday']"},
+        {'name': 'Chess Club', 'summary': 'Duplicate row.', 'categories': 'Recreation'},
+        {'name': 'Rowing Club', 'summary': 'Rowing.', 'categories': 'Service',
+         'meeting_times': ['Saturday Morning']},
+    ]
+
+    assert DatabaseSeeder.seed_from_data(new_clubs, chunk_size=2) == 2
+
+    chess = Club.query.filter_by(name='Chess Club').first()
+    assert chess.summary == 'Chess.'
+    assert [(mt.day_of_week, mt.time_slot) for mt in chess.meeting_times] == [('Friday', 'Night')]
+    assert chess.availability_mask == SLOT_BITS[('Friday', 'Night')]
+    assert sorted(c.name for c in chess.category_list) == ['Academic', 'Recreation']
+    assert Club.query.count() == 5
+    assert DatabaseSeeder.get_stats()['categories']['Service'] == 2
+
+
+def test_ingest_categorizes_clubs_without_categories(client):
+    """With categorize=True, uncategorized clubs get their keyword category; unmatched ones stay empty"""
+    new_clubs = [
+        {'name': 'Jazz Ensemble', 'summary': 'We play jazz music.', 'categories': ''},
+        {'name': 'Robotics Team', 'summary': 'Robots.', 'categories': 'Professional'},
+        {'name': 'Quiet Readers', 'summary': 'We read books.'},
+    ]
+
+    assert DatabaseSeeder.ingest(new_clubs, categorize=True) == 3
+
+    categories = {club.name: club.categories for club in Club.query.filter(Club.name.in_(
+        [club['name'] for club in new_clubs]
+    ))}
+    assert categories == {'Jazz Ensemble': 'Creative and Performing Arts',
+                          'Robotics Team': 'Professional', 'Quiet Readers': ''}
+    jazz = Club.query.filter_by(name='Jazz Ensemble').first()
+    assert [c.name for c in jazz.category_list] == ['Creative and Performing Arts']
+
+
+def test_sync_applies_only_changes(client):
+    """Sync diffs by source key and reports inserted, updated and deleted ids"""
+    ids = {club.name: club.id for club in Club.query.all()}
+    export = [dict(club) for club in SAMPLE_CLUBS]
+    export[0]['summary'] = 'Volunteering around campus and beyond.'
+    export[0]['meeting_times'] = ['Thursday Morning']
+    del export[1]
+    export.append({
+        'name': 'Chess Club',
+        'website_url': 'https://example.com/chess',
+        'summary': 'Chess.',
+        'categories': 'Recreation',
+        'meeting_times': ['Friday Night']
+    })
+
+    changes = DatabaseSeeder.sync(export)
+
+    assert changes['updated'] == [ids['Service Club']]
+    assert changes['deleted'] == [ids['Community Service Network']]
+    assert len(changes['inserted']) == 1
+    assert changes['unchanged'] == 1
+
+    service = db.session.get(Club, ids['Service Club'])
+    assert service.summary == 'Volunteering around campus and beyond.'
+    assert [(mt.day_of_week, mt.time_slot) for mt in service.meeting_times] == [('Thursday', 'Morning')]
+    assert service.availability_mask == SLOT_BITS[('Thursday', 'Morning')]
+    assert Club.query.filter_by(name='Community Service Network').first() is None
+    assert db.session.get(Club, changes['inserted'][0]).source_key == 'https://example.com/chess'
+
+    # A second sync of the same export touches nothing
+    changes = DatabaseSeeder.sync(export)
+    assert (changes['inserted'], changes['updated'], changes['deleted']) == ([], [], [])
+    assert changes['unchanged'] == 3
+
+
+def test_sync_keeps_clubs_without_source_key(client):
+    """Rows without a source key are skipped, not deleted, when the same export is synced"""
+    export = [dict(club) for club in SAMPLE_CLUBS] + [{'name': 'Book Club', 'summary': 'Books.'}]
+    DatabaseSeeder.seed_from_data(export[-1:])
+    book_club = Club.query.filter_by(name='Book Club').first().id
+
+    changes = DatabaseSeeder.sync(export)
+
+    assert changes['deleted'] == []
+    assert changes['skipped'] == 1
+    assert db.session.get(Club, book_club) is not None
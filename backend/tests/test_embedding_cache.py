@@ -0,0 +1,120 @@
+"""
+Tests for batched, resumable club vectorization
+"""
+
+import pytest
+import json
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db, Club
+from config import TestingConfig
+from utils import model_registry
+from utils.embedding_cache import vectorize_all_clubs, CHECKPOINT_FILENAME
+
+
+def fake_encode(texts, **kwargs):
+    """Deterministic stand-in for the embedding model: summary length as a 2-d vector"""
+    if isinstance(texts, str):
+        return np.array([len(texts), 1.0], dtype=np.float32)
+    fake_encode.calls.append(len(texts))
+    return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def context(tmp_path, monkeypatch):
+    """App context with five clubs, a fake encoder and a temporary index directory"""
+    app.config.from_object(TestingConfig)
+    app.config['INDEX_DIR'] = str(tmp_path)
+    fake_encode.calls = []
+    monkeypatch.setattr(model_registry, 'is_available', lambda: True)
+    monkeypatch.setattr(model_registry, 'encode', fake_encode)
+
+    with app.app_context():
+        db.create_all()
+        for i in range(5):
+            db.session.add(Club(
+                name=f'Club {i}', website_url=f'https://example.com/{i}',
+                summary='x' * (i + 1), categories='Service'
+            ))
+        db.session.commit()
+        yield tmp_path
+        db.session.remove()
+        db.drop_all()
+
+
+def test_vectorize_encodes_in_batches_and_chunks(context):
+    """Summaries are encoded in batches and every club gets an embedding"""
+    result = vectorize_all_clubs(app, batch_size=2, chunk_size=3)
+
+    assert result['status'] == 'success'
+    assert result['vectorized'] == 5
+    assert result['clubs_per_second'] > 0
+    # Chunks of 3 and 2 clubs, each encoded in batches of at most 2
+    assert fake_encode.calls == [2, 1, 2]
+    with app.app_context():
+        lengths = [np.frombuffer(club.summary_embedding, dtype=np.float32)[0]
+                   for club in Club.query.order_by(Club.id)]
+    assert lengths == [1, 2, 3, 4, 5]
+    assert not (context / CHECKPOINT_FILENAME).exists()
+
+
+def test_vectorize_resumes_after_checkpoint(context):
+    """An interrupted run continues after the last committed club"""
+    with app.app_context():
+        second_id = Club.query.order_by(Club.id).all()[1].id
+    (context / CHECKPOINT_FILENAME).write_text(
+        json.dumps({'last_id': second_id, 'model': model_registry.model_version()})
+    )
+
+    result = vectorize_all_clubs(app, batch_size=8, chunk_size=8)
+
+    assert result['resumed_from'] == second_id
+    assert result['vectorized'] == 3
+    with app.app_context():
+        assert Club.query.filter(Club.summary_embedding.is_(None)).count() == 2
+
+
+def test_vectorize_only_reencodes_stale_clubs(context):
+    """Embeddings are tagged with model and summary hash and skipped while fresh"""
+    vectorize_all_clubs(app, batch_size=8, chunk_size=8)
+
+    with app.app_context():
+        club = Club.query.order_by(Club.id).first()
+        assert club.embedding_model == model_registry.model_version()
+        assert club.embedding_dim == 2
+        club.summary = 'an edited summary'
+        db.session.commit()
+
+    fake_encode.calls = []
+    result = vectorize_all_clubs(app, batch_size=8, chunk_size=8)
+
+    assert result['vectorized'] == 1
+    assert result['skipped'] == 4
+    assert fake_encode.calls == [1]
+
+    result = vectorize_all_clubs(app, batch_size=8, chunk_size=8, force=True)
+    assert result['vectorized'] == 5
+
+
+def test_vectorize_without_changes_keeps_generation(context):
+    """A run with nothing stale does not bump the catalog generation or re-export"""
+    from utils.catalog import current_generation
+    from utils.search_index import MATRIX_FILENAME
+
+    vectorize_all_clubs(app, batch_size=8, chunk_size=8)
+    with app.app_context():
+        generation = current_generation()
+    (context / MATRIX_FILENAME).unlink()
+
+    result = vectorize_all_clubs(app, batch_size=8, chunk_size=8)
+
+    assert result['vectorized'] == 0
+    with app.app_context():
+        assert current_generation() == generation
+    assert not (context / MATRIX_FILENAME).exists()
@@ -0,0 +1,77 @@
+"""
+Tests for micro-batched query encoding
+"""
+
+import sys
+import os
+import threading
+import time
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.inference_batcher import InferenceBatcher
+
+
+class BatchEncoder:
+    """Stand-in for the embedding model that records batch sizes and is slow per call"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(len(texts))
+        time.sleep(self.delay)
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_requests_are_encoded_together():
+    """Texts submitted while the model is busy share the next model call"""
+    encoder = BatchEncoder()
+    batcher = InferenceBatcher(encoder, max_batch_size=8, max_wait=0.01)
+    texts = ['x' * (i + 1) for i in range(20)]
+    results = {}
+
+    def request(text):
+        results[text] = batcher.encode(text)
+
+    threads = [threading.Thread(target=request, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert all(results[text][0] == len(text) for text in texts)
+    assert sum(encoder.batches) == 20
+    assert len(encoder.batches) < 20
+    assert max(encoder.batches) <= 8
+    stats = batcher.stats()
+    assert stats['requests'] == 20 and stats['mean_batch'] > 1
+
+
+def test_single_request_is_not_delayed():
+    """A lone request is encoded right away when no wait is configured"""
+    batcher = InferenceBatcher(BatchEncoder(delay=0), max_wait=0)
+
+    started = time.perf_counter()
+    vector = batcher.encode('chess')
+    assert time.perf_counter() - started < 0.5
+    assert vector.tolist() == [5.0, 1.0]
+    batcher.close()
+
+
+def test_model_errors_reach_every_waiter():
+    """A failing model call fails the futures of the whole batch"""
+    def failing(texts):
+        raise RuntimeError('model unavailable')
+
+    batcher = InferenceBatcher(failing)
+    futures = [batcher.submit(text) for text in ('a', 'b')]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    batcher.close()
@@ -0,0 +1,49 @@
+"""
+Tests for the corpus-fitted TF-IDF fallback index
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.lexical_index import LexicalIndex, INDEX_FILENAME
+
+SUMMARIES = [
+    'We write code and learn programming languages together.',
+    'A dance team performing hip hop and contemporary dance.',
+    'Volunteer with local food banks and community service projects.',
+]
+
+
+def test_similarities_rank_matching_summary_first():
+    """One query transform scores every summary in the corpus"""
+    index = LexicalIndex.fit([1, 2, 3], SUMMARIES)
+
+    similarities = index.similarities('dance')
+
+    assert similarities.shape == (3,)
+    assert similarities.argmax() == 1
+    assert similarities[0] == 0
+
+
+def test_load_or_fit_reuses_persisted_index(tmp_path):
+    """A saved index is loaded instead of refitted while the corpus is unchanged"""
+    fitted = LexicalIndex.load_or_fit([1, 2, 3], SUMMARIES, str(tmp_path))
+    assert (tmp_path / INDEX_FILENAME).exists()
+
+    loaded = LexicalIndex.load_or_fit([1, 2, 3], SUMMARIES, str(tmp_path))
+    assert loaded.fingerprint == fitted.fingerprint
+    assert (loaded.similarities('code') == fitted.similarities('code')).all()
+
+    changed = LexicalIndex.load_or_fit([1, 2, 3, 4], SUMMARIES + ['Chess club'], str(tmp_path))
+    assert changed.fingerprint != fitted.fingerprint
+    assert changed.similarities('chess').argmax() == 3
+
+
+def test_empty_corpus_scores_zero():
+    """An empty catalog yields no similarities instead of failing"""
+    index = LexicalIndex.fit([], [])
+
+    assert index.similarities('coding').shape == (0,)
@@ -0,0 +1,99 @@
+"""
+Tests for the Alembic migrations in migrations/
+"""
+
+import pytest
+import sys
+import os
+from sqlalchemy import inspect, text
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_migrate import upgrade, downgrade
+from app import app
+from models import db, Club, Category
+from config import TestingConfig
+from utils.availability import mask_from_slots
+
+BASELINE = '7a8836eab487'
+
+
+@pytest.fixture
+def baseline_db():
+    """A database at the schema `flask init-db` created before migrations existed"""
+    app.config.from_object(TestingConfig)
+
+    with app.app_context():
+        db.drop_all()
+        upgrade(revision=BASELINE)
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO clubs (name, website_url, summary, categories) VALUES "
+                "('Chess Club', 'https://example.com/chess', 'Chess', 'Recreation, Academic'), "
+                "('Go Club', 'https://example.com/go', 'Go', 'Recreation')"
+            ))
+            conn.execute(text(
+                "INSERT INTO meeting_times (club_id, day_of_week, time_slot) VALUES "
+                "(1, 'Monday', 'Evening'), (1, 'Tuesday', 'Morning')"
+            ))
+        yield
+        db.session.remove()
+        db.drop_all()
+        with db.engine.begin() as conn:
+            conn.execute(text('DROP TABLE IF EXISTS alembic_version'))
+
+
+def test_upgrade_adds_columns_and_fills_them(baseline_db):
+    """Upgrading a baseline database adds the new columns and tables and backfills them"""
+    upgrade()
+
+    inspector = inspect(db.engine)
+    assert {'categories', 'club_categories', 'catalog_state'} <= set(inspector.get_table_names())
+    assert 'ix_clubs_source_key' in {index['name'] for index in inspector.get_indexes('clubs')}
+
+    chess = Club.query.filter_by(name='Chess Club').first()
+    assert chess.availability_mask == mask_from_slots(['Monday-Evening', 'Tuesday-Morning'])
+    assert sorted(category.name for category in chess.category_list) == ['Academic', 'Recreation']
+    assert Club.query.filter_by(name='Go Club').first().availability_mask == 0
+    assert Category.query.count() == 2
+
+    downgrade(revision=BASELINE)
+    assert 'availability_mask' not in {col['name'] for col in inspect(db.engine).get_columns('clubs')}
+
+
+def test_migrations_match_models(baseline_db):
+    """The head revision creates exactly the schema the models describe"""
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+
+    upgrade()
+    with db.engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), db.metadata) == []
+
+
+def test_upgrade_database_stamps_unversioned_baseline(baseline_db):
+    """A pre-migration database is stamped with the baseline and upgraded instead of recreated"""
+    from app import upgrade_database
+
+    # An empty alembic_version table, as left by a failed `flask db upgrade`
+    with db.engine.begin() as conn:
+        conn.execute(text('DELETE FROM alembic_version'))
+
+    assert upgrade_database() == BASELINE
+    assert Club.query.filter_by(name='Chess Club').first().availability_mask != 0
+    assert upgrade_database() is None
+
+
+def test_upgrade_database_stamps_current_schema_as_head(baseline_db):
+    """A database created with db.create_all() from the current models is stamped head, not migrated again"""
+    from app import upgrade_database
+
+    db.drop_all()
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP TABLE alembic_version'))
+    db.create_all()
+
+    assert upgrade_database() == 'head'
+    with db.engine.connect() as conn:
+        assert conn.execute(text('SELECT version_num FROM alembic_version')).scalar() == '861f0201d1dc'
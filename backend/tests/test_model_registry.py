@@ -0,0 +1,64 @@
+"""
+Tests for the lazy embedding model registry
+"""
+
+import subprocess
+import sys
+import os
+import threading
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import app
+from config import TestingConfig
+from utils import model_registry
+
+
+def test_importing_app_does_not_load_heavy_libraries():
+    """Importing the app must not pull in torch, sentence-transformers or scikit-learn"""
+    code = (
+        "import sys, app; "
+        "loaded = [m for m in ('torch', 'sentence_transformers', 'sklearn') if m in sys.modules]; "
+        "print(','.join(loaded))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=BACKEND_DIR,
+        capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ''
+
+
+class FakeModel:
+    """Stands in for a SentenceTransformer"""
+
+    def __init__(self, error=None):
+        self.error = error
+
+    def encode(self, texts, **kwargs):
+        if self.error:
+            raise self.error
+        return np.zeros((len(texts), 3), dtype=np.float32)
+
+
+def test_ready_endpoint_reflects_warmup(monkeypatch):
+    """/api/ready answers 503 until warmup succeeds, and reports a failed warmup"""
+    app.config.from_object(TestingConfig)
+    client = app.test_client()
+    monkeypatch.setattr(model_registry, '_ready', threading.Event())
+    monkeypatch.setattr(model_registry, '_model', FakeModel(RuntimeError('out of memory')))
+
+    assert client.get('/api/ready').status_code == 503
+    model_registry.warmup()
+    response = client.get('/api/ready')
+    assert response.status_code == 503
+    assert response.get_json()['warmup_error'] == 'RuntimeError: out of memory'
+
+    model_registry._model.error = None
+    model_registry.warmup()
+    response = client.get('/api/ready')
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['ready'] and data['warmup_error'] is None
+    assert 'import_seconds' in data
@@ -0,0 +1,74 @@
+"""
+Tests for quantized embedding storage and scoring
+"""
+
+import sys
+import os
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.quantization import (
+    FORMATS, QuantizedMatrix, ranking_report, vector_dimension, vector_from_bytes, vector_to_bytes
+)
+from utils.search_index import SearchIndex
+
+
+def clustered_embeddings(n=1000, dim=32, clusters=20, seed=0):
+    """Unit vectors drawn around a few random centers"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_bytes_round_trip(fmt):
+    """Stored vectors decode to (nearly) the original float32 values"""
+    vector = clustered_embeddings(n=1)[0]
+    data = vector_to_bytes(vector, fmt)
+
+    assert vector_dimension(data, fmt) == len(vector)
+    np.testing.assert_allclose(vector_from_bytes(data, fmt), vector, atol=0.01)
+    with pytest.raises(ValueError):
+        vector_to_bytes(vector, 'float8')
+
+
+def test_quantized_dot_matches_float32():
+    """Scoring on the compact matrix stays close to exact cosine similarity"""
+    embeddings = clustered_embeddings()
+    query = embeddings[0]
+    exact = embeddings @ query
+    rows = np.array([3, 1, 7])
+
+    for fmt in ('float16', 'int8'):
+        matrix = QuantizedMatrix.from_float(embeddings, fmt)
+        assert matrix.format == fmt
+        assert matrix.nbytes < embeddings.nbytes
+        np.testing.assert_allclose(matrix.dot(query), exact, atol=0.02)
+        np.testing.assert_allclose(matrix.dot(query, rows), exact[rows], atol=0.02)
+
+
+def test_search_index_scores_in_configured_format():
+    """An int8 index keeps rankings and exposes float32 embeddings"""
+    embeddings = clustered_embeddings(n=300)
+    index = SearchIndex(np.arange(1, 301), embeddings, np.ones(300, dtype=bool), embedding_format='int8')
+
+    assert index.vectors.format == 'int8'
+    assert index.dimension == 32
+    assert index.embeddings.dtype == np.float32
+    similarities = index.semantic_similarities(embeddings[5], exact=True)
+    assert np.argmax(similarities) == 5
+
+
+def test_ranking_report():
+    """Compact formats keep almost all of the float32 top-k"""
+    report = {row['format']: row for row in ranking_report(clustered_embeddings(), k=10, sample=50)}
+
+    assert report['float32']['recall_at_10'] == 1.0
+    assert report['float16']['bytes_per_vector'] == 64
+    assert report['int8']['bytes_per_vector'] == 36
+    assert report['int8']['recall_at_10'] >= 0.9
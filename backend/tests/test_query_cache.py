@@ -0,0 +1,95 @@
+"""
+Tests for the two-tier query embedding cache
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db, Club
+from config import TestingConfig
+from utils import model_registry, query_cache
+from utils.catalog import commit_catalog_change
+from utils.query_cache import QueryEmbeddingCache
+from utils.search_engine import ClubSearchEngine
+from utils.search_index import SearchIndex
+
+
+class CountingEncoder:
+    """Stand-in for the embedding model that records what it encoded"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, **kwargs):
+        self.calls.append(text)
+        return np.array([len(text), 1.0], dtype=np.float32)
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    """Queries are normalized, served from memory, then from disk in a fresh process"""
+    encode = CountingEncoder()
+    cache = QueryEmbeddingCache(max_entries=2, directory=str(tmp_path))
+
+    first = cache.get_or_encode('  Coding ', 'model-a', encode)
+    assert not first.flags.writeable
+    np.testing.assert_array_equal(cache.get_or_encode('coding', 'model-a', encode), first)
+    assert encode.calls == ['coding']
+    assert cache.stats()['memory_hits'] == 1
+
+    # A new cache (another worker, or after a restart) reads the shared disk tier
+    restarted = QueryEmbeddingCache(max_entries=2, directory=str(tmp_path))
+    np.testing.assert_array_equal(restarted.get_or_encode('CODING', 'model-a', encode), first)
+    assert encode.calls == ['coding']
+    assert restarted.stats() == {'memory_hits': 0, 'disk_hits': 1, 'misses': 0, 'entries': 1, 'hit_rate': 1.0}
+
+    # Embeddings of another model version are never reused
+    restarted.get_or_encode('coding', 'model-b', encode)
+    assert encode.calls == ['coding', 'coding']
+
+
+def test_tiers_are_bounded(tmp_path):
+    """The LRU evicts the oldest entry and the disk tier is pruned past its limit"""
+    encode = CountingEncoder()
+    cache = QueryEmbeddingCache(max_entries=2, directory=str(tmp_path), max_disk_entries=10)
+
+    for i in range(12):
+        cache.get_or_encode(f'query {i}', 'model-a', encode)
+
+    assert len(cache) == 2
+    files = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert len(files) <= 10
+
+
+def test_repeated_searches_skip_inference(monkeypatch):
+    """Only the first of several equivalent searches runs the model"""
+    encode = CountingEncoder()
+    monkeypatch.setattr(model_registry, 'is_available', lambda: True)
+    monkeypatch.setattr(model_registry, 'encode', encode)
+    app.config.from_object(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        SearchIndex.invalidate()
+        query_cache.get_cache().clear()
+        try:
+            db.session.add(Club(name='Coding Club', website_url='https://example.com/coding',
+                                summary='Programming', categories='Science and Technology',
+                                summary_embedding=np.array([1.0, 0.0], dtype=np.float32).tobytes()))
+            commit_catalog_change()
+
+            for keywords in ('coding', 'Coding', ' coding  '):
+                SearchIndex.invalidate()  # Drop cached results so every search is scored
+                assert ClubSearchEngine.search(keywords, [], [])[0]['club'].name == 'Coding Club'
+
+            assert encode.calls == ['coding']
+            stats = query_cache.get_cache().stats()
+            assert (stats['misses'], stats['memory_hits']) == (1, 2)
+        finally:
+            SearchIndex.invalidate()
+            db.session.remove()
+            db.drop_all()
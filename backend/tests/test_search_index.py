@@ -0,0 +1,259 @@
+"""
+Tests for the in-memory search index
+"""
+
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import db, Club
+from config import TestingConfig
+from utils.search_index import SearchIndex
+
+
+def make_club(name, embedding=None):
+    """Build a club with an optional stored embedding"""
+    return Club(
+        name=name,
+        website_url=f'https://example.com/{name}',
+        summary=f'{name} summary',
+        categories='Science and Technology',
+        summary_embedding=None if embedding is None else np.asarray(embedding, dtype=np.float32).tobytes()
+    )
+
+
+@pytest.fixture
+def context():
+    """Provide an app context with an empty test database"""
+    app.config.from_object(TestingConfig)
+
+    with app.app_context():
+        db.create_all()
+        SearchIndex.invalidate()
+        yield
+        SearchIndex.invalidate()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_build_normalizes_embeddings(context):
+    """Stored embeddings are loaded into one unit-norm matrix"""
+    db.session.add_all([
+        make_club('Coding', [3.0, 4.0, 0.0]),
+        make_club('Dance', [0.0, 0.0, 2.0]),
+        make_club('No Embedding'),
+    ])
+    db.session.commit()
+
+    index = SearchIndex.build()
+
+    assert index.size == 3
+    assert index.dimension == 3
+    assert index.embeddings.dtype == np.float32
+    assert index.embeddings.flags['C_CONTIGUOUS']
+    assert list(index.has_embedding) == [True, True, False]
+    np.testing.assert_allclose(np.linalg.norm(index.embeddings[:2], axis=1), [1.0, 1.0], rtol=1e-6)
+
+
+def test_semantic_similarities_scores_every_club(context):
+    """A single query vector is scored against all clubs at once"""
+    db.session.add_all([
+        make_club('Coding', [1.0, 0.0]),
+        make_club('Dance', [0.0, 1.0]),
+        make_club('Both', [1.0, 1.0]),
+    ])
+    db.session.commit()
+
+    index = SearchIndex.build()
+    similarities = index.semantic_similarities(np.array([2.0, 0.0]))
+
+    coding = index.position(Club.query.filter_by(name='Coding').first().id)
+    dance = index.position(Club.query.filter_by(name='Dance').first().id)
+    both = index.position(Club.query.filter_by(name='Both').first().id)
+    assert similarities[coding] == pytest.approx(1.0)
+    assert similarities[dance] == pytest.approx(0.0)
+    assert similarities[both] == pytest.approx(np.sqrt(0.5))
+
+
+def test_get_caches_until_invalidated(context):
+    """The index is built once and rebuilt only after invalidation"""
+    db.session.add(make_club('Coding', [1.0, 0.0]))
+    db.session.commit()
+
+    first = SearchIndex.get()
+    assert SearchIndex.get() is first
+
+    SearchIndex.invalidate()
+    assert SearchIndex.get() is not first
+
+
+def test_availability_overlap_counts_shared_slots(context):
+    """Shared slots are counted for every club with one bitwise AND"""
+    from utils.availability import mask_from_slots
+
+    evenings = make_club('Evenings')
+    evenings.availability_mask = mask_from_slots(['Monday-Evening', 'Tuesday-Evening'])
+    weekend = make_club('Weekend')
+    weekend.availability_mask = mask_from_slots(['Saturday-Morning'])
+    db.session.add_all([evenings, weekend])
+    db.session.commit()
+
+    index = SearchIndex.build()
+    overlap = index.availability_overlap(
+        mask_from_slots(['Monday-Evening', 'Tuesday-Evening', 'Sunday-Night'])
+    )
+
+    assert overlap[index.position(evenings.id)] == 2
+    assert overlap[index.position(weekend.id)] == 0
+
+
+def test_seeder_stores_availability_mask(context):
+    """Seeding packs parsed meeting times into the club's bitmask"""
+    from utils.availability import slot_bit
+    from utils.db_seed import DatabaseSeeder
+
+    DatabaseSeeder.seed_from_data([{
+        'name': 'Jazz Band',
+        'website_url': 'https://example.com/jazz',
+        'summary': 'Jazz music',
+        'categories': 'Creative and Performing Arts',
+        'meeting_times': ['Wednesday Evening', 'Saturday Afternoon']
+    }])
+
+    club = Club.query.filter_by(name='Jazz Band').first()
+    assert club.availability_mask == slot_bit('Wednesday', 'Evening') | slot_bit('Saturday', 'Afternoon')
+
+    club.availability_mask = 0
+    db.session.commit()
+    assert DatabaseSeeder.rebuild_availability_masks() == 1
+    assert Club.query.filter_by(name='Jazz Band').first().availability_mask != 0
+
+
+def test_exported_matrix_is_memory_mapped(context, tmp_path):
+    """A matching export is mapped read-only instead of decoding BLOBs, and ignored once stale"""
+    from utils.catalog import commit_catalog_change
+
+    db.session.add_all([make_club('Coding', [3.0, 4.0]), make_club('Dance', [0.0, 2.0])])
+    commit_catalog_change()
+    app.config['INDEX_DIR'] = str(tmp_path)
+    try:
+        SearchIndex.get().export(str(tmp_path))
+        SearchIndex.invalidate()
+        index = SearchIndex.get()
+
+        assert not index.vectors.data.flags['WRITEABLE']
+        assert isinstance(index.vectors.data.base, np.memmap)
+        np.testing.assert_allclose(index.embeddings, [[0.6, 0.8], [0.0, 1.0]], rtol=1e-6)
+
+        # Catalog changes that leave embeddings alone keep using the export
+        Club.query.filter_by(name='Dance').first().availability_mask = 1
+        commit_catalog_change()
+        index = SearchIndex.get()
+        assert index.availability_masks.tolist() == [0, 1]
+        assert not index.vectors.data.flags['WRITEABLE']
+
+        db.session.add(make_club('Chess', [1.0, 0.0]))
+        commit_catalog_change()
+        index = SearchIndex.get()
+        assert index.size == 3
+        assert index.vectors.data.flags['WRITEABLE']
+    finally:
+        app.config.from_object(TestingConfig)
+
+
+def test_lexical_index_loads_more_clubs_than_sql_variables(context):
+    """Fitting the TF-IDF fallback does not bind one SQL variable per club"""
+    import sqlite3
+    from utils.catalog import commit_catalog_change
+
+    db.session.add_all([make_club(f'Club {i}') for i in range(30)] + [make_club('Rowing')])
+    commit_catalog_change()
+    connection = db.session.connection().connection.driver_connection
+    limit = connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 10)
+    try:
+        similarities = SearchIndex.get().lexical_similarities('rowing')
+    finally:
+        connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+
+    assert similarities.argmax() == 30
+    assert similarities[30] > 0
+
+
+def test_search_scores_whole_catalog_and_keeps_top_results(context):
+    """Name hits, categories and availability are scored as arrays and the best 30 returned in order"""
+    from utils.availability import mask_from_slots
+    from utils.catalog import commit_catalog_change
+    from utils.db_seed import DatabaseSeeder
+    from utils.search_engine import ClubSearchEngine, MAX_RESULTS
+
+    clubs = [make_club(f'Club {i}') for i in range(40)] + [make_club('Chess Club'), make_club('Chessmates')]
+    for club in clubs[::2]:
+        club.availability_mask = mask_from_slots(['Monday-Evening'])
+    db.session.add_all(clubs)
+    db.session.commit()
+    DatabaseSeeder.rebuild_category_links()
+    commit_catalog_change()
+
+    index = SearchIndex.get()
+    assert index.name_matches('CHESS').sum() == 2
+    assert not index.name_matches('club 1\x00club').any()
+
+    results = ClubSearchEngine.search('chess', [], [])
+    assert len(results) == MAX_RESULTS
+    assert [result['club'].name for result in results[:2]] == ['Chess Club', 'Chessmates']
+    # Equal scores keep catalog order
+    assert [result['club'].id for result in results[2:]] == sorted(result['club'].id for result in results[2:])
+
+    results = ClubSearchEngine.search('', ['science and technology'], ['Monday-Evening', 'Friday-Morning'])
+    assert len(results) == 21
+    assert {result['matchScore'] for result in results} == {50}
+
+
+def test_search_results_cached_until_catalog_changes(context, monkeypatch):
+    """Equivalent requests are served from the result cache, which a catalog change drops"""
+    from utils.catalog import commit_catalog_change
+    from utils.search_engine import ClubSearchEngine
+
+    db.session.add_all([make_club('Chess Club'), make_club('Go Club')])
+    commit_catalog_change()
+
+    first = ClubSearchEngine.search('Chess', [], ['Monday-Evening'])
+    monkeypatch.setattr(ClubSearchEngine, '_match_scores', staticmethod(lambda *args: pytest.fail('scored twice')))
+    again = ClubSearchEngine.search('  chess ', [], ['Monday-Evening', 'Monday-Evening'])
+    assert [r['club'].id for r in again] == [r['club'].id for r in first]
+    assert SearchIndex.get().result_stats == {'hits': 1, 'misses': 1}
+
+    monkeypatch.undo()
+    db.session.add(make_club('Chess Masters'))
+    commit_catalog_change()
+    assert SearchIndex.get().cached_results(ClubSearchEngine.canonical_request('chess', [], [])) is None
+
+
+def test_failed_similarities_are_not_cached(context, monkeypatch):
+    """A ranking scored without similarities (encoding failed) is returned but not cached"""
+    from utils.catalog import commit_catalog_change
+    from utils.search_engine import ClubSearchEngine
+
+    db.session.add_all([make_club('Chess Club'), make_club('Go Club')])
+    commit_catalog_change()
+
+    def fail(self, query):
+        raise RuntimeError('encoder unavailable')
+
+    monkeypatch.setattr(SearchIndex, 'lexical_similarities', fail)
+    monkeypatch.setattr(SearchIndex, 'lexical_similarities_many', fail)
+    assert ClubSearchEngine.search('chess', [], [])[0]['club'].name == 'Chess Club'
+    assert ClubSearchEngine.search_batch([{'keywords': 'chess'}])[0][0]['club'].name == 'Chess Club'
+    key = ClubSearchEngine.canonical_request('chess', [], [])
+    assert SearchIndex.get().cached_results(key) is None
+
+    monkeypatch.undo()
+    results = ClubSearchEngine.search('chess', [], [])
+    assert results[0]['matchScore'] > 25
+    assert SearchIndex.get().cached_results(key) is not None
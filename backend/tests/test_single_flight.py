@@ -0,0 +1,71 @@
+"""
+Tests for request coalescing of concurrent identical searches
+"""
+
+import sys
+import os
+import threading
+import time
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.single_flight import SingleFlight
+
+
+def run_concurrently(count, target):
+    """Start count threads on target at the same time and wait for them"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    """Callers arriving while a call is in flight get its result without running it"""
+    flight = SingleFlight()
+    calls = []
+
+    def slow_search():
+        calls.append(1)
+        time.sleep(0.2)
+        return ('ranked',)
+
+    results = run_concurrently(8, lambda: flight.do('chess', slow_search))
+
+    assert results == [('ranked',)] * 8
+    assert len(calls) == 1
+    assert flight.stats() == {'executed': 1, 'coalesced': 7, 'in_flight': 0}
+
+    # Once finished, the next call runs again; other keys never wait
+    assert flight.do('chess', lambda: 'fresh') == 'fresh'
+    assert flight.do('go', lambda: 'other') == 'other'
+
+
+def test_errors_reach_every_waiter():
+    """An exception in the shared call is raised in every coalesced caller"""
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError('index unavailable')
+
+    results = run_concurrently(4, lambda: flight.do('chess', failing))
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats()['in_flight'] == 0
+    with pytest.raises(ValueError):
+        flight.do('chess', lambda: int('x'))
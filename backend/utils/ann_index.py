@@ -0,0 +1,167 @@
+"""
+Inverted-file (IVF) approximate nearest neighbor index over club embeddings
+Embeddings are clustered with spherical k-means; a query is only compared
+exactly against the clubs in the clusters whose centroids are closest to it
+"""
+
+import hashlib
+import os
+import numpy as np
+
+INDEX_FILENAME = 'ann_ivf.npz'
+
+
+def default_list_count(n_vectors):
+    """Number of IVF clusters for a catalog size (about 4 * sqrt(n))"""
+    return max(1, min(n_vectors, int(4 * np.sqrt(n_vectors))))
+
+
+def embeddings_fingerprint(rows, embeddings_key, n_lists, iterations):
+    """
+    Hash of the indexed rows, the key of the embeddings they come from and the
+    build parameters, used to tell whether a saved index is stale
+
+    embeddings_key identifies the embedding matrix from metadata (see
+    SearchIndex.embeddings_key), so the matrix itself is never hashed.
+    """
+    digest = hashlib.sha1()
+    digest.update(np.asarray(rows, dtype=np.int64).tobytes())
+    digest.update(f'{embeddings_key}:{n_lists}:{iterations}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _nearest_centroids(vectors, centroids, batch_size=8192):
+    """Index of the most similar centroid for every (normalized) vector"""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), batch_size):
+        batch = vectors[start:start + batch_size]
+        assignments[start:start + batch_size] = np.argmax(batch @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """Cluster centroids plus the index rows of each cluster, stored CSR-style"""
+
+    def __init__(self, centroids, list_offsets, list_rows, fingerprint=None):
+        """
+        Args:
+            centroids (np.ndarray): (n_lists, dim) float32 L2-normalized centroids
+            list_offsets (np.ndarray): n_lists + 1 offsets into list_rows
+            list_rows (np.ndarray): SearchIndex rows grouped by cluster
+            fingerprint (str): embeddings_fingerprint of the indexed data
+        """
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.list_offsets = np.asarray(list_offsets, dtype=np.int64)
+        self.list_rows = np.asarray(list_rows, dtype=np.int64)
+        self.fingerprint = fingerprint
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, embeddings, rows, n_lists=None, iterations=10, seed=0, fingerprint=None):
+        """
+        Cluster the given rows of an embedding matrix
+
+        Args:
+            embeddings (np.ndarray): (n_clubs, dim) L2-normalized embedding matrix
+            rows (np.ndarray): Rows to index (e.g. clubs that have an embedding)
+            n_lists (int): Number of clusters (default: default_list_count)
+            iterations (int): k-means iterations
+            seed (int): Seed for the training sample and initial centroids
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = embeddings[rows]
+        n_lists = min(n_lists or default_list_count(len(rows)), len(rows))
+        if n_lists == 0:
+            return cls(np.zeros((0, embeddings.shape[1]), dtype=np.float32),
+                       np.zeros(1, dtype=np.int64), rows, fingerprint)
+
+        # Train on a sample; 64 points per cluster is plenty for coarse quantization
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(rows), n_lists * 64)
+        sample = vectors[rng.choice(len(rows), size=sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = _nearest_centroids(sample, centroids)
+            order = np.argsort(assignments, kind='stable')
+            counts = np.bincount(assignments, minlength=n_lists)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            occupied = counts > 0
+
+            sums = np.zeros_like(centroids)
+            sums[occupied] = np.add.reduceat(sample[order], starts[occupied], axis=0)
+            # Re-seed empty clusters with random sample points
+            empty = np.flatnonzero(~occupied)
+            if len(empty):
+                sums[empty] = sample[rng.choice(sample_size, size=len(empty), replace=False)]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        assignments = _nearest_centroids(vectors, centroids)
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=n_lists)
+        list_offsets = np.concatenate(([0], np.cumsum(counts)))
+        return cls(centroids, list_offsets, rows[order], fingerprint)
+
+    @classmethod
+    def load_or_build(cls, embeddings, rows, directory=None, n_lists=None, iterations=10,
+                      embeddings_key=None):
+        """
+        Load a persisted index for exactly these vectors and parameters, or build and persist one
+
+        Args:
+            directory (str): Where the index is persisted (None disables persistence)
+            embeddings_key (str): Identifies the embeddings (see SearchIndex.embeddings_key);
+                without one the index is neither loaded nor persisted
+        """
+        n_lists = n_lists or default_list_count(len(rows))
+        fingerprint = embeddings_fingerprint(rows, embeddings_key, n_lists, iterations)
+        path = os.path.join(directory, INDEX_FILENAME) if directory and embeddings_key else None
+
+        if path and os.path.exists(path):
+            try:
+                index = cls.load(path)
+                if index.fingerprint == fingerprint:
+                    return index
+            except Exception:
+                pass  # Corrupt or incompatible file, rebuild below
+
+        index = cls.build(embeddings, rows, n_lists=n_lists, iterations=iterations, fingerprint=fingerprint)
+        if path:
+            index.save(path)
+        return index
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as saved:
+            return cls(saved['centroids'], saved['list_offsets'], saved['list_rows'],
+                       str(saved['fingerprint']))
+
+    def save(self, path):
+        """Persist the index (atomic replace)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp_path, centroids=self.centroids, list_offsets=self.list_offsets,
+                 list_rows=self.list_rows, fingerprint=np.array(self.fingerprint or ''))
+        os.replace(tmp_path, path)
+
+    def candidates(self, query, n_probe=8):
+        """
+        Rows in the n_probe clusters closest to a normalized query vector
+
+        More probes find more of the true nearest neighbors at the cost of
+        scoring more rows exactly.
+        """
+        if self.n_lists == 0:
+            return self.list_rows
+        n_probe = max(1, min(n_probe, self.n_lists))
+        scores = self.centroids @ query
+        probes = np.argpartition(-scores, n_probe - 1)[:n_probe]
+        return np.concatenate([
+            self.list_rows[self.list_offsets[probe]:self.list_offsets[probe + 1]] for probe in probes
+        ])
@@ -0,0 +1,47 @@
+"""
+Availability bitmask helpers
+Each club's weekly schedule is packed into a 28-bit integer with one bit
+per (day, time slot) pair, so availability checks become bitwise ANDs
+"""
+
+import numpy as np
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+TIME_SLOTS = ['Morning', 'Afternoon', 'Evening', 'Night']
+
+# Bit position of every (day, time slot) pair: day-major, slot-minor
+SLOT_BITS = {
+    (day, time_slot): 1 << (day_index * len(TIME_SLOTS) + slot_index)
+    for day_index, day in enumerate(DAYS)
+    for slot_index, time_slot in enumerate(TIME_SLOTS)
+}
+
+
+def slot_bit(day, time_slot):
+    """Bit for a single (day, time slot) pair, or 0 if either is unknown"""
+    return SLOT_BITS.get((day, time_slot), 0)
+
+
+def mask_from_slots(slots):
+    """Build a bitmask from request slots such as ['Monday-Afternoon']"""
+    mask = 0
+    for slot in slots or []:
+        try:
+            day, time_slot = slot.split('-')
+        except (ValueError, AttributeError):
+            continue
+        mask |= slot_bit(day, time_slot)
+    return mask
+
+
+def popcount(masks):
+    """Number of set bits in each element of an integer array"""
+    masks = np.asarray(masks, dtype=np.uint32)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.int32)
+
+    # SWAR popcount for numpy versions without bitwise_count
+    masks = masks - ((masks >> 1) & 0x55555555)
+    masks = (masks & 0x33333333) + ((masks >> 2) & 0x33333333)
+    masks = (masks + (masks >> 4)) & 0x0F0F0F0F
+    return ((masks * 0x01010101) >> 24).astype(np.int32)
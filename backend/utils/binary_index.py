@@ -0,0 +1,123 @@
+"""
+Binary sign-code prefilter over club embeddings
+Each embedding is reduced to one bit per dimension (its sign after centering),
+packed into uint64 words; a query is compared against every code by Hamming
+distance and only the closest candidates are re-scored with full vectors
+"""
+
+import numpy as np
+
+# Codes compared per block, keeps the working arrays in cache
+_BLOCK_ROWS = 32768
+
+# SWAR popcount masks
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_M8 = np.uint64(0x00FF00FF00FF00FF)
+_H0001 = np.uint64(0x0001000100010001)
+
+
+def hamming_distances(codes, code):
+    """
+    Hamming distance between one packed code and every column of a
+    word-major (words, n) uint64 code matrix
+
+    Without np.bitwise_count, bytes are popcounted per word with in-place
+    SWAR steps and accumulated across words, 8 per word, so a byte lane
+    holds at most 248 for 31 words (1984 bits); the lanes are then widened
+    to 16 bits before the final horizontal sum.
+    """
+    n_words, n = codes.shape
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(codes ^ code[:, None]).sum(axis=0, dtype=np.int32)
+    if n_words * 8 > 255:
+        raise ValueError('Codes longer than 1984 bits are not supported without np.bitwise_count')
+
+    distances = np.empty(n, dtype=np.int32)
+    for start in range(0, n, _BLOCK_ROWS):
+        stop = min(start + _BLOCK_ROWS, n)
+        total = np.zeros(stop - start, dtype=np.uint64)
+        word = np.empty_like(total)
+        shifted = np.empty_like(total)
+        for i in range(n_words):
+            np.bitwise_xor(codes[i, start:stop], code[i], out=word)
+            np.right_shift(word, np.uint64(1), out=shifted)
+            shifted &= _M1
+            word -= shifted
+            np.right_shift(word, np.uint64(2), out=shifted)
+            shifted &= _M2
+            word &= _M2
+            word += shifted
+            np.right_shift(word, np.uint64(4), out=shifted)
+            word += shifted
+            word &= _M4
+            total += word
+        np.right_shift(total, np.uint64(8), out=shifted)
+        shifted &= _M8
+        total &= _M8
+        total += shifted
+        total *= _H0001
+        total >>= np.uint64(48)
+        distances[start:stop] = total
+    return distances
+
+
+def pack_signs(vectors):
+    """
+    Pack the sign bit of every dimension into uint64 words
+
+    Returns a word-major (words, n_vectors) matrix so each word of every code
+    is contiguous for hamming_distances.
+    """
+    vectors = np.atleast_2d(vectors)
+    bits = np.packbits(vectors > 0, axis=1)
+    padding = -bits.shape[1] % 8
+    if padding:
+        bits = np.pad(bits, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(np.ascontiguousarray(bits).view(np.uint64).T)
+
+
+class BinaryIndex:
+    """Sign codes of the embedded rows, ranked by Hamming distance to a query"""
+
+    def __init__(self, codes, rows, center):
+        """
+        Args:
+            codes (np.ndarray): (words, n_rows) uint64 packed sign codes
+            rows (np.ndarray): SearchIndex row of each code
+            center (np.ndarray): Mean embedding subtracted before taking signs
+        """
+        self.codes = codes
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.center = np.asarray(center, dtype=np.float32)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes
+
+    @classmethod
+    def build(cls, embeddings, rows):
+        """
+        Encode the given rows of an embedding matrix
+
+        Sentence embeddings share a common direction, so signs are taken after
+        subtracting the mean vector; otherwise most bits would be the same for
+        every club.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = embeddings[rows]
+        center = vectors.mean(axis=0) if len(rows) else np.zeros(embeddings.shape[1], dtype=np.float32)
+        return cls(pack_signs(vectors - center), rows, center)
+
+    def distances(self, query):
+        """Hamming distance from a query to every code"""
+        code = pack_signs(np.asarray(query, dtype=np.float32) - self.center)[:, 0]
+        return hamming_distances(self.codes, code)
+
+    def candidates(self, query, count=300):
+        """SearchIndex rows of the count codes closest to the query"""
+        if count >= len(self.rows):
+            return self.rows
+        distances = self.distances(query)
+        return self.rows[np.argpartition(distances, count - 1)[:count]]
@@ -0,0 +1,68 @@
+"""
+Catalog generation tracking
+Every change to club data bumps a generation number stored in the database,
+so caches in any process (search index, response cache) can tell they are stale
+"""
+
+import threading
+from flask import g, has_app_context, has_request_context
+from models import CatalogState, db
+
+STATE_ID = 1
+
+
+def current_generation():
+    """Current catalog generation (read at most once per request)"""
+    if has_request_context() and 'catalog_generation' in g:
+        return g.catalog_generation
+
+    generation = db.session.query(CatalogState.generation).filter_by(id=STATE_ID).scalar() or 0
+
+    if has_request_context():
+        g.catalog_generation = generation
+    return generation
+
+
+def bump_generation():
+    """Increment the generation in the current transaction (the caller commits)"""
+    updated = db.session.query(CatalogState).filter_by(id=STATE_ID).update(
+        {CatalogState.generation: CatalogState.generation + 1}
+    )
+    if not updated:
+        db.session.add(CatalogState(id=STATE_ID, generation=1))
+    if has_app_context():
+        g.pop('catalog_generation', None)
+
+
+def commit_catalog_change():
+    """Bump the generation, commit, and drop this process's search index right away"""
+    from utils.search_index import SearchIndex
+
+    bump_generation()
+    db.session.commit()
+    SearchIndex.invalidate()
+
+
+class GenerationCache:
+    """Dict of values derived from the catalog, emptied as soon as the generation changes"""
+
+    def __init__(self):
+        self.generation = None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def entries(self, generation):
+        """The dict of entries built from generation, which callers read and fill"""
+        with self._lock:
+            if generation != self.generation:
+                self._entries = {}
+                self.generation = generation
+            return self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self.generation = None
+
+    def __len__(self):
+        return len(self._entries)
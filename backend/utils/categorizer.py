@@ -3,6 +3,38 @@ Automatic club categorization based on name and description
 Uses keyword matching and pattern recognition
 """
 
+import re
+from collections import Counter
+import numpy as np
+
+
+def _trie_regex(keywords):
+    """
+    Regex alternation matching any of the keywords, factored by shared prefixes
+
+    A trie-shaped pattern lets the regex engine reject a position after a few
+    characters instead of trying every keyword in turn. Spaces in multi-word
+    keywords match any run of whitespace.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}  # End of a keyword
+
+    def build(node):
+        branches = [
+            (r'\s+' if char == ' ' else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{pattern})?' if '' in node else pattern
+
+    return build(trie)
+
 
 class ClubCategorizer:
     """Categorize clubs based on keywords in name and description"""
@@ -19,14 +51,14 @@ class ClubCategorizer:
             'pledge', 'greek life', 'social fraternity', 'social sorority'
         ],
         'Business and Entrepreneurship': [
-            'business', 'entrepreneurship', 'startup', 'consulting', 'consulting',
+            'business', 'entrepreneurship', 'startup', 'consulting',
             'economics', 'finance', 'accounting', 'marketing', 'sales', 'case competition',
             'investment', 'trading', 'venture'
         ],
         'Cultural/Ethnic': [
             'cultural', 'international', 'language', 'spanish', 'chinese', 'arabic',
             'french', 'german', 'korean', 'japanese', 'indian', 'african', 'heritage',
-            'community', 'ethnic', 'diaspora', 'asia', 'latin', 'caribbean', 'cultural'
+            'community', 'ethnic', 'diaspora', 'asia', 'latin', 'caribbean'
         ],
         'Military': [
             'military', 'rotc', 'army', 'navy', 'air force', 'marine', 'veteran',
@@ -39,7 +71,7 @@ class ClubCategorizer:
         ],
         'Activism/Advocacy/Awareness': [
             'activism', 'advocacy', 'awareness', 'social justice', 'environment',
-            'sustainability', 'sustainability', 'climate', 'conservation', 'volunteer',
+            'sustainability', 'climate', 'conservation', 'volunteer',
             'volunteering', 'charity', 'outreach', 'community service', 'mental health'
         ],
         'Sports and Recreation': [
@@ -93,7 +125,7 @@ class ClubCategorizer:
         'E-Sports and Gaming': [
             'esports', 'gaming', 'video games', 'game', 'competitive gaming', 'tournament',
             'twitch', 'streaming', 'discord', 'league of legends', 'valorant', 'overwatch',
-            'minecraft', 'dota', 'fortnite', 'gaming'
+            'minecraft', 'dota', 'fortnite'
         ],
         'Honorary/Honor Society': [
             'honor', 'honorary', 'honor society', 'honors', 'prestigious', 'excellence',
@@ -101,6 +133,70 @@ class ClubCategorizer:
         ]
     }
     
+    # Compiled keyword matcher, built on first use (see _compile)
+    _keyword_index = None
+    _pattern = None
+
+    @classmethod
+    def _compile(cls):
+        """
+        Compile CATEGORY_KEYWORDS into one regex plus a keyword -> category indexes lookup
+
+        The keywords are merged into a prefix trie and emitted as a single
+        alternation, so one scan of the text finds every keyword that starts
+        at a word boundary and ends at one (optionally followed by a plural
+        's'/'es'). Duplicate keywords count once per category.
+        """
+        if cls._pattern is None:
+            index = {}
+            for category_index, keywords in enumerate(cls.CATEGORY_KEYWORDS.values()):
+                for keyword in keywords:
+                    keyword = ' '.join(keyword.lower().split())
+                    categories = index.setdefault(keyword, [])
+                    if category_index not in categories:
+                        categories.append(category_index)
+
+            # Lookahead so matches starting at different words may overlap
+            # ('mental health' and 'health'); the trie prefers the longest keyword
+            cls._pattern = re.compile(r'\b(?=(' + _trie_regex(index) + r")(?:e?s)?\b)")
+            cls._keyword_index = index
+        return cls._keyword_index
+
+    @classmethod
+    def _matched_keywords(cls, text):
+        """Distinct keywords that occur in text as whole words"""
+        cls._compile()
+        return {' '.join(match.split()) for match in cls._pattern.findall(text.lower())}
+
+    @classmethod
+    def _scores(cls, keywords):
+        """Counter of category name -> number of the given distinct keywords it lists"""
+        index = cls._compile()
+        categories = list(cls.CATEGORY_KEYWORDS)
+        scores = Counter()
+        for phrase in keywords:
+            for category_index in index[phrase]:
+                scores[categories[category_index]] += 1
+        return scores
+
+    @classmethod
+    def _best_category(cls, scores):
+        """Highest scoring category (ties go to the category listed first), or 'Other'"""
+        if not scores:
+            return 'Other'
+        best = max(scores.values())
+        return next(category for category in cls.CATEGORY_KEYWORDS if scores[category] == best)
+
+    @classmethod
+    def score(cls, club_name, club_description):
+        """
+        Number of distinct keywords of each category found in the name and description
+
+        Returns:
+            Counter: category name -> score (categories without matches are omitted)
+        """
+        return cls._scores(cls._matched_keywords(f"{club_name or ''} {club_description or ''}"))
+
     @staticmethod
     def categorize(club_name, club_description):
         """
@@ -113,21 +209,111 @@ class ClubCategorizer:
         Returns:
             str: The predicted category name
         """
-        # Combine name and description for keyword matching
-        text = f"{club_name} {club_description}".lower()
-        
-        # Score each category based on keyword matches
-        category_scores = {}
-        for category, keywords in ClubCategorizer.CATEGORY_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            category_scores[category] = score
-        
-        # Return category with highest score, default to 'Other'
-        if max(category_scores.values()) > 0:
-            return max(category_scores, key=category_scores.get)
-        else:
-            return 'Other'
+        return ClubCategorizer._best_category(ClubCategorizer.score(club_name, club_description))
+
+    @staticmethod
+    def categorize_many(clubs):
+        """
+        Categorize many clubs with one scan of all their text
+
+        Every club's name and description are joined into one string separated
+        by NUL characters, which no keyword can match across. The compiled
+        matcher runs over it once, and each match is mapped back to its club
+        through the offset where the club's text starts.
+
+        Args:
+            clubs: Iterable of (club_name, club_description) pairs
+
+        Returns:
+            list: Predicted category name for each club, in order
+        """
+        ClubCategorizer._compile()
+        texts = [f"{name or ''} {description or ''}".lower().replace('\x00', ' ') for name, description in clubs]
+        if not texts:
+            return []
+        lengths = np.array([len(text) + 1 for text in texts], dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        matches = [(match.start(), match.group(1)) for match in ClubCategorizer._pattern.finditer('\x00'.join(texts))]
+        keywords = [set() for _ in texts]
+        if matches:
+            owners = np.searchsorted(starts, [offset for offset, _ in matches], side='right') - 1
+            for owner, (_, keyword) in zip(owners, matches):
+                keywords[owner].add(' '.join(keyword.split()))
+        return [ClubCategorizer._best_category(ClubCategorizer._scores(found)) for found in keywords]
     
+    @staticmethod
+    def category_centroids(index):
+        """
+        Mean normalized summary embedding of the clubs in each category
+
+        Args:
+            index (SearchIndex): Catalog snapshot with embeddings and category members
+
+        Returns:
+            tuple: (list of lowercased category names, (n_categories, dim) float32
+                    matrix of L2-normalized centroids); categories without any
+                    embedded member are left out
+        """
+        names = [name for name, members in index.category_members.items()
+                 if (members & index.has_embedding).any()]
+        if not names or index.dimension == 0:
+            return [], np.zeros((0, index.dimension), dtype=np.float32)
+
+        membership = np.stack([index.category_members[name] & index.has_embedding for name in names])
+        centroids = membership.astype(np.float32) @ index.embeddings
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True).clip(min=1e-12)
+        return names, centroids
+
+    @staticmethod
+    def suggest_from_embeddings(club_ids=None, top_k=1, min_similarity=0.0):
+        """
+        Suggest categories for clubs from their stored summary embeddings
+
+        Each category is represented by the centroid of the embeddings of
+        clubs that already carry it, and every club is scored against all
+        centroids with one matrix multiply. No model is loaded.
+
+        Args:
+            club_ids (list): Clubs to categorize (default: embedded clubs without categories)
+            top_k (int): Suggestions per club
+            min_similarity (float): Drop suggestions below this cosine similarity
+
+        Returns:
+            dict: club id -> list of (category name, similarity), best first
+        """
+        # Imported lazily so keyword categorization works without the database
+        from models import Category, db
+        from utils.search_index import SearchIndex
+
+        index = SearchIndex.get()
+        names, centroids = ClubCategorizer.category_centroids(index)
+        if not names:
+            return {}
+
+        if club_ids is None:
+            categorized = np.zeros(index.size, dtype=bool)
+            for members in index.category_members.values():
+                categorized |= members
+            rows = np.flatnonzero(index.has_embedding & ~categorized)
+        else:
+            rows = [index.position(club_id) for club_id in club_ids]
+            rows = np.array([row for row in rows if row is not None and index.has_embedding[row]], dtype=np.int64)
+        if len(rows) == 0:
+            return {}
+
+        display_names = {name.lower(): name for (name,) in db.session.query(Category.name)}
+        similarities = index.vectors.to_float(rows) @ centroids.T
+        best = np.argsort(-similarities, axis=1)[:, :top_k]
+
+        suggestions = {}
+        for i, row in enumerate(rows):
+            suggestions[int(index.club_ids[row])] = [
+                (display_names.get(names[j], names[j]), float(similarities[i, j]))
+                for j in best[i] if similarities[i, j] >= min_similarity
+            ]
+        return suggestions
+
     @staticmethod
     def get_category_list():
         """Return all available categories"""
@@ -5,9 +5,16 @@ Supports CSV, JSON, and direct data input
 
 import json
 import csv
+import functools
+import hashlib
+import time
+from itertools import islice
 from pathlib import Path
-from models import Club, MeetingTime, db
+from sqlalchemy import bindparam
+from models import Club, MeetingTime, Category, club_categories, db
 from utils.categorizer import ClubCategorizer
+from utils.catalog import commit_catalog_change
+from utils.availability import slot_bit, SLOT_BITS
 
 
 class DatabaseSeeder:
@@ -33,7 +40,7 @@ class DatabaseSeeder:
     }
 
     @staticmethod
-    def seed_from_json(json_file):
+    def seed_from_json(json_file, chunk_size=1000, categorize=False):
         """
         Seed database from JSON file
         
@@ -52,61 +59,48 @@ class DatabaseSeeder:
         try:
             with open(json_file, 'r') as f:
                 data = json.load(f)
-            
-            count = 0
-            for club_data in data:
-                count += DatabaseSeeder._add_club(club_data)
-            
-            db.session.commit()
-            print(f"✓ Successfully seeded {count} clubs from {json_file}")
-            return count
         except Exception as e:
-            db.session.rollback()
             print(f"✗ Error seeding from JSON: {e}")
             return 0
+        return DatabaseSeeder.ingest(data, source=json_file, chunk_size=chunk_size, categorize=categorize)
 
     @staticmethod
-    def seed_from_csv(csv_file):
+    def seed_from_csv(csv_file, chunk_size=1000, categorize=False):
         """
         Seed database from CSV file
         
         Supports two formats:
         1. TerpLink CSV: Name, WebsiteKey, ProfilePicture, Summary, CategoryNames, MeetingTimes
         2. Simple CSV: name, website_url, picture_id, summary, categories, timing
+
+        Rows are streamed from the file, so large CSVs are never held in memory.
         """
         try:
-            import csv as csv_module
             with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv_module.DictReader(f)
-                count = 0
-                
-                for row in reader:
-                    # Handle both CSV formats
-                    club_data = {
-                        'name': row.get('Name') or row.get('name'),
-                        'website_url': row.get('WebsiteKey') or row.get('website_url'),
-                        'picture_id': row.get('ProfilePicture') or row.get('picture_id'),
-                        'summary': row.get('Summary') or row.get('summary'),
-                        'categories': DatabaseSeeder._parse_categories(
-                            row.get('CategoryNames') or row.get('categories')
-                        ),
-                        'meeting_times': DatabaseSeeder._parse_meeting_times(
-                            row.get('MeetingTimes') or row.get('timing')
-                        )
-                    }
-                    count += DatabaseSeeder._add_club(club_data)
-                
-                db.session.commit()
-                print(f"✓ Successfully seeded {count} clubs from {csv_file}")
-                return count
+                rows = (DatabaseSeeder._club_data_from_row(row) for row in csv.DictReader(f))
+                return DatabaseSeeder.ingest(rows, source=csv_file, chunk_size=chunk_size, categorize=categorize)
         except Exception as e:
-            db.session.rollback()
             print(f"✗ Error seeding from CSV: {e}")
             import traceback
             traceback.print_exc()
             return 0
 
     @staticmethod
+    def _club_data_from_row(row):
+        """Club dictionary from a CSV row in either supported format"""
+        return {
+            'source_key': row.get('Id') or row.get('WebsiteKey') or row.get('source_key'),
+            'name': row.get('Name') or row.get('name'),
+            'website_url': row.get('WebsiteKey') or row.get('website_url'),
+            'picture_id': row.get('ProfilePicture') or row.get('picture_id'),
+            'summary': row.get('Summary') or row.get('summary'),
+            # Parsed by _prepare_club, only for clubs that are actually inserted
+            'categories': row.get('CategoryNames') or row.get('categories'),
+            'meeting_times': row.get('MeetingTimes') or row.get('timing')
+        }
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def _parse_categories(categories_str):
         """
         Parse categories from various formats
@@ -144,15 +138,43 @@ class DatabaseSeeder:
         return ', '.join([c for c in categories if c])
 
     @staticmethod
+    def _split_categories(categories_str):
+        """Split a comma-separated categories string into unique category names"""
+        names = []
+        for name in (categories_str or '').split(','):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    @staticmethod
+    def _get_categories(names):
+        """Load Category rows by name in one query, creating any that don't exist yet"""
+        if not names:
+            return []
+        existing = {c.name: c for c in Category.query.filter(Category.name.in_(names))}
+        categories = []
+        for name in names:
+            category = existing.get(name)
+            if category is None:
+                category = Category(name=name)
+                db.session.add(category)
+                existing[name] = category
+            categories.append(category)
+        return categories
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def _parse_meeting_times(meeting_times_str):
         """
         Parse meeting times from various formats
         - List format: "['Monday Evening', 'Tuesday Morning']"
         - Semicolon format: "Monday Evening;Tuesday Morning"
         - Regular string: "Monday Evening, Tuesday Morning"
+        Returns a tuple; results are memoized since scraped values repeat a lot
         """
         if not meeting_times_str:
-            return []
+            return ()
         
         meeting_str = str(meeting_times_str).strip()
         times = []
@@ -176,119 +198,554 @@ class DatabaseSeeder:
         else:
             times = [meeting_str]
         
-        return [t for t in times if t]  # Filter out empty strings
+        return tuple(t for t in times if t)  # Filter out empty strings
 
     @staticmethod
-    def seed_from_data(clubs_data):
+    def seed_from_data(clubs_data, chunk_size=1000):
         """
         Seed database from Python list of dictionaries
         
         Args:
             clubs_data: List of club dictionaries
         """
+        return DatabaseSeeder.ingest(clubs_data, chunk_size=chunk_size)
+
+    @staticmethod
+    def ingest(clubs_data, source=None, chunk_size=1000, categorize=False):
+        """
+        Bulk insert clubs that don't exist yet
+
+        Existing club names and categories are loaded once up front, then rows
+        are consumed chunk_size at a time: each chunk is parsed in memory and
+        written with one executemany INSERT per table in its own transaction.
+
+        Args:
+            clubs_data: Iterable of club dictionaries (may be a generator)
+            source (str): Where the rows came from, used in the summary message
+            chunk_size (int): Rows per transaction
+            categorize (bool): Give clubs without categories the keyword
+                category of their name and summary (see _categorize_missing)
+
+        Returns: Number of clubs added
+        """
+        started = time.perf_counter()
+        added = skipped = rows = unparsed = categorized = 0
+        try:
+            existing_names = set()
+            existing_keys = set()
+            for name, source_key in db.session.query(Club.name, Club.source_key):
+                existing_names.add(name)
+                existing_keys.add(source_key)
+            category_ids = dict(db.session.query(Category.name, Category.id))
+
+            clubs_data = iter(clubs_data)
+            while True:
+                chunk = list(islice(clubs_data, chunk_size))
+                if not chunk:
+                    break
+                rows += len(chunk)
+
+                clubs = []
+                for club_data in chunk:
+                    name = (club_data.get('name') or '').strip()
+                    if not name or name in existing_names:
+                        skipped += 1
+                        continue
+                    club = DatabaseSeeder._prepare_club(club_data)
+                    if club['row']['source_key'] in existing_keys:
+                        club['row']['source_key'] = None  # Key shared with another club, can't be synced
+                    existing_names.add(name)
+                    existing_keys.add(club['row']['source_key'])
+                    unparsed += club['unparsed']
+                    clubs.append(club)
+
+                if clubs:
+                    if categorize:
+                        categorized += DatabaseSeeder._categorize_missing(clubs)
+                    DatabaseSeeder._insert_clubs(clubs, category_ids)
+                    db.session.commit()
+                    added += len(clubs)
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Error seeding{' from ' + str(source) if source else ''}: {e}")
+        finally:
+            if added:
+                commit_catalog_change()
+
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        print(f"✓ Successfully seeded {added} clubs{' from ' + str(source) if source else ''} "
+              f"({skipped} skipped, {rows} rows in {elapsed:.2f}s, {rate:.0f} rows/sec)")
+        if unparsed:
+            print(f"  ⊘ Could not parse {unparsed} meeting times")
+        if categorized:
+            print(f"  ✓ Categorized {categorized} clubs without categories by keyword")
+        return added
+
+    @staticmethod
+    def _categorize_missing(clubs):
+        """
+        Fill in the category of prepared clubs that have none with ClubCategorizer
+
+        All uncategorized clubs of a chunk are categorized in one pass. Clubs
+        that match no keyword are left without categories (not 'Other'), so
+        `flask suggest-categories` can still suggest some from embeddings.
+
+        Returns: Number of clubs that were given a category
+        """
+        missing = [club for club in clubs if not club['categories']]
+        predicted = ClubCategorizer.categorize_many(
+            (club['row']['name'], club['row']['summary']) for club in missing
+        )
+        count = 0
+        for club, category in zip(missing, predicted):
+            if category != 'Other':
+                club['row']['categories'] = category
+                club['categories'] = [category]
+                count += 1
+        return count
+
+    @staticmethod
+    def sync_from_csv(csv_file, delete_missing=True, chunk_size=1000):
+        """Sync the database with a CSV file (see sync)"""
+        with open(csv_file, 'r', encoding='utf-8') as f:
+            rows = (DatabaseSeeder._club_data_from_row(row) for row in csv.DictReader(f))
+            return DatabaseSeeder.sync(rows, source=csv_file, delete_missing=delete_missing,
+                                       chunk_size=chunk_size)
+
+    @staticmethod
+    def sync_from_json(json_file, delete_missing=True, chunk_size=1000):
+        """Sync the database with a JSON file (see sync)"""
+        with open(json_file, 'r') as f:
+            data = json.load(f)
+        return DatabaseSeeder.sync(data, source=json_file, delete_missing=delete_missing,
+                                   chunk_size=chunk_size)
+
+    @staticmethod
+    def sync(clubs_data, source=None, delete_missing=True, chunk_size=1000):
+        """
+        Make the clubs table match a full export, touching only what changed
+
+        Incoming clubs are matched to stored ones by source key (TerpLink Id,
+        falling back to WebsiteKey / website_url), or by name for clubs stored
+        before keys existed. A club is rewritten only if the hash of its source
+        record differs from the one stored at the last sync, so unchanged clubs
+        are never parsed or written. Clubs missing from the export are deleted
+        unless delete_missing is False; rows without a source key are skipped,
+        but keep the stored club of the same name.
+
+        Changes are applied deletes first, then updates, then inserts, in
+        chunk_size transactions, and the catalog generation is bumped once.
+        Updated summaries keep their embedding until `flask vectorize-clubs`
+        re-encodes them (their embedding_source_hash no longer matches).
+
+        Returns:
+            dict: Change set with the 'inserted', 'updated' and 'deleted' club
+                  ids plus 'unchanged' and 'skipped' counts
+        """
+        started = time.perf_counter()
+        changes = {'inserted': [], 'updated': [], 'deleted': [], 'unchanged': 0, 'skipped': 0}
+        rows = unparsed = 0
         try:
-            count = 0
+            by_key = {}
+            by_name = {}
+            names = {}
+            for club_id, name, source_key, source_hash in db.session.query(
+                Club.id, Club.name, Club.source_key, Club.source_hash
+            ):
+                names[name] = club_id
+                if source_key:
+                    by_key[source_key] = (club_id, source_hash)
+                else:
+                    by_name[name] = (club_id, source_hash)
+            category_ids = dict(db.session.query(Category.name, Category.id))
+
+            seen_keys = set()
+            matched_ids = set()
+            inserts = []
+            updates = []
             for club_data in clubs_data:
-                count += DatabaseSeeder._add_club(club_data)
-            
-            db.session.commit()
-            print(f"✓ Successfully seeded {count} clubs")
-            return count
+                rows += 1
+                name = (club_data.get('name') or '').strip()
+                source_key = DatabaseSeeder._source_key(club_data)
+                if not name or not source_key or source_key in seen_keys:
+                    # Can't be synced, but a club stored under its name is still in the export
+                    if name in names:
+                        matched_ids.add(names[name])
+                    changes['skipped'] += 1
+                    continue
+                seen_keys.add(source_key)
+
+                match = by_key.get(source_key) or by_name.pop(name, None)
+                if match is None:
+                    inserts.append(club_data)
+                    continue
+                club_id, stored_hash = match
+                matched_ids.add(club_id)
+                if stored_hash == DatabaseSeeder._source_hash(club_data):
+                    changes['unchanged'] += 1
+                else:
+                    updates.append((club_id, club_data))
+
+            if delete_missing:
+                deleted = sorted(set(names.values()) - matched_ids)
+                for i in range(0, len(deleted), chunk_size):
+                    DatabaseSeeder._delete_clubs(deleted[i:i + chunk_size])
+                    db.session.commit()
+                changes['deleted'] = deleted
+            deleted_ids = set(changes['deleted'])
+            remaining = {name: club_id for name, club_id in names.items() if club_id not in deleted_ids}
+
+            for i in range(0, len(updates), chunk_size):
+                clubs = []
+                for club_id, club_data in updates[i:i + chunk_size]:
+                    club = DatabaseSeeder._prepare_club(club_data)
+                    owner = remaining.get(club['row']['name'], club_id)
+                    if owner != club_id:
+                        changes['skipped'] += 1  # Renamed to the name of another club
+                        continue
+                    club['id'] = club_id
+                    remaining[club['row']['name']] = club_id
+                    unparsed += club['unparsed']
+                    clubs.append(club)
+                if clubs:
+                    DatabaseSeeder._update_clubs(clubs, category_ids)
+                    db.session.commit()
+                    changes['updated'].extend(club['id'] for club in clubs)
+
+            for i in range(0, len(inserts), chunk_size):
+                clubs = []
+                for club_data in inserts[i:i + chunk_size]:
+                    club = DatabaseSeeder._prepare_club(club_data)
+                    if club['row']['name'] in remaining:
+                        changes['skipped'] += 1  # Name already used by another club
+                        continue
+                    remaining[club['row']['name']] = None
+                    unparsed += club['unparsed']
+                    clubs.append(club)
+                if clubs:
+                    changes['inserted'].extend(DatabaseSeeder._insert_clubs(clubs, category_ids))
+                    db.session.commit()
         except Exception as e:
             db.session.rollback()
-            print(f"✗ Error seeding from data: {e}")
-            return 0
+            print(f"✗ Error syncing{' from ' + str(source) if source else ''}: {e}")
+        finally:
+            if changes['inserted'] or changes['updated'] or changes['deleted']:
+                commit_catalog_change()
+
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        print(f"✓ Synced {rows} clubs{' from ' + str(source) if source else ''}: "
+              f"{len(changes['inserted'])} inserted, {len(changes['updated'])} updated, "
+              f"{len(changes['deleted'])} deleted, {changes['unchanged']} unchanged, "
+              f"{changes['skipped']} skipped ({elapsed:.2f}s, {rate:.0f} rows/sec)")
+        if unparsed:
+            print(f"  ⊘ Could not parse {unparsed} meeting times")
+        return changes
+
+    @staticmethod
+    def _source_key(club_data):
+        """Stable identity of a club in the scraped source, or None"""
+        key = club_data.get('source_key') or club_data.get('website_url') or club_data.get('url')
+        key = str(key).strip() if key is not None else ''
+        return key or None
+
+    @staticmethod
+    def _source_hash(club_data):
+        """SHA-256 of the raw source fields a club is built from"""
+        fields = [
+            club_data.get('name'),
+            club_data.get('website_url') or club_data.get('url'),
+            club_data.get('picture_id'),
+            club_data.get('summary') or club_data.get('description'),
+            club_data.get('categories'),
+            club_data.get('meeting_times') or club_data.get('timing'),
+        ]
+        encoded = json.dumps(fields, default=str, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _prepare_club(club_data):
+        """
+        Parse a club dictionary into column values, category names and meeting slots
+
+        Returns: dict with 'row', 'categories', 'slots' and the number of 'unparsed'
+                 meeting times, or None if the club has no name
+        """
+        name = (club_data.get('name') or '').strip()
+        if not name:
+            return None
+
+        categories = club_data.get('categories') or ''
+        if isinstance(categories, list):
+            categories = ', '.join(c.strip() for c in categories if c and c.strip())
+        else:
+            categories = DatabaseSeeder._parse_categories(categories)
+
+        meeting_times = club_data.get('meeting_times') or club_data.get('timing') or []
+        if isinstance(meeting_times, str):
+            meeting_times = DatabaseSeeder._parse_meeting_times(meeting_times)
+
+        slots = {}
+        unparsed = 0
+        for meeting_str in meeting_times:
+            slot = DatabaseSeeder._parse_meeting_slot(meeting_str)
+            if slot is None:
+                unparsed += 1
+            elif slot not in slots:
+                slots[slot] = meeting_str
+
+        mask = 0
+        for day, time_slot in slots:
+            mask |= slot_bit(day, time_slot)
+
+        return {
+            'row': {
+                'name': name,
+                'website_url': club_data.get('website_url') or club_data.get('url') or '',
+                'picture_id': club_data.get('picture_id'),
+                'summary': club_data.get('summary') or club_data.get('description') or '',
+                'categories': categories,
+                'availability_mask': mask,
+                'source_key': DatabaseSeeder._source_key(club_data),
+                'source_hash': DatabaseSeeder._source_hash(club_data)
+            },
+            'categories': DatabaseSeeder._split_categories(categories),
+            'slots': slots,
+            'unparsed': unparsed
+        }
+
+    @staticmethod
+    def _insert_clubs(clubs, category_ids):
+        """
+        Write prepared clubs, their meeting times and category links with bulk INSERTs
+
+        Core table inserts are used instead of ORM objects so each table is one
+        executemany round trip. category_ids (name -> id) is updated with any
+        categories created here.
+
+        Returns: Ids of the inserted clubs
+        """
+        DatabaseSeeder._insert_categories(clubs, category_ids)
+
+        clubs_table = Club.__table__
+        result = db.session.execute(
+            clubs_table.insert().returning(clubs_table.c.name, clubs_table.c.id),
+            [club['row'] for club in clubs]
+        )
+        club_ids = dict(result.all())
+        for club in clubs:
+            club['id'] = club_ids[club['row']['name']]
+
+        DatabaseSeeder._insert_club_details(clubs, category_ids)
+        return [club['id'] for club in clubs]
+
+    @staticmethod
+    def _update_clubs(clubs, category_ids):
+        """Overwrite existing clubs (prepared clubs with an 'id') and replace their meeting times and links"""
+        DatabaseSeeder._insert_categories(clubs, category_ids)
+
+        clubs_table = Club.__table__
+        db.session.execute(
+            clubs_table.update().where(clubs_table.c.id == bindparam('club_id')),
+            [dict(club['row'], club_id=club['id']) for club in clubs]
+        )
+        DatabaseSeeder._delete_club_details([club['id'] for club in clubs])
+        DatabaseSeeder._insert_club_details(clubs, category_ids)
+
+    @staticmethod
+    def _delete_clubs(club_ids):
+        """Delete clubs along with their meeting times and category links"""
+        DatabaseSeeder._delete_club_details(club_ids)
+        db.session.execute(Club.__table__.delete().where(Club.__table__.c.id.in_(club_ids)))
+
+    @staticmethod
+    def _insert_categories(clubs, category_ids):
+        """Insert categories used by prepared clubs that are not in category_ids yet"""
+        new_categories = sorted({
+            name for club in clubs for name in club['categories'] if name not in category_ids
+        })
+        if new_categories:
+            categories_table = Category.__table__
+            result = db.session.execute(
+                categories_table.insert().returning(categories_table.c.name, categories_table.c.id),
+                [{'name': name} for name in new_categories]
+            )
+            category_ids.update(result.all())
+
+    @staticmethod
+    def _insert_club_details(clubs, category_ids):
+        """Bulk insert meeting times and category links of prepared clubs with an 'id'"""
+        meeting_times = []
+        links = []
+        for club in clubs:
+            for (day, time_slot), description in club['slots'].items():
+                meeting_times.append({
+                    'club_id': club['id'],
+                    'day_of_week': day,
+                    'time_slot': time_slot,
+                    'meeting_description': description
+                })
+            links.extend({'club_id': club['id'], 'category_id': category_ids[name]} for name in club['categories'])
+
+        if meeting_times:
+            db.session.execute(MeetingTime.__table__.insert(), meeting_times)
+        if links:
+            db.session.execute(club_categories.insert(), links)
+
+    @staticmethod
+    def _delete_club_details(club_ids):
+        """Delete the meeting times and category links of the given clubs"""
+        db.session.execute(club_categories.delete().where(club_categories.c.club_id.in_(club_ids)))
+        db.session.execute(MeetingTime.__table__.delete().where(MeetingTime.__table__.c.club_id.in_(club_ids)))
 
     @staticmethod
-    def _add_club(club_data):
+    @functools.lru_cache(maxsize=4096)
+    def _parse_meeting_slot(meeting_str):
         """
-        Add a single club to the database
+        Extract the day and time slot from a meeting time string
         
-        Returns: 1 if successful, 0 if club already exists
+        Understands strings like "Monday Afternoon", "Thursday 6pm evening", etc.
+
+        Returns: (day, time_slot) tuple, or None if either could not be found
+        """
+        meeting_lower = str(meeting_str).lower().strip()
+        day_found = None
+        time_slot_found = None
+
+        # Try to find day of week
+        for day_pattern, day_name in DatabaseSeeder.MEETING_PATTERNS.items():
+            if day_pattern in meeting_lower:
+                day_found = day_name
+                break
+
+        # Try to find time slot
+        for time_pattern, time_name in DatabaseSeeder.TIME_SLOT_PATTERNS.items():
+            if time_pattern in meeting_lower:
+                time_slot_found = time_name
+                break
+
+        if day_found and time_slot_found:
+            return day_found, time_slot_found
+        return None
+
+    @staticmethod
+    def rebuild_availability_masks():
+        """
+        Recompute every club's availability bitmask from its meeting times
+
+        Useful for databases seeded before the bitmask column existed.
+        Returns: Number of clubs whose mask changed
         """
         try:
-            name = club_data.get('name')
-            website_url = club_data.get('website_url') or club_data.get('url')
-            picture_id = club_data.get('picture_id')
-            summary = club_data.get('summary') or club_data.get('description', '')
-            categories = club_data.get('categories', '')
-            
-            # Skip if club already exists
-            if Club.query.filter_by(name=name).first():
-                print(f"⊘ Club '{name}' already exists, skipping")
-                return 0
-            
-            # Create club object
-            club = Club(
-                name=name,
-                website_url=website_url,
-                picture_id=picture_id,
-                summary=summary,
-                categories=categories
-            )
-            
-            db.session.add(club)
-            db.session.flush()  # Get the club ID
-            
-            # Add meeting times
-            meeting_times = club_data.get('meeting_times') or club_data.get('timing', [])
-            if isinstance(meeting_times, str):
-                meeting_times = [meeting_times]
-            
-            for meeting_str in meeting_times:
-                DatabaseSeeder._add_meeting_time(club.id, meeting_str)
-            
-            print(f"✓ Added club: {name}")
-            return 1
+            masks = {club_id: 0 for (club_id,) in db.session.query(Club.id)}
+            slots = db.session.query(
+                MeetingTime.club_id, MeetingTime.day_of_week, MeetingTime.time_slot
+            ).all()
+            for club_id, day, time_slot in slots:
+                masks[club_id] = masks.get(club_id, 0) | SLOT_BITS.get((day, time_slot), 0)
+
+            current = dict(db.session.query(Club.id, Club.availability_mask))
+            updates = [
+                {'id': club_id, 'availability_mask': mask}
+                for club_id, mask in masks.items()
+                if current.get(club_id) != mask
+            ]
+            if updates:
+                db.session.bulk_update_mappings(Club, updates)
+            commit_catalog_change()
+            print(f"✓ Rebuilt availability masks ({len(updates)} clubs changed)")
+            return len(updates)
         except Exception as e:
-            print(f"✗ Error adding club: {e}")
+            db.session.rollback()
+            print(f"✗ Error rebuilding availability masks: {e}")
             return 0
 
     @staticmethod
-    def _add_meeting_time(club_id, meeting_str):
+    def add_categories(assignments):
         """
-        Parse meeting time string and add to database
-        
-        Attempts to extract day and time slot from string like:
-        "Monday Afternoon", "Thursday 6pm", etc.
+        Add categories to existing clubs (e.g. accepted categorizer suggestions)
+
+        Args:
+            assignments (dict): club id -> list of category names
+
+        Returns: Number of club/category links added
         """
         try:
-            meeting_lower = meeting_str.lower().strip()
-            day_found = None
-            time_slot_found = None
-
-            # Try to find day of week
-            for day_pattern, day_name in DatabaseSeeder.MEETING_PATTERNS.items():
-                if day_pattern in meeting_lower:
-                    day_found = day_name
-                    break
+            club_ids = list(assignments)
+            current = dict(db.session.query(Club.id, Club.categories).filter(Club.id.in_(club_ids)))
+            names = sorted({name for names in assignments.values() for name in names})
+            DatabaseSeeder._get_categories(names)
+            db.session.flush()
+            category_ids = dict(db.session.query(Category.name, Category.id).filter(Category.name.in_(names)))
 
-            # Try to find time slot
-            for time_pattern, time_name in DatabaseSeeder.TIME_SLOT_PATTERNS.items():
-                if time_pattern in meeting_lower:
-                    time_slot_found = time_name
-                    break
+            updates = []
+            links = []
+            for club_id, names in assignments.items():
+                if club_id not in current:
+                    continue
+                existing = DatabaseSeeder._split_categories(current[club_id])
+                added = [name for name in dict.fromkeys(names) if name not in existing]
+                if not added:
+                    continue
+                updates.append({'id': club_id, 'categories': ', '.join(existing + added)})
+                links.extend({'club_id': club_id, 'category_id': category_ids[name]} for name in added)
 
-            # Add meeting time if both day and slot found
-            if day_found and time_slot_found:
-                meeting_time = MeetingTime(
-                    club_id=club_id,
-                    day_of_week=day_found,
-                    time_slot=time_slot_found,
-                    meeting_description=meeting_str
-                )
-                db.session.add(meeting_time)
-            else:
-                print(f"  ⊘ Could not parse meeting time: '{meeting_str}'")
+            if updates:
+                db.session.bulk_update_mappings(Club, updates)
+            if links:
+                db.session.execute(club_categories.insert(), links)
+            commit_catalog_change()
+            print(f"✓ Added {len(links)} categories to {len(updates)} clubs")
+            return len(links)
         except Exception as e:
-            print(f"  ✗ Error adding meeting time: {e}")
+            db.session.rollback()
+            print(f"✗ Error adding categories: {e}")
+            return 0
+
+    @staticmethod
+    def rebuild_category_links():
+        """
+        Populate the club/category association table from Club.categories strings
+
+        Useful for databases seeded before the categories table existed.
+        Returns: Number of club/category links written
+        """
+        try:
+            db.session.execute(club_categories.delete())
+            rows = db.session.query(Club.id, Club.categories).all()
+
+            names = set()
+            for _, categories in rows:
+                names.update(DatabaseSeeder._split_categories(categories))
+            DatabaseSeeder._get_categories(sorted(names))
+            db.session.flush()
+            category_ids = {c.name: c.id for c in Category.query.filter(Category.name.in_(names))}
+
+            links = [
+                {'club_id': club_id, 'category_id': category_ids[name]}
+                for club_id, categories in rows
+                for name in DatabaseSeeder._split_categories(categories)
+            ]
+            if links:
+                db.session.execute(club_categories.insert(), links)
+            commit_catalog_change()
+            print(f"✓ Rebuilt category links ({len(links)} links, {len(category_ids)} categories)")
+            return len(links)
+        except Exception as e:
+            db.session.rollback()
+            print(f"✗ Error rebuilding category links: {e}")
+            return 0
 
     @staticmethod
     def clear_all():
         """Clear all clubs from database (use with caution)"""
         try:
+            db.session.execute(club_categories.delete())
+            MeetingTime.query.delete()
             Club.query.delete()
-            db.session.commit()
+            Category.query.delete()
+            commit_catalog_change()
             print("✓ Database cleared")
         except Exception as e:
             db.session.rollback()
@@ -299,7 +756,10 @@ class DatabaseSeeder:
         """Get database statistics"""
         total_clubs = Club.query.count()
         total_meeting_times = MeetingTime.query.count()
-        categories = db.session.query(Club.categories, db.func.count(Club.id)).group_by(Club.categories).all()
+        # Number of clubs per category, counted on the association table
+        categories = db.session.query(
+            Category.name, db.func.count(club_categories.c.club_id)
+        ).join(club_categories, club_categories.c.category_id == Category.id).group_by(Category.name).all()
         
         return {
             'total_clubs': total_clubs,
@@ -3,101 +3,287 @@ Utility for pre-computing and storing embeddings for club summaries.
 This speeds up search by avoiding on-the-fly embedding computation.
 """
 
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from models import Club, db
-from sentence_transformers import SentenceTransformer
+from utils.catalog import commit_catalog_change
+from utils import model_registry
+from utils.quantization import vector_to_bytes, vector_from_bytes
 
-# Initialize embedding model
-try:
-    embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-    MODEL_AVAILABLE = True
-except ImportError:
-    MODEL_AVAILABLE = False
-    embedding_model = None
+CHECKPOINT_FILENAME = 'vectorize_checkpoint.json'
 
 
-def vectorize_all_clubs(app):
+def vectorize_all_clubs(app, batch_size=64, chunk_size=500, workers=1, resume=True, force=False,
+                        club_ids=None):
     """
     Pre-compute embeddings for all club summaries and store in database.
+
+    Only stale clubs are encoded: clubs without an embedding, whose summary
+    changed since it was embedded, or whose embedding came from another model
+    or is stored in another format than EMBEDDING_FORMAT.
+    Clubs are streamed in id order, chunk_size at a time. Each chunk is encoded
+    in batches of batch_size (optionally sharded across worker processes) and
+    committed on its own, and the last committed id is checkpointed so an
+    interrupted run can resume where it stopped.
+    If any embedding changed, the catalog generation is bumped and the
+    normalized embedding matrix is exported to INDEX_DIR (see
+    SearchIndex.export) for search workers to memory-map.
     
     Args:
         app: Flask application instance with app context
+        batch_size (int): Summaries per model.encode call
+        chunk_size (int): Clubs loaded and committed per transaction
+        workers (int): Encoder processes (1 encodes in this process)
+        resume (bool): Continue after the checkpoint of an interrupted run
+        force (bool): Re-encode every club even if its embedding is up to date
+        club_ids (iterable): Only consider these clubs (e.g. the ones touched by a sync)
     
     Returns:
-        dict: Statistics about vectorization (clubs processed, errors, etc.)
+        dict: Statistics about vectorization (clubs processed, errors, throughput, etc.)
     """
-    if not MODEL_AVAILABLE:
+    if not model_registry.is_available():
         return {
             'status': 'error',
             'message': 'Sentence transformers not available'
         }
-    
+
     with app.app_context():
-        clubs = Club.query.all()
-        total_clubs = len(clubs)
+        checkpoint_path = _checkpoint_path(app)
+        last_id = _read_checkpoint(checkpoint_path) if resume else None
+        start_id = last_id or 0
+
+        if club_ids is not None:
+            club_ids = sorted(club_id for club_id in set(club_ids) if club_id > start_id)
+            total_clubs = len(club_ids)
+        else:
+            total_clubs = Club.query.filter(Club.id > start_id).count()
+        model_version = model_registry.model_version()
+        embedding_format = app.config.get('EMBEDDING_FORMAT', 'float32')
         vectorized_count = 0
+        skipped_count = 0
         error_count = 0
-        
+        started = time.perf_counter()
+
+        if last_id:
+            print(f"Resuming vectorization after club id {last_id}...")
         print(f"Starting vectorization of {total_clubs} clubs...")
-        
-        for i, club in enumerate(clubs, 1):
-            try:
-                # Encode the summary to embedding
-                embedding = embedding_model.encode(club.summary, convert_to_tensor=False)
-                
-                # Convert numpy array to bytes for storage
-                embedding_bytes = embedding.astype(np.float32).tobytes()
-                
-                # Store embedding in database
-                club.summary_embedding = embedding_bytes
-                vectorized_count += 1
-                
-                if i % 100 == 0:
-                    print(f"  Processed {i}/{total_clubs} clubs...")
-                
-            except Exception as e:
-                print(f"  Error vectorizing club '{club.name}': {str(e)}")
-                error_count += 1
-        
-        # Commit all changes
-        db.session.commit()
+
+        pool = None
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+        try:
+            for chunk in _iter_chunks(start_id, chunk_size, club_ids):
+                stale = []
+                for club_id, summary, source_hash, embedded_with, stored_format, has_embedding in chunk:
+                    summary = summary or ''
+                    text_hash = summary_hash(summary)
+                    if (force or not has_embedding or source_hash != text_hash
+                            or embedded_with != model_version
+                            or (stored_format or 'float32') != embedding_format):
+                        stale.append((club_id, summary, text_hash))
+                skipped_count += len(chunk) - len(stale)
+
+                embeddings = _encode_chunk([summary for _, summary, _ in stale], batch_size, pool, workers)
+
+                updates = []
+                for (club_id, _, text_hash), embedding in zip(stale, embeddings):
+                    if embedding is None:
+                        error_count += 1
+                        continue
+                    updates.append({
+                        'id': club_id,
+                        'summary_embedding': embedding_to_bytes(embedding, embedding_format),
+                        'embedding_model': model_version,
+                        'embedding_dim': int(np.asarray(embedding).shape[-1]),
+                        'embedding_format': embedding_format,
+                        'embedding_source_hash': text_hash
+                    })
+
+                if updates:
+                    db.session.bulk_update_mappings(Club, updates)
+                    db.session.commit()
+                _write_checkpoint(checkpoint_path, chunk[-1][0])
+
+                vectorized_count += len(updates)
+                elapsed = time.perf_counter() - started
+                print(f"  Processed {vectorized_count + skipped_count + error_count}/{total_clubs} clubs, "
+                      f"{skipped_count} up to date ({vectorized_count / elapsed:.1f} clubs/sec)...")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        _clear_checkpoint(checkpoint_path)
+
+        # Leave the generation (and every worker's index and caches) alone unless
+        # this run, or the interrupted run it resumed, stored new embeddings
+        if vectorized_count or last_id:
+            commit_catalog_change()
+
+            # Export the matrix so search workers can memory-map it instead of decoding BLOBs
+            index_dir = app.config.get('INDEX_DIR')
+            if index_dir:
+                from utils.search_index import SearchIndex
+                SearchIndex.get().export(index_dir)
+
+        elapsed = time.perf_counter() - started
+        clubs_per_second = vectorized_count / elapsed if elapsed > 0 else 0.0
         print(f"Vectorization complete!")
         
         return {
             'status': 'success',
             'total_clubs': total_clubs,
             'vectorized': vectorized_count,
+            'skipped': skipped_count,
             'errors': error_count,
-            'message': f'Successfully vectorized {vectorized_count}/{total_clubs} clubs'
+            'resumed_from': last_id,
+            'elapsed_seconds': elapsed,
+            'clubs_per_second': clubs_per_second,
+            'message': (f'Successfully vectorized {vectorized_count}/{total_clubs} clubs '
+                        f'({skipped_count} already up to date) '
+                        f'in {elapsed:.1f}s ({clubs_per_second:.1f} clubs/sec)')
         }
 
 
-def get_embedding_from_bytes(embedding_bytes):
+def summary_hash(summary):
+    """SHA-256 of the summary text an embedding was computed from"""
+    return hashlib.sha256((summary or '').encode('utf-8')).hexdigest()
+
+
+def _iter_chunks(start_id, chunk_size, club_ids=None):
+    """
+    Yield club rows in id order, chunk_size at a time (keyset pagination)
+
+    Rows are (id, summary, embedding_source_hash, embedding_model, embedding_format, has_embedding).
+    With club_ids (sorted, all > start_id) only those clubs are loaded.
+    """
+    columns = (
+        Club.id, Club.summary, Club.embedding_source_hash, Club.embedding_model,
+        Club.embedding_format, Club.summary_embedding.isnot(None)
+    )
+    if club_ids is not None:
+        for i in range(0, len(club_ids), chunk_size):
+            chunk = db.session.query(*columns).filter(
+                Club.id.in_(club_ids[i:i + chunk_size])
+            ).order_by(Club.id).all()
+            if chunk:
+                yield chunk
+        return
+
+    last_id = start_id
+    while True:
+        chunk = db.session.query(*columns).filter(
+            Club.id > last_id
+        ).order_by(Club.id).limit(chunk_size).all()
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1][0]
+
+
+def _encode_chunk(summaries, batch_size, pool, workers):
+    """Encode a chunk of summaries, sharding it across the process pool if there is one"""
+    if not summaries:
+        return []
+    if pool is None:
+        return _encode_shard(summaries, batch_size)
+
+    shard_size = -(-len(summaries) // workers)
+    shards = [summaries[i:i + shard_size] for i in range(0, len(summaries), shard_size)]
+    embeddings = []
+    for shard_embeddings in pool.map(_encode_shard, shards, [batch_size] * len(shards)):
+        embeddings.extend(shard_embeddings)
+    return embeddings
+
+
+def _encode_shard(summaries, batch_size):
+    """
+    Encode summaries batch_size at a time with the shared model
+
+    Returns a list aligned with summaries; None marks a summary that failed to encode.
+    Runs in worker processes too, where the model is loaded once per process.
+    """
+    embeddings = []
+    for i in range(0, len(summaries), batch_size):
+        batch = summaries[i:i + batch_size]
+        try:
+            embeddings.extend(model_registry.encode(batch, batch_size=batch_size))
+        except Exception as e:
+            print(f"  Error vectorizing batch, retrying one by one: {str(e)}")
+            for summary in batch:
+                try:
+                    embeddings.append(model_registry.encode(summary))
+                except Exception as e:
+                    print(f"  Error vectorizing summary: {str(e)}")
+                    embeddings.append(None)
+    return embeddings
+
+
+def _checkpoint_path(app):
+    """Where the id of the last committed chunk is recorded, or None"""
+    index_dir = app.config.get('INDEX_DIR')
+    return os.path.join(index_dir, CHECKPOINT_FILENAME) if index_dir else None
+
+
+def _read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('model') != model_registry.model_version():
+            return None
+        return checkpoint.get('last_id')
+    except (OSError, ValueError):
+        return None
+
+
+def _write_checkpoint(path, last_id):
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'last_id': last_id, 'model': model_registry.model_version()}, f)
+
+
+def _clear_checkpoint(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def get_embedding_from_bytes(embedding_bytes, embedding_format=None):
     """
     Convert stored embedding bytes back to numpy array.
     
     Args:
         embedding_bytes: Binary embedding data from database
+        embedding_format (str): Club.embedding_format ('float32' if None)
     
     Returns:
-        numpy.ndarray: Embedding vector
+        numpy.ndarray: float32 embedding vector
     """
     if embedding_bytes is None:
         return None
-    return np.frombuffer(embedding_bytes, dtype=np.float32)
+    return vector_from_bytes(embedding_bytes, embedding_format or 'float32')
 
 
-def embedding_to_bytes(embedding):
+def embedding_to_bytes(embedding, embedding_format='float32'):
     """
     Convert embedding array to bytes for storage.
     
     Args:
         embedding: numpy array or tensor
+        embedding_format (str): 'float32', 'float16' or 'int8'
     
     Returns:
         bytes: Binary representation of embedding
     """
-    if isinstance(embedding, np.ndarray):
-        return embedding.astype(np.float32).tobytes()
-    # Handle tensor case
-    return embedding.cpu().numpy().astype(np.float32).tobytes()
+    if not isinstance(embedding, np.ndarray):
+        # Handle tensor case
+        embedding = embedding.cpu().numpy()
+    return vector_to_bytes(embedding, embedding_format)
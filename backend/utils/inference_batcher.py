@@ -0,0 +1,133 @@
+"""
+Micro-batching of query encoding
+Request threads submit texts to one inference thread, which encodes whatever
+is pending (up to a maximum batch size, waiting a few milliseconds for more)
+in a single model call and resolves each request's future with its vector
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from flask import current_app
+from utils import model_registry
+
+_STOP = object()
+
+
+class InferenceBatcher:
+    """Background thread that batches encode requests from concurrent callers"""
+
+    def __init__(self, encode, max_batch_size=32, max_wait=0.002):
+        """
+        Args:
+            encode (callable): Encodes a list of texts into a (len, dim) array
+            max_batch_size (int): Most texts encoded in one call
+            max_wait (float): Seconds to wait for more texts after the first
+                one arrives (0 only batches what is already queued)
+        """
+        self._encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'batches': 0, 'largest_batch': 0}
+
+    def submit(self, text):
+        """Queue a text for encoding and return a Future of its float32 vector"""
+        future = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+                self._thread.start()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text):
+        """Encode one text, batched with whatever other threads are encoding"""
+        return self.submit(text).result()
+
+    def close(self):
+        """Stop the inference thread after the texts already queued"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self):
+        """Requests served, model calls made and the average and largest batch size"""
+        with self._lock:
+            stats = dict(self._counters)
+        stats['mean_batch'] = stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+    def _next_batch(self):
+        """Block for one request, then collect more until the batch is full or max_wait passed"""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)  # Finish this batch, stop on the next one
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            texts = [text for text, _ in batch]
+            try:
+                vectors = np.asarray(self._encode(texts), dtype=np.float32)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self._counters['requests'] += len(batch)
+                self._counters['batches'] += 1
+                self._counters['largest_batch'] = max(self._counters['largest_batch'], len(batch))
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    """Process-wide batcher over the shared model, configured from INFERENCE_MAX_BATCH and INFERENCE_MAX_WAIT_MS"""
+    global _batcher
+    config = current_app.config
+    max_batch_size = config.get('INFERENCE_MAX_BATCH', 32)
+    max_wait = config.get('INFERENCE_MAX_WAIT_MS', 2.0) / 1000
+
+    with _batcher_lock:
+        if _batcher is None or (_batcher.max_batch_size, _batcher.max_wait) != (max_batch_size, max_wait):
+            if _batcher is not None:
+                _batcher.close()
+            _batcher = InferenceBatcher(
+                lambda texts: model_registry.encode(texts, batch_size=len(texts)), max_batch_size, max_wait
+            )
+        return _batcher
+
+
+def encode(text):
+    """Encode one query text, or run the model directly if batching is disabled"""
+    if not current_app.config.get('INFERENCE_BATCHING', True):
+        return model_registry.encode(text)
+    return get_batcher().encode(text)
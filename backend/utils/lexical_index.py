@@ -0,0 +1,124 @@
+"""
+Corpus-fitted TF-IDF index used when sentence-transformers is unavailable
+The vectorizer is fitted once over every club summary and persisted to disk,
+so a query only needs one transform and one sparse dot product
+"""
+
+import hashlib
+import os
+import numpy as np
+
+STOP_WORDS = [
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of',
+    'is', 'are', 'am', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might',
+    'must', 'can'
+]
+
+INDEX_FILENAME = 'lexical_index.joblib'
+
+
+def corpus_fingerprint(club_ids, texts):
+    """Hash of the indexed corpus, used to tell whether a saved index is stale"""
+    digest = hashlib.sha1()
+    for club_id, text in zip(club_ids, texts):
+        digest.update(f'{club_id}\0{text or ""}\0'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class LexicalIndex:
+    """TF-IDF document matrix over all club summaries"""
+
+    def __init__(self, club_ids, vectorizer, matrix, fingerprint):
+        self.club_ids = np.asarray(club_ids, dtype=np.int64)
+        self.vectorizer = vectorizer
+        self.matrix = matrix  # (n_clubs, n_terms) sparse CSR, L2-normalized rows
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def fit(cls, club_ids, texts):
+        """Fit the vectorizer over the whole corpus and keep the document matrix"""
+        # Imported lazily so loading the app does not pay for scikit-learn
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        texts = [text or '' for text in texts]
+        vectorizer = TfidfVectorizer(
+            lowercase=True,
+            stop_words=STOP_WORDS,
+            ngram_range=(1, 2),
+            sublinear_tf=True,
+            min_df=1
+        )
+        if any(text.strip() for text in texts):
+            try:
+                matrix = vectorizer.fit_transform(texts).tocsr()
+            except ValueError:
+                # Every document was made of stop words only
+                vectorizer, matrix = None, None
+        else:
+            vectorizer, matrix = None, None
+        return cls(club_ids, vectorizer, matrix, corpus_fingerprint(club_ids, texts))
+
+    @classmethod
+    def load_or_fit(cls, club_ids, texts, directory=None):
+        """
+        Load a persisted index for this exact corpus, or fit and persist a new one
+
+        Args:
+            club_ids (list): Club ids, one per document
+            texts (list): Club summaries aligned with club_ids
+            directory (str): Where the index is persisted (None disables persistence)
+        """
+        fingerprint = corpus_fingerprint(club_ids, [text or '' for text in texts])
+        path = os.path.join(directory, INDEX_FILENAME) if directory else None
+
+        if path and os.path.exists(path):
+            try:
+                import joblib
+                saved = joblib.load(path)
+                if saved.get('fingerprint') == fingerprint:
+                    return cls(club_ids, saved['vectorizer'], saved['matrix'], fingerprint)
+            except Exception:
+                pass  # Corrupt or incompatible file, refit below
+
+        index = cls.fit(club_ids, texts)
+        if path:
+            index.save(path)
+        return index
+
+    def save(self, path):
+        """Persist the fitted vectorizer and matrix (atomic replace)"""
+        import joblib
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        joblib.dump({
+            'fingerprint': self.fingerprint,
+            'vectorizer': self.vectorizer,
+            'matrix': self.matrix
+        }, tmp_path)
+        os.replace(tmp_path, path)
+
+    def similarities(self, query):
+        """
+        Cosine similarity of a query against every document
+
+        Returns:
+            np.ndarray: float32 similarities in [0, 1], one per document
+        """
+        if self.vectorizer is None or not query:
+            return np.zeros(len(self.club_ids), dtype=np.float32)
+        query_vector = self.vectorizer.transform([query])
+        return (self.matrix @ query_vector.T).toarray().ravel().astype(np.float32)
+
+    def similarities_many(self, queries):
+        """
+        Cosine similarity of several queries against every document (one sparse product)
+
+        Returns:
+            np.ndarray: (n_queries, n_documents) float32 similarities in [0, 1]
+        """
+        if self.vectorizer is None or not len(queries):
+            return np.zeros((len(queries), len(self.club_ids)), dtype=np.float32)
+        query_vectors = self.vectorizer.transform(list(queries))
+        return (query_vectors @ self.matrix.T).toarray().astype(np.float32)
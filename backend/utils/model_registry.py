@@ -0,0 +1,123 @@
+"""
+Process-wide, lazily loaded sentence embedding model
+Importing this module is cheap: torch and sentence-transformers are only
+imported the first time the model is actually needed
+"""
+
+import functools
+import importlib.util
+import os
+import threading
+import time
+
+MODEL_NAME = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+MODEL_REVISION = os.getenv('EMBEDDING_MODEL_REVISION')  # Optional pinned model revision
+TORCH_THREADS = int(os.getenv('TORCH_NUM_THREADS', 0))  # torch intra-op threads (0: torch default)
+
+_model = None
+_load_lock = threading.Lock()
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+_ready = threading.Event()
+_warmup_error = None
+_timings = {'load_seconds': None, 'warmup_seconds': None}
+
+
+@functools.lru_cache(maxsize=None)
+def is_available():
+    """Whether sentence-transformers is installed (checked without importing it)"""
+    return importlib.util.find_spec('sentence_transformers') is not None
+
+
+def get_model():
+    """
+    Return the shared SentenceTransformer, loading it on first use
+
+    Returns:
+        SentenceTransformer or None: None if sentence-transformers is not installed
+    """
+    global _model
+    if _model is not None:
+        return _model
+    if not is_available():
+        return None
+
+    with _load_lock:
+        if _model is None:
+            started = time.perf_counter()
+            if TORCH_THREADS:
+                # Keep concurrent workers from oversubscribing the CPU
+                import torch
+                torch.set_num_threads(TORCH_THREADS)
+            from sentence_transformers import SentenceTransformer
+            if MODEL_REVISION:
+                _model = SentenceTransformer(MODEL_NAME, revision=MODEL_REVISION)
+            else:
+                _model = SentenceTransformer(MODEL_NAME)
+            _timings['load_seconds'] = time.perf_counter() - started
+    return _model
+
+
+def model_version():
+    """Identifier stored with every embedding, e.g. 'all-MiniLM-L6-v2' or 'name@revision'"""
+    return f'{MODEL_NAME}@{MODEL_REVISION}' if MODEL_REVISION else MODEL_NAME
+
+
+def encode(texts, **kwargs):
+    """Encode text(s) with the shared model as float32 numpy arrays"""
+    model = get_model()
+    if model is None:
+        raise RuntimeError('Sentence transformers not available')
+    kwargs.setdefault('convert_to_numpy', True)
+    return model.encode(texts, **kwargs)
+
+
+def warmup():
+    """
+    Load the model and run a dummy encode so the first real query is not slow
+
+    The process is only marked ready if this succeeds (or sentence-transformers
+    is not installed, as TF-IDF search needs no warmup); otherwise the error is
+    reported by get_stats().
+    """
+    global _warmup_error
+    if _ready.is_set():
+        return
+    started = time.perf_counter()
+    try:
+        if get_model() is not None:
+            encode(['warmup'])
+    except Exception as e:
+        _warmup_error = f'{type(e).__name__}: {e}'
+        return
+    finally:
+        _timings['warmup_seconds'] = time.perf_counter() - started
+    _warmup_error = None
+    _ready.set()
+
+
+def start_warmup():
+    """Run warmup() once in a background thread (no-op if already started)"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None and not _ready.is_set():
+            _warmup_thread = threading.Thread(target=warmup, name='model-warmup', daemon=True)
+            _warmup_thread.start()
+
+
+def is_ready():
+    """True once warmup has succeeded"""
+    return _ready.is_set()
+
+
+def get_stats():
+    """Model name, readiness, the last warmup error and load/warmup timings"""
+    return {
+        'model': model_version(),
+        'available': is_available(),
+        'loaded': _model is not None,
+        'ready': is_ready(),
+        'warmup_error': _warmup_error,
+        'torch_threads': TORCH_THREADS or None,
+        **_timings
+    }
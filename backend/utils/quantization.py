@@ -0,0 +1,153 @@
+"""
+Compact embedding formats for storage and in-memory scoring
+- float32: 4 bytes per dimension (reference)
+- float16: 2 bytes per dimension
+- int8: 1 byte per dimension plus one float32 scale per vector (symmetric scalar quantization)
+"""
+
+import numpy as np
+
+FORMATS = ('float32', 'float16', 'int8')
+_SCALE_BYTES = np.dtype(np.float32).itemsize
+
+# Rows converted to float32 at a time when scoring a quantized matrix
+_BLOCK_ROWS = 1024
+
+
+def _check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown embedding format '{fmt}', expected one of {', '.join(FORMATS)}")
+
+
+def vector_to_bytes(vector, fmt='float32'):
+    """Serialize one embedding; int8 vectors are prefixed with their float32 scale"""
+    _check_format(fmt)
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    if fmt == 'int8':
+        scale = float(np.abs(vector).max()) / 127 if vector.size else 0.0
+        codes = np.round(vector / scale).astype(np.int8) if scale > 0 else np.zeros(vector.shape, np.int8)
+        return np.float32(scale).tobytes() + codes.tobytes()
+    return vector.astype(fmt).tobytes()
+
+
+def vector_from_bytes(data, fmt='float32'):
+    """Deserialize one embedding as float32"""
+    _check_format(fmt)
+    if fmt == 'int8':
+        scale = np.frombuffer(data[:_SCALE_BYTES], dtype=np.float32)[0]
+        return np.frombuffer(data[_SCALE_BYTES:], dtype=np.int8).astype(np.float32) * scale
+    return np.frombuffer(data, dtype=fmt).astype(np.float32)
+
+
+def vector_dimension(data, fmt='float32'):
+    """Number of dimensions of a serialized embedding"""
+    _check_format(fmt)
+    if fmt == 'int8':
+        return len(data) - _SCALE_BYTES
+    return len(data) // np.dtype(fmt).itemsize
+
+
+class QuantizedMatrix:
+    """Embedding matrix kept in float32, float16 or int8 (with per-row scales)"""
+
+    def __init__(self, data, scales=None):
+        self.data = np.ascontiguousarray(data)
+        self.scales = None if scales is None else np.asarray(scales, dtype=np.float32)
+
+    @classmethod
+    def from_float(cls, matrix, fmt='float32'):
+        """Quantize a float32 matrix row by row"""
+        _check_format(fmt)
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if fmt != 'int8':
+            return cls(matrix.astype(fmt, copy=False))
+        scales = np.abs(matrix).max(axis=1) / 127 if matrix.size else np.zeros(len(matrix), np.float32)
+        safe = np.where(scales > 0, scales, 1.0)[:, None]
+        return cls(np.round(matrix / safe).astype(np.int8), scales.astype(np.float32))
+
+    @property
+    def format(self):
+        return self.data.dtype.name
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def to_float(self, rows=None):
+        """float32 copy of the matrix (or of some rows); float32 matrices are returned as is"""
+        data = self.data if rows is None else self.data[rows]
+        if self.format == 'float32':
+            return data
+        matrix = data.astype(np.float32)
+        if self.scales is not None:
+            matrix *= (self.scales if rows is None else self.scales[rows])[:, None]
+        return matrix
+
+    def dot(self, vector, rows=None):
+        """
+        Matrix (or selected rows) times a float32 vector, or a (dim, k) matrix of vectors
+
+        Quantized rows are widened to float32 a block at a time, so scoring never
+        materializes a full float32 copy of the matrix.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        data = self.data if rows is None else self.data[rows]
+        if self.format == 'float32':
+            return data @ vector
+
+        result = np.empty((len(data),) + vector.shape[1:], dtype=np.float32)
+        for start in range(0, len(data), _BLOCK_ROWS):
+            result[start:start + _BLOCK_ROWS] = data[start:start + _BLOCK_ROWS].astype(np.float32) @ vector
+        if self.scales is not None:
+            scales = self.scales if rows is None else self.scales[rows]
+            result *= scales.reshape((-1,) + (1,) * (vector.ndim - 1))
+        return result
+
+
+def ranking_report(embeddings, queries=None, k=10, formats=FORMATS, sample=200, seed=0):
+    """
+    Compare top-k rankings of each format against float32
+
+    Args:
+        embeddings (np.ndarray): (n, dim) L2-normalized float32 matrix
+        queries (np.ndarray): Query vectors (default: a sample of the rows themselves)
+        k (int): Ranking depth compared
+        formats (tuple): Formats to evaluate
+        sample (int): Number of rows used as queries when queries is None
+
+    Returns:
+        list: One dict per format with bytes per vector, matrix size, mean
+              recall@k against float32 and the largest similarity error
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if queries is None:
+        rng = np.random.default_rng(seed)
+        picked = rng.choice(len(embeddings), size=min(sample, len(embeddings)), replace=False)
+        queries = embeddings[picked]
+    k = min(k, len(embeddings))
+
+    reference = QuantizedMatrix.from_float(embeddings, 'float32')
+    exact = [reference.dot(query) for query in queries]
+    exact_top = [set(np.argpartition(-scores, k - 1)[:k]) for scores in exact] if k else []
+
+    report = []
+    for fmt in formats:
+        matrix = QuantizedMatrix.from_float(embeddings, fmt)
+        recalls = []
+        max_error = 0.0
+        for query, scores, top in zip(queries, exact, exact_top):
+            approximate = matrix.dot(query)
+            recalls.append(len(top & set(np.argpartition(-approximate, k - 1)[:k])) / k)
+            max_error = max(max_error, float(np.abs(approximate - scores).max()))
+        report.append({
+            'format': fmt,
+            'bytes_per_vector': len(vector_to_bytes(embeddings[0], fmt)) if len(embeddings) else 0,
+            'matrix_bytes': matrix.nbytes,
+            f'recall_at_{k}': float(np.mean(recalls)) if recalls else 1.0,
+            'max_similarity_error': max_error
+        })
+    return report
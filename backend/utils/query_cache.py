@@ -0,0 +1,207 @@
+"""
+Cache of query embeddings so repeated searches skip model inference
+An in-process LRU sits in front of a directory of .npy files that all
+workers share and that survives restarts; entries are keyed by the
+normalized query text and the embedding model version
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from flask import current_app
+from utils import inference_batcher, model_registry
+
+CACHE_DIRNAME = 'query_embeddings'
+
+
+def normalize_query(query):
+    """Lowercase and collapse whitespace, so 'Coding ' and 'coding' share an entry"""
+    return ' '.join((query or '').lower().split())
+
+
+class QueryEmbeddingCache:
+    """Two-tier (memory LRU, then disk) cache of query embeddings with hit/miss counters"""
+
+    def __init__(self, max_entries=1024, directory=None, max_disk_entries=100000):
+        """
+        Args:
+            max_entries (int): Embeddings kept in this process
+            directory (str): Shared on-disk tier (None keeps the cache in memory only)
+            max_disk_entries (int): Files kept per model before the oldest are pruned
+        """
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_counts = {}
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def get(self, query, model_version):
+        """Cached embedding of a query for a model, or None"""
+        key = (model_version, normalize_query(query))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self._counters['memory_hits'] += 1
+                return vector
+
+        vector = self._read(key)
+        with self._lock:
+            if vector is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['disk_hits'] += 1
+            self._remember(key, vector)
+        return vector
+
+    def put(self, query, model_version, vector):
+        """Store a query embedding in both tiers and return it (read-only)"""
+        key = (model_version, normalize_query(query))
+        vector = np.array(vector, dtype=np.float32).reshape(-1)
+        vector.flags.writeable = False
+        with self._lock:
+            self._remember(key, vector)
+        self._write(key, vector)
+        return vector
+
+    def get_or_encode(self, query, model_version, encode):
+        """Cached embedding of a query, computed with encode(normalized query) on a miss"""
+        vector = self.get(query, model_version)
+        if vector is None:
+            vector = self.put(query, model_version, encode(normalize_query(query)))
+        return vector
+
+    def get_or_encode_many(self, queries, model_version, encode_many):
+        """Cached embeddings of several queries; the misses are encoded together with encode_many(list)"""
+        vectors = [self.get(query, model_version) for query in queries]
+        missing = list(dict.fromkeys(normalize_query(query) for query, vector in zip(queries, vectors)
+                                     if vector is None))
+        if missing:
+            encoded = dict(zip(missing, (self.put(query, model_version, vector)
+                                         for query, vector in zip(missing, encode_many(missing)))))
+            vectors = [encoded[normalize_query(query)] if vector is None else vector
+                       for query, vector in zip(queries, vectors)]
+        return vectors
+
+    def stats(self):
+        """Hit/miss counters, hit rate and number of in-memory entries"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop the in-memory tier and reset the counters (the disk tier is kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._counters = {name: 0 for name in self._counters}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, vector):
+        """Insert into the LRU (caller holds the lock)"""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _model_directory(self, model_version):
+        return os.path.join(self.directory, hashlib.sha1(model_version.encode('utf-8')).hexdigest()[:16])
+
+    def _path(self, key):
+        model_version, query = key
+        name = hashlib.sha1(query.encode('utf-8')).hexdigest()
+        return os.path.join(self._model_directory(model_version), f'{name}.npy')
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        try:
+            vector = np.load(self._path(key), allow_pickle=False)
+        except (OSError, ValueError):
+            return None  # Missing or partially written file
+        vector.flags.writeable = False
+        try:
+            os.utime(self._path(key))  # Keep frequently read entries when pruning
+        except OSError:
+            pass
+        return vector
+
+    def _write(self, key, vector):
+        """Write one entry (atomic replace) and prune the model directory when it grows too large"""
+        if not self.directory:
+            return
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp.npy'
+            np.save(tmp_path, vector)
+            os.replace(tmp_path, path)
+        except OSError:
+            return  # The disk tier is best effort
+
+        with self._lock:
+            count = self._disk_counts.get(directory)
+            if count is None:
+                count = len(os.listdir(directory))
+            self._disk_counts[directory] = count + 1
+            prune = count + 1 > self.max_disk_entries
+        if prune:
+            self._prune(directory)
+
+    def _prune(self, directory):
+        """Delete the least recently used files down to 90% of max_disk_entries"""
+        paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.npy')]
+        keep = int(self.max_disk_entries * 0.9)
+        paths.sort(key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0)
+        for path in paths[:max(0, len(paths) - keep)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_counts[directory] = min(len(paths), keep)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache configured from QUERY_CACHE_SIZE, QUERY_CACHE_DISK_ENTRIES and INDEX_DIR"""
+    global _cache
+    config = current_app.config
+    index_dir = config.get('INDEX_DIR')
+    directory = os.path.join(index_dir, CACHE_DIRNAME) if index_dir else None
+    settings = (config.get('QUERY_CACHE_SIZE', 1024), directory, config.get('QUERY_CACHE_DISK_ENTRIES', 100000))
+
+    cache = _cache
+    if cache is None or (cache.max_entries, cache.directory, cache.max_disk_entries) != settings:
+        with _cache_lock:
+            cache = _cache
+            if cache is None or (cache.max_entries, cache.directory, cache.max_disk_entries) != settings:
+                cache = QueryEmbeddingCache(*settings)
+                _cache = cache
+    return cache
+
+
+def encode_queries(queries):
+    """Embeddings of several search queries as a (n, dim) array; cache misses share one model call"""
+    vectors = get_cache().get_or_encode_many(
+        queries, model_registry.model_version(),
+        lambda texts: model_registry.encode(texts, batch_size=len(texts))
+    )
+    return np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+
+def encode_query(query):
+    """Embedding of a search query, served from the cache when possible"""
+    return get_cache().get_or_encode(query, model_registry.model_version(), inference_batcher.encode)
@@ -0,0 +1,56 @@
+"""
+Cache of pre-encoded JSON response bodies with strong ETags
+Entries are tagged with the catalog generation they were built from and
+are dropped as soon as the generation changes
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Bounded LRU of (body bytes, ETag) pairs for the current catalog generation"""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.generation = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        """Cached (body, etag) for key, or None if missing or built for another generation"""
+        with self._lock:
+            if generation != self.generation:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, generation, body):
+        """
+        Store an encoded body and return (body, etag)
+
+        The ETag is a hash of the body, so unchanged payloads keep the same tag
+        across generations and processes.
+        """
+        etag = hashlib.sha1(body).hexdigest()
+        entry = (body, etag)
+        with self._lock:
+            if generation != self.generation:
+                self._entries.clear()
+                self.generation = generation
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation = None
+
+    def __len__(self):
+        return len(self._entries)
@@ -2,19 +2,27 @@
 Search engine utility for matching clubs with user preferences
 """
 
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.orm import defer, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from models import Club, MeetingTime, db
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from utils.search_index import SearchIndex
+from utils.catalog import GenerationCache, current_generation
+from utils.availability import mask_from_slots
+from utils.query_cache import encode_queries, encode_query, normalize_query
+from utils.single_flight import SingleFlight
+from utils import model_registry
 import numpy as np
 
-# Try to import sentence transformers for semantic embeddings
-try:
-    from sentence_transformers import SentenceTransformer, util
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-    embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
-    embedding_model = None
+# Number of results returned by a search
+MAX_RESULTS = 30
+
+# Shares one ranking between concurrent identical searches in this process
+search_flight = SingleFlight()
+
+# Serialized clubs by id, reused until the catalog changes
+club_dicts = GenerationCache()
 
 
 class ClubSearchEngine:
@@ -28,6 +36,7 @@ class ClubSearchEngine:
         The embedding model will automatically find semantically related clubs.
         For example, searching "coding" will return clubs about programming, 
         development, software engineering, etc. without hardcoded mappings.
+        Ranked results of a canonical request are cached until the catalog changes.
         
         Args:
             keywords (str): Keywords to search in club name and description
@@ -37,195 +46,252 @@ class ClubSearchEngine:
         Returns:
             list: List of Club objects with match scores, sorted by relevance
         """
-        if categories is None:
-            categories = []
-        if availability is None:
-            availability = []
+        keywords, categories, availability = ClubSearchEngine.canonical_request(
+            keywords, categories, availability
+        )
 
-        # Get all clubs (we'll score them all semantically)
-        query = Club.query
+        # Ranked ids are cached on the index snapshot, so a catalog change drops them
+        index = SearchIndex.get()
+        key = (keywords, categories, availability)
+        ranked = index.cached_results(key)
+        if ranked is None:
+            # Concurrent identical searches wait for one ranking instead of each scoring the catalog
+            ranked = search_flight.do(
+                (index.generation, key), lambda: ClubSearchEngine._rank(index, key)
+            )
 
-        # Filter by categories if provided (categories field is comma-separated)
-        if categories:
-            category_filters = []
-            for category in categories:
-                category_filters.append(
-                    db.func.lower(Club.categories).contains(db.func.lower(category))
-                )
-            query = query.filter(db.or_(*category_filters))
-
-        clubs = query.all()
-
-        # Calculate match scores and filter by availability
-        results = []
-        for club in clubs:
-            match_score = ClubSearchEngine._calculate_match_score(
-                club, keywords, categories, availability
+        return ClubSearchEngine._load_results([ranked])[0]
+
+    @staticmethod
+    def search_batch(requests):
+        """
+        Run many searches at once.
+
+        Requests that are not cached have their distinct keyword strings
+        encoded in one model call and compared against the catalog with a
+        single matrix-matrix product (exact, even if an ANN backend is
+        configured); each request is then ranked as in search().
+
+        Args:
+            requests (list): Dicts with optional 'keywords', 'categories' and 'availability'
+
+        Returns:
+            list: One result list per request, in request order, as returned by search()
+        """
+        keys = [
+            ClubSearchEngine.canonical_request(
+                request.get('keywords', ''), request.get('categories'), request.get('availability')
             )
-            
-            # Include club if availability matches or if no availability filter
-            if not availability or ClubSearchEngine._check_availability_match(club, availability):
-                results.append({
-                    'club': club,
-                    'matchScore': match_score
-                })
+            for request in requests
+        ]
+
+        index = SearchIndex.get()
+        ranked = {key: index.cached_results(key) for key in dict.fromkeys(keys)}
+        pending = [key for key, results in ranked.items() if results is None]
 
-        # Sort by match score (highest first)
-        results.sort(key=lambda x: x['matchScore'], reverse=True)
+        texts = list(dict.fromkeys(key[0] for key in pending if key[0]))
+        similarities = ClubSearchEngine._semantic_similarities_many(texts, index)
+        for key in pending:
+            ranked[key] = ClubSearchEngine._rank(index, key, similarities.get(key[0]))
 
-        # Limit to top 30 results
-        return results[:30]
+        return ClubSearchEngine._load_results([ranked[key] for key in keys])
 
     @staticmethod
-    def _calculate_match_score(club, keywords, categories, availability):
+    def _load_results(ranked_lists):
+        """Turn ranked (club_id, score) lists into result dicts, loading all their clubs in one query"""
+        club_ids = {club_id for ranked in ranked_lists for club_id, _ in ranked}
+
+        # Embeddings are read from the search index, so don't load the blobs here
+        clubs = {club.id: club for club in Club.query.options(defer(Club.summary_embedding)).filter(
+            Club.id.in_(list(club_ids))
+        )} if club_ids else {}
+        return [
+            [
+                {'club': clubs[club_id], 'matchScore': score}
+                for club_id, score in ranked
+                if club_id in clubs
+            ]
+            for ranked in ranked_lists
+        ]
+
+    @staticmethod
+    def _rank(index, key, similarities=None):
         """
-        Calculate a match score (0-100) based on how well the club matches preferences.
-        Uses embedding-based semantic similarity with pre-computed embeddings when available.
-        
+        Score a canonical request and cache its top (club_id, score) pairs on the index
+
+        similarities are the semantic similarities of the keywords when they
+        were already computed (e.g. for a batch); otherwise they are computed here.
+        A ranking scored without them because they could not be computed is
+        returned but not cached, so the next search tries again.
+        """
+        keywords, categories, availability = key
+        if keywords and similarities is None:
+            similarities = ClubSearchEngine._semantic_similarities(keywords, index)
+        scores, eligible = ClubSearchEngine._match_scores(
+            index, keywords, categories, availability, similarities
+        )
+
+        # Top 30 eligible rows, best first; ties keep catalog (id) order
+        rows = ClubSearchEngine._top_rows(scores, eligible, MAX_RESULTS)
+        ranked = tuple(zip(index.club_ids[rows].tolist(), scores[rows].astype(int).tolist()))
+        if not keywords or similarities is not None:
+            index.cache_results(key, ranked, current_app.config.get('SEARCH_CACHE_SIZE', 2048))
+        return ranked
+
+    @staticmethod
+    def canonical_request(keywords='', categories=None, availability=None):
+        """
+        Normalize a search request so equivalent requests score (and cache) identically
+        Categories and slots that are not strings are ignored.
+
+        Returns:
+            tuple: (keywords lowercased with whitespace collapsed,
+                    sorted tuple of lowercased categories, sorted tuple of distinct slots)
+        """
+        return (
+            normalize_query(keywords),
+            tuple(sorted({
+                category.strip().lower() for category in categories or [] if isinstance(category, str)
+            })),
+            tuple(sorted({slot for slot in availability or [] if isinstance(slot, str)}))
+        )
+
+    @staticmethod
+    def _match_scores(index, keywords, categories, availability, similarities=None):
+        """
+        Score every indexed club at once (0-100).
+        similarities are the semantic similarities of the keywords (None: no semantic points).
+
         Scoring breakdown:
         - Keyword matching: 40 points (25 for name/keywords overlap, 15 for semantic similarity)
         - Category matching: 40 points (40 if match, 0 if no match)
         - Availability matching: 20 points (proportional based on matches)
+
+        Returns:
+            tuple: (scores, eligible) arrays aligned with the index rows; only
+                eligible clubs (in a requested category and meeting in a
+                requested slot, when those filters are given) are results
         """
-        score = 0
-        keywords_lower = keywords.lower() if keywords else ''
+        scores = np.zeros(index.size, dtype=np.float32)
+        eligible = np.ones(index.size, dtype=bool)
 
-        # Keyword matching (40 points max)
         if keywords:
-            # Check for keyword in club name (25 points)
-            if keywords_lower in club.name.lower():
-                score += 25
-            
-            # Semantic similarity to summary (15 points max)
-            # Pass the pre-computed embedding for faster similarity calculation
-            if club.summary:
-                similarity_score = ClubSearchEngine._calculate_semantic_similarity(
-                    keywords, 
-                    club.summary,
-                    club_embedding_bytes=club.summary_embedding  # Use pre-stored embedding
-                )
-                # Convert 0-100 similarity to 0-15 points
-                score += int((similarity_score / 100) * 15)
-
-        # Category matching (40 points max)
-        # categories field is comma-separated, check if any requested category is in the club's categories
+            scores += 25 * index.name_matches(keywords)
+            if similarities is not None:
+                scores += 15 * similarities
+
         if categories:
-            club_categories_lower = club.categories.lower() if club.categories else ''
-            for category in categories:
-                if category.lower() in club_categories_lower:
-                    score += 40
-                    break  # Only count once even if multiple categories match
+            category_hits = index.category_matches(categories)
+            scores += 40 * category_hits
+            eligible &= category_hits
 
-        # Availability matching (20 points max)
         if availability:
-            availability_match_count = 0
-            for slot in availability:
-                if ClubSearchEngine._has_meeting_slot(club, slot):
-                    availability_match_count += 1
-            
-            if availability_match_count > 0:
-                # Award points based on percentage of availability matches
-                score += int(20 * (availability_match_count / len(availability)))
-
-        # Normalize to 0-100 range
-        return min(100, max(0, score))
+            overlaps = index.availability_overlap(mask_from_slots(availability))
+            scores += overlaps * np.float32(20 / len(availability))
+            eligible &= overlaps > 0
+
+        np.clip(scores, 0, 100, out=scores)
+        return scores, eligible
 
     @staticmethod
-    def _calculate_semantic_similarity(keywords, club_summary, club_embedding_bytes=None):
+    def _top_rows(scores, eligible, limit):
+        """Rows of the limit highest eligible scores, highest first (ties in row order)"""
+        candidates = np.flatnonzero(eligible)
+        if len(candidates) > limit:
+            candidate_scores = scores[candidates]
+            threshold = np.partition(candidate_scores, len(candidates) - limit)[len(candidates) - limit]
+            above = candidates[candidate_scores > threshold]
+            tied = candidates[candidate_scores == threshold][:limit - len(above)]
+            candidates = np.concatenate((above, tied))
+        return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+    @staticmethod
+    def _semantic_similarities(keywords, index):
         """
-        Calculate semantic similarity using pre-computed embeddings or on-the-fly computation.
-        
-        For best performance, club_embedding_bytes should be provided (pre-stored embedding).
-        If not provided, falls back to computing embedding or TF-IDF similarity.
-        
-        Args:
-            keywords (str): User's search keywords
-            club_summary (str): Club's summary text
-            club_embedding_bytes (bytes): Pre-computed embedding stored as binary
-        
+        Encode the query once (or reuse its cached embedding) and compare it
+        against every club in the index.
+        Uses stored embeddings when the model is available, otherwise the
+        corpus-fitted TF-IDF index. Clubs without a stored embedding are
+        compared with TF-IDF too.
+
         Returns:
-            int: Similarity score (0-100)
+            np.ndarray: Similarities aligned with the index rows, or None if
+                encoding or scoring failed
         """
-        if not keywords or not club_summary:
-            return 0
-        
         try:
-            if SENTENCE_TRANSFORMERS_AVAILABLE and embedding_model is not None:
-                # Encode the query
-                query_embedding = embedding_model.encode(keywords, convert_to_tensor=True)
-                
-                # Use pre-computed embedding if available
-                if club_embedding_bytes is not None:
-                    # Convert bytes back to numpy array, then to tensor
-                    club_embedding_np = np.frombuffer(club_embedding_bytes, dtype=np.float32)
-                    club_embedding = embedding_model._first_module().tokenizer.encode(club_summary)  # Temporary fallback
-                    # Actually just use the stored embedding directly
-                    try:
-                        import torch
-                        club_embedding = torch.from_numpy(club_embedding_np).to(query_embedding.device)
-                    except:
-                        # Fallback: compute on the fly
-                        club_embedding = embedding_model.encode(club_summary, convert_to_tensor=True)
-                else:
-                    # Compute embedding on the fly if not stored
-                    club_embedding = embedding_model.encode(club_summary, convert_to_tensor=True)
-                
-                # Calculate cosine similarity
-                similarity = util.pytorch_cos_sim(query_embedding, club_embedding)
-                similarity_score = float(similarity)
-                
-                # Convert to 0-100 score
-                return int(similarity_score * 100)
-            else:
-                # Fallback to TF-IDF if sentence-transformers not available
-                minimal_stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'is', 'are', 'am', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can'}
-                
-                vectorizer = TfidfVectorizer(
-                    lowercase=True,
-                    stop_words=list(minimal_stop_words),
-                    ngram_range=(1, 2),
-                    max_features=200,
-                    min_df=1
-                )
-                
-                texts = [keywords, club_summary]
-                tfidf_matrix = vectorizer.fit_transform(texts)
-                similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-                
-                return int(similarity * 100)
-        except Exception as e:
-            # Fallback: simple substring matching on error
-            if keywords.lower() in club_summary.lower():
-                return 50
-            return 0
+            if model_registry.is_available() and index.has_embedding.any():
+                query_embedding = encode_query(keywords)
+                similarities = index.semantic_similarities(query_embedding)
+                if not index.has_embedding.all():
+                    similarities = np.where(
+                        index.has_embedding, similarities, index.lexical_similarities(keywords)
+                    )
+                return similarities
 
-    @staticmethod
-    def _check_availability_match(club, availability_slots):
-        """Check if club has at least one meeting matching user's availability"""
-        for slot in availability_slots:
-            if ClubSearchEngine._has_meeting_slot(club, slot):
-                return True
-        return False
+            return index.lexical_similarities(keywords)
+        except Exception:
+            return None
 
     @staticmethod
-    def _has_meeting_slot(club, slot):
-        """Check if club has a meeting in the given slot (e.g., 'Monday-Afternoon')"""
+    def _semantic_similarities_many(texts, index):
+        """
+        Similarities of several queries against every club, with one encode
+        call for the queries missing from the query cache and one matrix product.
+
+        Returns:
+            dict: Query text -> similarities aligned with the index rows
+                (empty if they could not be computed, in which case _rank
+                retries each query on its own)
+        """
+        if not texts:
+            return {}
+
         try:
-            day, time = slot.split('-')
-            return MeetingTime.query.filter_by(
-                club_id=club.id,
-                day_of_week=day,
-                time_slot=time
-            ).first() is not None
-        except (ValueError, AttributeError):
-            return False
+            if model_registry.is_available() and index.has_embedding.any():
+                query_embeddings = encode_queries(texts)
+                similarities = index.semantic_similarities_many(query_embeddings)
+                if not index.has_embedding.all():
+                    similarities = np.where(
+                        index.has_embedding, similarities, index.lexical_similarities_many(texts)
+                    )
+            else:
+                similarities = index.lexical_similarities_many(texts)
+        except Exception:
+            return {}
+        return dict(zip(texts, similarities))
+
+    @staticmethod
+    def serialize_clubs(clubs):
+        """
+        Convert clubs to dictionaries, loading all their meeting times in one query.
+
+        Serialized clubs are cached by id until the catalog changes, without
+        building the search index. Returns fresh dicts the caller may modify.
+        """
+        cached = club_dicts.entries(current_generation())
+        pending = [club for club in clubs if club.id not in cached]
+
+        unloaded = [club for club in pending if 'meeting_times' in inspect(club).unloaded]
+        if unloaded:
+            meeting_times = {club.id: [] for club in unloaded}
+            for meeting_time in MeetingTime.query.filter(MeetingTime.club_id.in_(list(meeting_times))):
+                meeting_times[meeting_time.club_id].append(meeting_time)
+            for club in unloaded:
+                set_committed_value(club, 'meeting_times', meeting_times[club.id])
+
+        for club in pending:
+            cached[club.id] = club.to_dict()
+
+        return [dict(cached[club.id]) for club in clubs]
 
     @staticmethod
     def get_all_clubs(page=1, per_page=20):
         """Get paginated list of all clubs"""
-        paginated = Club.query.paginate(page=page, per_page=per_page)
+        paginated = Club.query.options(
+            defer(Club.summary_embedding), selectinload(Club.meeting_times)
+        ).order_by(Club.id).paginate(page=page, per_page=per_page)
         return {
-            'clubs': [club.to_dict() for club in paginated.items],
+            'clubs': ClubSearchEngine.serialize_clubs(paginated.items),
             'total': paginated.total,
             'pages': paginated.pages,
             'current_page': page
@@ -234,4 +300,18 @@ class ClubSearchEngine:
     @staticmethod
     def get_club_by_id(club_id):
         """Get a specific club by ID"""
-        return Club.query.get(club_id)
+        return db.session.get(Club, club_id)
+
+    @staticmethod
+    def get_club_dict(club_id):
+        """Get a specific club as a dictionary, or None if it doesn't exist"""
+        cached = club_dicts.entries(current_generation()).get(club_id)
+        if cached is not None:
+            return dict(cached)
+
+        club = db.session.get(Club, club_id, options=[
+            defer(Club.summary_embedding), selectinload(Club.meeting_times)
+        ])
+        if club is None:
+            return None
+        return ClubSearchEngine.serialize_clubs([club])[0]
@@ -0,0 +1,449 @@
+"""
+In-memory search index over the club catalog
+Lays out per-club data in contiguous arrays so a query can be scored
+against every club at once instead of one club at a time
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+from flask import current_app
+from models import Club, Category, club_categories, db
+from utils.availability import popcount
+from utils.lexical_index import LexicalIndex
+from utils.ann_index import IVFIndex
+from utils.binary_index import BinaryIndex
+from utils.quantization import QuantizedMatrix, vector_from_bytes, vector_dimension
+from utils import model_registry
+from utils.catalog import current_generation
+
+# Embedding matrix exported for memory-mapping (see SearchIndex.export)
+MATRIX_FILENAME = 'embeddings.npy'
+MATRIX_META_FILENAME = 'embeddings_meta.npz'
+
+
+class SearchIndex:
+    """Process-wide snapshot of the club catalog used by ClubSearchEngine"""
+
+    _current = None
+    _lock = threading.Lock()
+
+    def __init__(self, club_ids, embeddings, has_embedding, availability_masks=None,
+                 category_members=None, generation=0, embedding_format='float32', names=None,
+                 embeddings_key=None):
+        """
+        Args:
+            club_ids (list): Club ids, one per row
+            embeddings (np.ndarray): (n_clubs, dim) float32 matrix of L2-normalized
+                summary embeddings (zero rows where a club has no embedding),
+                or an already quantized (e.g. memory-mapped) QuantizedMatrix
+            has_embedding (np.ndarray): Boolean mask of rows with a stored embedding
+            availability_masks (np.ndarray): 28-bit day x time slot bitmask per row
+            category_members (dict): Lowercased category name -> boolean row mask
+            generation (int): Catalog generation the index was built from
+            embedding_format (str): Format the matrix is held and scored in
+                ('float32', 'float16' or 'int8', see utils.quantization)
+            names (list): Club names, one per row (for name_matches)
+            embeddings_key (str): embeddings_key() of the rows and embeddings the
+                index was built from (None if unknown)
+        """
+        self.club_ids = np.asarray(club_ids, dtype=np.int64)
+        if isinstance(embeddings, QuantizedMatrix):
+            self.vectors = embeddings
+        else:
+            self.vectors = QuantizedMatrix.from_float(embeddings, embedding_format)
+        self.has_embedding = np.asarray(has_embedding, dtype=bool)
+        if availability_masks is None:
+            availability_masks = np.zeros(len(self.club_ids), dtype=np.uint32)
+        self.availability_masks = np.asarray(availability_masks, dtype=np.uint32)
+        self.category_members = category_members or {}
+        self.generation = generation
+        self.embeddings_key = embeddings_key
+        # Lowercased names joined into one string; a substring search over it is
+        # mapped back to rows through the offset where each name starts
+        names = [(name or '').lower() for name in (names or [''] * len(self.club_ids))]
+        self._names = '\x00'.join(names)
+        lengths = np.array([len(name) + 1 for name in names], dtype=np.int64)
+        self._name_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(names) else lengths
+        self._positions = {int(club_id): i for i, club_id in enumerate(self.club_ids)}
+        self._lexical = None
+        self._lexical_lock = threading.Lock()
+        self._ann = None
+        self._ann_lock = threading.Lock()
+        self._results = OrderedDict()
+        self._results_lock = threading.Lock()
+        self.result_stats = {'hits': 0, 'misses': 0}
+
+    @property
+    def size(self):
+        return len(self.club_ids)
+
+    @property
+    def dimension(self):
+        return self.vectors.shape[1]
+
+    @property
+    def embeddings(self):
+        """float32 embedding matrix (dequantized copy unless the index is float32)"""
+        return self.vectors.to_float()
+
+    @classmethod
+    def build(cls):
+        """
+        Load every club's embedding, name and availability mask into flat arrays
+
+        Embeddings come from the matrix exported to INDEX_DIR (see export())
+        when it was built from the same embeddings (see embeddings_key()), and
+        are decoded from the stored BLOBs otherwise. Catalog changes that leave
+        embeddings alone (categories, meeting times) keep using the export.
+        """
+        generation = current_generation()
+        embedding_format = current_app.config.get('EMBEDDING_FORMAT', 'float32')
+        rows = db.session.query(
+            Club.id, Club.name, Club.availability_mask, Club.summary_embedding.isnot(None),
+            Club.embedding_model, Club.embedding_format, Club.embedding_source_hash
+        ).order_by(Club.id).all()
+        club_ids = [row[0] for row in rows]
+        embeddings_key = cls.embeddings_key([(row[0],) + tuple(row[3:]) for row in rows], embedding_format)
+
+        exported = cls.load_export(current_app.config.get('INDEX_DIR'), embeddings_key, embedding_format)
+        if exported is not None and np.array_equal(exported[0], club_ids):
+            _, vectors, has_embedding = exported
+        else:
+            vectors, has_embedding = cls._decode_embeddings(club_ids)
+
+        availability_masks = np.array([row[2] or 0 for row in rows], dtype=np.uint32)
+
+        # One boolean membership vector per category, filled from the association table
+        positions = {club_id: i for i, club_id in enumerate(club_ids)}
+        category_members = {}
+        links = db.session.query(club_categories.c.club_id, Category.name).join(
+            Category, Category.id == club_categories.c.category_id
+        )
+        for club_id, name in links:
+            members = category_members.setdefault(name.lower(), np.zeros(len(club_ids), dtype=bool))
+            if club_id in positions:
+                members[positions[club_id]] = True
+
+        return cls(club_ids, vectors, has_embedding, availability_masks, category_members,
+                   generation, embedding_format, names=[row[1] for row in rows],
+                   embeddings_key=embeddings_key)
+
+    @staticmethod
+    def embeddings_key(rows, embedding_format):
+        """
+        Hash identifying the embedding matrix built from the clubs table
+
+        Computed from metadata only (no embedding BLOBs are read), so it is
+        cheap to check on every index build.
+
+        Args:
+            rows (list): (club_id, has_embedding, embedding_model, embedding_format,
+                embedding_source_hash) per club, in row order
+            embedding_format (str): Format the matrix is held in
+        """
+        digest = hashlib.sha1(f'{model_registry.model_version()}:{embedding_format}'.encode('utf-8'))
+        for club_id, has_embedding, embedded_with, stored_format, source_hash in rows:
+            row = f'\n{club_id}:{int(bool(has_embedding))}:{embedded_with}:{stored_format}:{source_hash}'
+            digest.update(row.encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _decode_embeddings(club_ids):
+        """Normalized float32 embeddings and has_embedding mask for club_ids, decoded from the clubs table"""
+        rows = db.session.query(
+            Club.id, Club.summary_embedding, Club.embedding_model, Club.embedding_format
+        ).filter(Club.summary_embedding.isnot(None)).all()
+
+        # Ignore vectors produced by a different model than the one encoding queries
+        model_version = model_registry.model_version()
+        positions = {club_id: i for i, club_id in enumerate(club_ids)}
+        rows = [
+            (positions[club_id], embedding_bytes, fmt or 'float32')
+            for club_id, embedding_bytes, embedded_with, fmt in rows
+            if club_id in positions and embedded_with in (None, model_version)
+        ]
+
+        dim = vector_dimension(rows[0][1], rows[0][2]) if rows else 0
+        embeddings = np.zeros((len(club_ids), dim), dtype=np.float32)
+        has_embedding = np.zeros(len(club_ids), dtype=bool)
+        for position, embedding_bytes, fmt in rows:
+            if vector_dimension(embedding_bytes, fmt) != dim:
+                # Skip vectors written by a different model
+                continue
+            embeddings[position] = vector_from_bytes(embedding_bytes, fmt)
+            has_embedding[position] = True
+
+        # Normalize once so cosine similarity is a plain dot product at query time
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        embeddings /= norms
+        return embeddings, has_embedding
+
+    def export(self, directory):
+        """
+        Write the embedding matrix to directory for load_export()
+
+        The matrix is saved as a plain .npy file in the index format so every
+        worker can memory-map it read-only and share one page-cache copy.
+        Files are replaced atomically: workers that mapped the previous
+        export keep reading it until they rebuild.
+        """
+        os.makedirs(directory, exist_ok=True)
+        matrix_path = os.path.join(directory, MATRIX_FILENAME)
+        tmp_path = f'{matrix_path}.{os.getpid()}.tmp.npy'
+        np.save(tmp_path, self.vectors.data)
+        os.replace(tmp_path, matrix_path)
+
+        meta_path = os.path.join(directory, MATRIX_META_FILENAME)
+        tmp_path = f'{meta_path}.{os.getpid()}.tmp.npz'
+        scales = self.vectors.scales
+        np.savez(
+            tmp_path, club_ids=self.club_ids, has_embedding=self.has_embedding,
+            scales=np.zeros(0, dtype=np.float32) if scales is None else scales,
+            shape=np.array(self.vectors.shape, dtype=np.int64),
+            embeddings_key=np.array(self.embeddings_key or ''), format=np.array(self.vectors.format)
+        )
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def load_export(directory, embeddings_key, embedding_format):
+        """
+        Memory-map an exported embedding matrix
+
+        Returns:
+            tuple: (club_ids, QuantizedMatrix, has_embedding), or None if there
+                is no export for these embeddings (see embeddings_key()) and format
+        """
+        if not directory or not embeddings_key:
+            return None
+        matrix_path = os.path.join(directory, MATRIX_FILENAME)
+        meta_path = os.path.join(directory, MATRIX_META_FILENAME)
+        if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+            return None
+
+        try:
+            with np.load(meta_path, allow_pickle=False) as meta:
+                if (str(meta['embeddings_key']) != embeddings_key
+                        or str(meta['format']) != embedding_format):
+                    return None
+                club_ids, has_embedding, scales = meta['club_ids'], meta['has_embedding'], meta['scales']
+                shape = tuple(meta['shape'])
+            data = np.load(matrix_path, mmap_mode='r')
+        except Exception:
+            return None  # Corrupt or partially written export, decode from the database
+
+        if data.shape != shape or data.dtype.name != embedding_format:
+            return None
+        return club_ids, QuantizedMatrix(data, scales if embedding_format == 'int8' else None), has_embedding
+
+    @classmethod
+    def get(cls):
+        """Return the current index, (re)building it on first use or when the catalog changed"""
+        generation = current_generation()
+        index = cls._current
+        if index is None or index.generation != generation:
+            with cls._lock:
+                index = cls._current
+                if index is None or index.generation != generation:
+                    index = cls.build()
+                    cls._current = index
+        return index
+
+    @classmethod
+    def invalidate(cls):
+        """Drop the current index so the next search rebuilds it from the database"""
+        with cls._lock:
+            cls._current = None
+
+    def cached_results(self, key):
+        """Ranked (club_id, score) pairs cached for a canonical search request, or None"""
+        with self._results_lock:
+            results = self._results.get(key)
+            if results is None:
+                self.result_stats['misses'] += 1
+            else:
+                self._results.move_to_end(key)
+                self.result_stats['hits'] += 1
+            return results
+
+    def cache_results(self, key, results, max_entries=2048):
+        """Remember ranked results until the index is invalidated, evicting the least recently used"""
+        with self._results_lock:
+            self._results[key] = results
+            self._results.move_to_end(key)
+            while len(self._results) > max_entries:
+                self._results.popitem(last=False)
+
+    def position(self, club_id):
+        """Row of a club in the index, or None if the club is not indexed"""
+        return self._positions.get(club_id)
+
+    def semantic_similarities(self, query_embedding, exact=False):
+        """
+        Cosine similarity of a query against every indexed club
+
+        With an ANN backend configured (see ann()), only its candidate clubs
+        are scored exactly and every other row is 0: the clubs in the IVF
+        clusters nearest to the query, or the ANN_RERANK clubs whose binary
+        codes are closest to it.
+
+        Args:
+            query_embedding (np.ndarray): Query vector of the index dimension
+            exact (bool): Score every row even if an ANN index is configured
+
+        Returns:
+            np.ndarray: float32 similarities in [-1, 1], one per row
+                (0 for clubs without a stored embedding)
+        """
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if self.size == 0 or query.shape[0] != self.dimension:
+            return np.zeros(self.size, dtype=np.float32)
+
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return np.zeros(self.size, dtype=np.float32)
+        query = query / norm
+
+        ann = None if exact else self.ann()
+        if ann is None:
+            return self.vectors.dot(query)
+
+        if isinstance(ann, BinaryIndex):
+            rows = ann.candidates(query, current_app.config.get('ANN_RERANK', 300))
+        else:
+            rows = ann.candidates(query, current_app.config.get('ANN_PROBES', 16))
+        similarities = np.zeros(self.size, dtype=np.float32)
+        similarities[rows] = self.vectors.dot(query, rows)
+        return similarities
+
+    def semantic_similarities_many(self, query_embeddings):
+        """
+        Cosine similarity of several queries against every indexed club, as
+        one matrix-matrix product (always exact)
+
+        Args:
+            query_embeddings (np.ndarray): (n_queries, dim) query vectors
+
+        Returns:
+            np.ndarray: (n_queries, n_clubs) float32 similarities
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        if self.size == 0 or queries.shape[1] != self.dimension:
+            return np.zeros((len(queries), self.size), dtype=np.float32)
+
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return self.vectors.dot((queries / norms).T).T
+
+    def ann(self):
+        """
+        Candidate index over the embedded rows, or None if ANN search is disabled
+
+        Exact search is used unless ANN_BACKEND is 'ivf' or 'binary' and at
+        least ANN_MIN_CLUBS clubs have an embedding. The index is built on
+        first use; IVF indexes are also persisted to INDEX_DIR (keyed on
+        embeddings_key, so indexes built from the database reuse them).
+        """
+        config = current_app.config
+        backend = config.get('ANN_BACKEND', 'none')
+        if backend not in ('ivf', 'binary'):
+            return None
+        rows = np.flatnonzero(self.has_embedding)
+        if len(rows) == 0 or len(rows) < config.get('ANN_MIN_CLUBS', 0):
+            return None
+
+        ann = self._ann
+        if ann is None:
+            with self._ann_lock:
+                ann = self._ann
+                if ann is None:
+                    if backend == 'binary':
+                        ann = BinaryIndex.build(self.embeddings, rows)
+                    else:
+                        ann = IVFIndex.load_or_build(
+                            self.embeddings, rows, config.get('INDEX_DIR'),
+                            n_lists=config.get('ANN_LISTS') or None,
+                            iterations=config.get('ANN_TRAIN_ITERATIONS', 10),
+                            embeddings_key=self.embeddings_key
+                        )
+                    self._ann = ann
+        return ann
+
+    def name_matches(self, keywords):
+        """
+        Which club names contain the keywords (case-insensitive substring)
+
+        Returns:
+            np.ndarray: Boolean mask, one per row
+        """
+        matches = np.zeros(self.size, dtype=bool)
+        keywords = (keywords or '').lower()
+        if not keywords or '\x00' in keywords:
+            return matches
+        offsets = np.fromiter(
+            (match.start() for match in re.finditer(re.escape(keywords), self._names)), dtype=np.int64
+        )
+        matches[np.searchsorted(self._name_starts, offsets, side='right') - 1] = True
+        return matches
+
+    def category_matches(self, categories):
+        """
+        Which clubs belong to at least one of the given categories
+
+        Args:
+            categories (list): Category names (case-insensitive)
+
+        Returns:
+            np.ndarray: Boolean mask, one per row
+        """
+        matches = np.zeros(self.size, dtype=bool)
+        for category in categories or []:
+            members = self.category_members.get(category.strip().lower())
+            if members is not None:
+                matches |= members
+        return matches
+
+    def availability_overlap(self, query_mask):
+        """
+        Number of requested slots each club meets in
+
+        Args:
+            query_mask (int): Bitmask of the requested availability slots
+
+        Returns:
+            np.ndarray: int32 count of shared slots, one per row
+        """
+        return popcount(self.availability_masks & np.uint32(query_mask))
+
+    def lexical(self):
+        """TF-IDF index over the same rows, fitted (or loaded from disk) on first use"""
+        lexical = self._lexical
+        if lexical is None:
+            with self._lexical_lock:
+                lexical = self._lexical
+                if lexical is None:
+                    # The index covers every club, so read the whole table rather than
+                    # binding one SQL variable per club id
+                    summaries = dict(db.session.query(Club.id, Club.summary))
+                    texts = [summaries.get(int(club_id), '') for club_id in self.club_ids]
+                    lexical = LexicalIndex.load_or_fit(
+                        self.club_ids.tolist(), texts, current_app.config.get('INDEX_DIR')
+                    )
+                    self._lexical = lexical
+        return lexical
+
+    def lexical_similarities_many(self, queries):
+        """TF-IDF cosine similarity of several queries against every row, (n_queries, n_clubs)"""
+        if self.size == 0:
+            return np.zeros((len(queries), 0), dtype=np.float32)
+        return self.lexical().similarities_many(queries)
+
+    def lexical_similarities(self, query):
+        """TF-IDF cosine similarity of a query against every row"""
+        if self.size == 0:
+            return np.zeros(0, dtype=np.float32)
+        return self.lexical().similarities(query)
@@ -0,0 +1,60 @@
+"""
+Request coalescing for concurrent identical work
+While a call for a key is in flight, other threads asking for the same key
+wait for it and share its result (or exception) instead of repeating it
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Per-key deduplication of concurrent calls, with counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counters = {'executed': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        """
+        Return fn(), unless a call for key is already running, in which case
+        wait for that call and return its result
+
+        Args:
+            key: Hashable identity of the work (e.g. a canonical search request)
+            fn (callable): Computes the result; only run by the first caller
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._counters['executed'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        """Calls executed, calls that joined an in-flight call, and calls in flight now"""
+        with self._lock:
+            return {**self._counters, 'in_flight': len(self._calls)}
+
+    def clear_stats(self):
+        with self._lock:
+            self._counters = {name: 0 for name in self._counters}
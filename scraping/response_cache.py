@@ -0,0 +1,72 @@
+"""
+On-disk cache of TerpLink additionalFields responses, one JSON file per organization
+Each entry keeps the response items, when they were fetched and the validators
+(ETag / Last-Modified) needed to revalidate them with a conditional request
+"""
+
+import json
+import os
+import time
+
+
+class ResponseCache:
+    """Directory of {organization id}.json cache entries"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, club_id):
+        return os.path.join(self.directory, f"{int(club_id)}.json")
+
+    def get(self, club_id):
+        """Cached entry for a club, or None if missing or unreadable"""
+        try:
+            with open(self._path(club_id), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, club_id, items, headers=None):
+        """Store freshly fetched items along with the response validators"""
+        headers = headers or {}
+        entry = {
+            "id": int(club_id),
+            "fetched_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "items": items,
+        }
+        self._write(club_id, entry)
+        return entry
+
+    def touch(self, club_id, entry):
+        """Mark an entry as revalidated (the server answered 304 Not Modified)"""
+        entry = dict(entry, fetched_at=time.time())
+        self._write(club_id, entry)
+        return entry
+
+    def _write(self, club_id, entry):
+        path = self._path(club_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def is_fresh(entry, max_age):
+        """Whether an entry is younger than max_age seconds (None always revalidates)"""
+        if entry is None or max_age is None:
+            return False
+        return time.time() - entry.get("fetched_at", 0) < max_age
+
+    @staticmethod
+    def conditional_headers(entry):
+        """If-None-Match / If-Modified-Since headers for revalidating an entry"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
@@ -1,16 +1,188 @@
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+
+from response_cache import ResponseCache
+
+BASE_URL = "https://terplink.umd.edu"
+MEETING_TIMES_QUESTION_ID = 11487938
+
+CACHE_DIR = ".cache/additional_fields"
+DEFAULT_MAX_AGE = 24 * 3600  # Seconds a cached response is used without revalidating it
+
+# HTTP statuses worth retrying; any other error response fails the club immediately
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ScrapeStats:
+    """Thread-safe counters for one scrape run"""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.cached = 0
+        self.not_modified = 0
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, requests=0, retries=0, failures=0, cached=0, not_modified=0):
+        with self._lock:
+            self.requests += requests
+            self.retries += retries
+            self.failures += failures
+            self.cached += cached
+            self.not_modified += not_modified
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "cached": self.cached,
+            "not_modified": self.not_modified,
+            "elapsed_seconds": elapsed,
+            "requests_per_second": self.requests / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def make_session(pool_size=8):
+    """requests.Session whose connection pool can serve pool_size concurrent requests"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Exponential backoff with full jitter for the given retry attempt (1-based)"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def meeting_time_answers(items):
+    """Meeting time answers out of an additionalFields "items" list"""
+    return [q["answerText"] for q in items
+            if q.get("questionId") == MEETING_TIMES_QUESTION_ID and q.get("hasResponse")]
+
+
+def get_club_times(club_id, session=None, base_url=BASE_URL, max_retries=5,
+                   backoff_base=0.5, backoff_cap=30.0, timeout=10, stats=None,
+                   cache=None, max_age=None):
+    """
+    Fetch the raw meeting time answers for one club
+
+    Responses without "items", timeouts, connection errors and 429/5xx statuses
+    are retried up to max_retries times with exponential backoff and jitter.
+
+    With a cache, entries younger than max_age seconds are used without a
+    request, older ones are revalidated with a conditional request, and a stale
+    entry is still returned if the club cannot be fetched.
+
+    Returns: List of answer strings, or None if the club could not be fetched
+    """
+    session = session or requests
+    url = f"{base_url}/api/discovery/organization/{club_id}/additionalFields"
+
+    entry = cache.get(club_id) if cache else None
+    if cache and cache.is_fresh(entry, max_age):
+        if stats:
+            stats.add(cached=1)
+        return meeting_time_answers(entry["items"])
+    headers = cache.conditional_headers(entry) if cache else {}
+
+    retry_after = None
+    for attempt in range(max_retries + 1):
+        if attempt:
+            if stats:
+                stats.add(retries=1)
+            delay = retry_after or backoff_delay(attempt, backoff_base, backoff_cap)
+            time.sleep(delay)
+            retry_after = None
+
+        if stats:
+            stats.add(requests=1)
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"Request for club {club_id} failed: {e}")
+            continue
+
+        if response.status_code == 304 and entry is not None:
+            cache.touch(club_id, entry)
+            if stats:
+                stats.add(not_modified=1)
+            return meeting_time_answers(entry["items"])
+        if response.status_code in RETRY_STATUSES:
+            header = response.headers.get("Retry-After", "")
+            if header.isdigit():
+                retry_after = min(backoff_cap, float(header))
+            continue
+        if not response.ok:
+            print(f"Club {club_id} returned HTTP {response.status_code}")
+            break
+
+        try:
+            data = response.json()
+        except ValueError:
+            continue
+        if "items" not in data:
+            continue
 
-def get_club_times(club_id):
-    data = {}
-    while "items" not in data:
-        data = requests.get(f"https://terplink.umd.edu/api/discovery/organization/{club_id}/additionalFields").json()
+        if cache:
+            cache.put(club_id, data["items"], response.headers)
+        return meeting_time_answers(data["items"])
 
-    print(f"Club times retrieved for club w id: {club_id}")
+    if stats:
+        stats.add(failures=1)
+    if entry is not None:
+        print(f"Giving up on club {club_id}, using cached response")
+        return meeting_time_answers(entry["items"])
+    print(f"Giving up on club {club_id}")
+    return None
+
+
+def iter_club_times(club_ids, stats, concurrency=8, base_url=BASE_URL, **kwargs):
+    """
+    Yield (club_id, answers) for many clubs as each fetch completes
+
+    At most `concurrency` requests are in flight, all sharing one pooled
+    session. Extra keyword arguments are passed to get_club_times
+    (max_retries, backoff_base, backoff_cap, timeout, cache, max_age).
+    """
+    session = make_session(concurrency)
+    pool = ThreadPoolExecutor(max_workers=concurrency)
     try:
-        return [q["answerText"] for q in data["items"] if (q["questionId"] == 11487938 and q["hasResponse"])]
-    except:
-        print(data)
+        futures = {
+            pool.submit(get_club_times, club_id, session=session, base_url=base_url,
+                        stats=stats, **kwargs): club_id
+            for club_id in club_ids
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # Drop queued fetches if the caller stops early (e.g. Ctrl-C)
+        pool.shutdown(wait=True, cancel_futures=True)
+        session.close()
+
+
+def fetch_all_club_times(club_ids, concurrency=8, base_url=BASE_URL, **kwargs):
+    """
+    Fetch meeting times for many clubs with at most `concurrency` requests in flight
+
+    Returns: (list of results aligned with club_ids, ScrapeStats)
+    """
+    stats = ScrapeStats()
+    results = dict(iter_club_times(club_ids, stats, concurrency=concurrency, base_url=base_url, **kwargs))
+    return [results[club_id] for club_id in club_ids], stats
 
 def format_times(times):
     """
@@ -80,8 +252,100 @@ def format_times(times):
     
     return formatted_times
 
-def fetch_club_times():
-    df = pd.read_csv("clubs.csv")
-    df["MeetingTimes"] = df["Id"].apply(get_club_times)
-    df["MeetingTimes"] = df["MeetingTimes"].apply(format_times)
-    df.to_csv("clubs.csv")
\ No newline at end of file
+def read_fetched(output):
+    """
+    Meeting times of the clubs an interrupted run recorded as fetched in the JSONL output
+
+    A run that finished ends the output with a {"complete": true} record; its
+    results are not reused, so the next run refreshes every club.
+
+    Returns: Dict of club id -> formatted meeting times (empty if there is
+    nothing to resume)
+    """
+    fetched = {}
+    try:
+        with open(output) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Line cut short by an interrupted run
+                if record.get("complete"):
+                    fetched = {}
+                elif record.get("fetched"):
+                    fetched[record["Id"]] = record["MeetingTimes"]
+    except FileNotFoundError:
+        pass
+    return fetched
+
+
+def fetch_club_times(path="clubs.csv", concurrency=8, base_url=BASE_URL,
+                     cache_dir=CACHE_DIR, max_age=DEFAULT_MAX_AGE, output="club_times.jsonl",
+                     restart=False, **kwargs):
+    """
+    Fetch meeting times for every club in the CSV and write them back to it
+
+    Each result is appended to the JSONL output as soon as it arrives. If
+    the previous run was interrupted, clubs it recorded as fetched are not
+    requested again, so it loses nothing (even without the response cache).
+    Once every club has been fetched the output is marked complete and the
+    next run starts over; pass restart=True to discard an interrupted run.
+    Raw responses are kept in the on-disk cache, so a new run only requests
+    clubs whose cached response is missing or older than max_age seconds,
+    and revalidates those with conditional requests.
+    """
+    df = pd.read_csv(path)
+    club_ids = [int(club_id) for club_id in df["Id"]]
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    stats = ScrapeStats()
+
+    meeting_times = {} if restart else read_fetched(output)
+    pending = [club_id for club_id in club_ids if club_id not in meeting_times]
+    if len(pending) < len(club_ids):
+        print(f"Resuming: {len(club_ids) - len(pending)} clubs already fetched in {output}")
+
+    # Only append to an interrupted run's output; otherwise start a new one
+    with open(output, "a" if meeting_times else "w") as out:
+        if out.tell() and not _ends_with_newline(output):
+            out.write("\n")  # Finish a line cut short by an interrupted run
+        for club_id, answers in iter_club_times(pending, stats, concurrency=concurrency,
+                                                base_url=base_url, cache=cache, max_age=max_age, **kwargs):
+            meeting_times[club_id] = format_times(answers)
+            out.write(json.dumps({"Id": club_id, "MeetingTimes": meeting_times[club_id],
+                                  "fetched": answers is not None}) + "\n")
+            out.flush()
+        out.write(json.dumps({"complete": True}) + "\n")
+
+    df["MeetingTimes"] = [meeting_times.get(club_id, []) for club_id in club_ids]
+    df.to_csv(path)
+
+    summary = stats.as_dict()
+    print(f"Fetched {len(pending) - summary['failures']}/{len(pending)} clubs with {summary['requests']} requests "
+          f"in {summary['elapsed_seconds']:.1f}s ({summary['requests_per_second']:.1f} req/sec, "
+          f"{summary['cached']} cached, {summary['not_modified']} not modified, "
+          f"{summary['retries']} retries, {summary['failures']} failures)")
+    return summary
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) == b"\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape club meeting times from TerpLink")
+    parser.add_argument("--csv", default="clubs.csv", help="Clubs CSV to update in place")
+    parser.add_argument("--base-url", default=BASE_URL, help="API host (e.g. a local stub server)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries per club before giving up")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Response cache directory ('' disables it)")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE / 3600,
+                        help="Hours a cached response is used without revalidating it")
+    parser.add_argument("--output", default="club_times.jsonl",
+                        help="JSONL file results are appended to (an interrupted run resumes from it)")
+    parser.add_argument("--restart", action="store_true", help="Discard an interrupted run and fetch every club")
+    args = parser.parse_args()
+    fetch_club_times(args.csv, concurrency=args.concurrency, base_url=args.base_url,
+                     cache_dir=args.cache_dir or None, max_age=args.max_age * 3600,
+                     output=args.output, restart=args.restart, max_retries=args.max_retries)
@@ -0,0 +1,102 @@
+"""
+Local stand-in for the TerpLink additionalFields endpoint
+Used to test and benchmark scraping.py without touching the real API:
+
+    python stub_server.py --port 8765 --latency 0.05 --error-rate 0.1
+    python scraping.py --base-url http://127.0.0.1:8765 --csv /tmp/clubs.csv
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scraping import MEETING_TIMES_QUESTION_ID
+
+PATH_PATTERN = re.compile(r"^/api/discovery/organization/(\d+)/additionalFields$")
+SAMPLE_ANSWERS = ["Weekdays (Monday-Friday)", "Evening (6pm-9pm)"]
+
+
+def make_handler(latency=0.0, error_rate=0.0, fail_first=0, retry_after=None):
+    """
+    Request handler that answers after `latency` seconds and fails `error_rate` of requests
+
+    The first `fail_first` requests for each organization always fail with a
+    503; 503 responses carry a Retry-After header when retry_after is given.
+    """
+    attempts = {}
+    attempts_lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            match = PATH_PATTERN.match(self.path)
+            if not match:
+                self.send_error(404)
+                return
+            if latency:
+                time.sleep(latency)
+
+            etag = f'"stub-{match.group(1)}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            with attempts_lock:
+                attempt = attempts[match.group(1)] = attempts.get(match.group(1), 0) + 1
+            roll = random.random()
+            if attempt <= fail_first or roll < error_rate / 2:
+                self.send_response(503)
+                if retry_after is not None:
+                    self.send_header("Retry-After", str(retry_after))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if roll < error_rate:
+                body = {}  # TerpLink sometimes answers without "items"
+            else:
+                body = {"items": [
+                    {"questionId": MEETING_TIMES_QUESTION_ID, "hasResponse": True, "answerText": answer}
+                    for answer in SAMPLE_ANSWERS
+                ]}
+
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if "items" in body:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub_server(port=0, latency=0.0, error_rate=0.0, fail_first=0, retry_after=None):
+    """Serve the stub in a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, error_rate, fail_first, retry_after))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local TerpLink stub server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--fail-first", type=int, default=0, help="Requests per organization that always fail")
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds sent with 503 responses")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(
+        args.latency, args.error_rate, args.fail_first, args.retry_after
+    ))
+    print(f"Stub TerpLink API on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,167 @@
+"""
+Tests for the meeting time scraper, run against the local stub server
+"""
+
+import pytest
+import json
+import sys
+import os
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scraping
+from response_cache import ResponseCache
+from stub_server import SAMPLE_ANSWERS, start_stub_server
+
+
+@pytest.fixture
+def stub():
+    """Start a stub server with the given options; every server is shut down after the test"""
+    servers = []
+
+    def start(**kwargs):
+        server, base_url = start_stub_server(**kwargs)
+        servers.append(server)
+        return base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of sleeping"""
+    delays = []
+    monkeypatch.setattr(scraping.time, 'sleep', delays.append)
+    return delays
+
+
+def test_retries_until_success(stub, sleeps):
+    """Failed requests are retried and counted, waiting as long as Retry-After asks"""
+    base_url = stub(fail_first=2, retry_after=3)
+    stats = scraping.ScrapeStats()
+
+    answers = scraping.get_club_times(1, base_url=base_url, backoff_base=100, backoff_cap=60, stats=stats)
+
+    assert answers == SAMPLE_ANSWERS
+    assert sleeps == [3.0, 3.0]
+    assert (stats.requests, stats.retries, stats.failures) == (3, 2, 0)
+
+
+def test_retry_after_is_capped(stub, sleeps):
+    """A Retry-After longer than backoff_cap waits backoff_cap"""
+    base_url = stub(fail_first=1, retry_after=600)
+
+    scraping.get_club_times(1, base_url=base_url, backoff_cap=5)
+
+    assert sleeps == [5.0]
+
+
+def test_gives_up_after_max_retries(stub, sleeps):
+    """A club that keeps failing is requested max_retries + 1 times, then counted as a failure"""
+    base_url = stub(error_rate=1.0)
+    stats = scraping.ScrapeStats()
+
+    assert scraping.get_club_times(1, base_url=base_url, max_retries=2, backoff_base=0, stats=stats) is None
+    assert (stats.requests, stats.retries, stats.failures) == (3, 2, 1)
+    assert len(sleeps) == 2
+
+
+def test_fetch_all_with_errors(stub, sleeps):
+    """Concurrent fetches retry transient errors until every club is fetched"""
+    base_url = stub(error_rate=0.5)
+    club_ids = list(range(1, 21))
+
+    results, stats = scraping.fetch_all_club_times(
+        club_ids, concurrency=4, base_url=base_url, max_retries=30, backoff_base=0
+    )
+
+    assert results == [SAMPLE_ANSWERS] * len(club_ids)
+    assert stats.failures == 0
+    assert stats.requests == len(club_ids) + stats.retries
+
+
+def test_cache_revalidates_stale_entries(stub, tmp_path):
+    """Fresh entries skip the request; stale ones are revalidated and a 304 reuses them"""
+    base_url = stub()
+    cache = ResponseCache(str(tmp_path / 'cache'))
+    club_ids = [1, 2, 3]
+
+    results, stats = scraping.fetch_all_club_times(club_ids, base_url=base_url, cache=cache, max_age=0)
+    assert results == [SAMPLE_ANSWERS] * 3
+    assert (stats.requests, stats.cached, stats.not_modified) == (3, 0, 0)
+    assert cache.get(1)['etag'] == '"stub-1"'
+
+    # max_age=0: every entry is stale and revalidated with If-None-Match
+    results, stats = scraping.fetch_all_club_times(club_ids, base_url=base_url, cache=cache, max_age=0)
+    assert results == [SAMPLE_ANSWERS] * 3
+    assert (stats.requests, stats.cached, stats.not_modified) == (3, 0, 3)
+
+    results, stats = scraping.fetch_all_club_times(club_ids, base_url=base_url, cache=cache, max_age=3600)
+    assert results == [SAMPLE_ANSWERS] * 3
+    assert (stats.requests, stats.cached, stats.not_modified) == (0, 3, 0)
+
+
+def test_gives_up_with_stale_cache_entry(stub, sleeps, tmp_path):
+    """A club that cannot be fetched falls back to its stale cached response"""
+    base_url = stub(error_rate=1.0)
+    cache = ResponseCache(str(tmp_path / 'cache'))
+    cache.put(1, [{'questionId': scraping.MEETING_TIMES_QUESTION_ID, 'hasResponse': True,
+                   'answerText': 'Late Night (After 9pm)'}])
+    stats = scraping.ScrapeStats()
+
+    answers = scraping.get_club_times(1, base_url=base_url, max_retries=1, backoff_base=0,
+                                      stats=stats, cache=cache, max_age=0)
+
+    assert answers == ['Late Night (After 9pm)']
+    assert (stats.requests, stats.failures, stats.cached) == (2, 1, 0)
+
+
+def test_fetch_club_times_resumes_from_output(stub, sleeps, tmp_path):
+    """Without a response cache, a re-run only fetches clubs the JSONL does not record as fetched"""
+    csv_path = tmp_path / 'clubs.csv'
+    output = tmp_path / 'club_times.jsonl'
+    pd.DataFrame({'Id': [1, 2, 3]}).to_csv(csv_path, index=False)
+    output.write_text(json.dumps({'Id': 1, 'MeetingTimes': ['Monday Night'], 'fetched': True}) + '\n'
+                      + json.dumps({'Id': 2, 'MeetingTimes': [], 'fetched': False}) + '\n'
+                      + '{"Id": 3, "Meet')
+
+    summary = scraping.fetch_club_times(str(csv_path), base_url=stub(), cache_dir=None, output=str(output))
+
+    assert summary['requests'] == 2
+    records = [json.loads(line) for line in output.read_text().splitlines()[3:]]
+    assert sorted(record['Id'] for record in records[:-1]) == [2, 3]
+    assert records[-1] == {'complete': True}
+    assert pd.read_csv(csv_path)['MeetingTimes'][0] == "['Monday Night']"
+
+    output.write_text(json.dumps({'Id': 1, 'MeetingTimes': ['Monday Night'], 'fetched': True}) + '\n')
+    summary = scraping.fetch_club_times(str(csv_path), base_url=stub(), cache_dir=None,
+                                        output=str(output), restart=True)
+    assert summary['requests'] == 3
+    assert len(output.read_text().splitlines()) == 4
+
+
+def test_fetch_club_times_refreshes_after_complete_run(stub, tmp_path):
+    """A finished run is not resumed: the next run revalidates every club through the response cache"""
+    csv_path = tmp_path / 'clubs.csv'
+    output = tmp_path / 'club_times.jsonl'
+    cache_dir = str(tmp_path / 'cache')
+    pd.DataFrame({'Id': [1, 2, 3]}).to_csv(csv_path, index=False)
+    base_url = stub()
+
+    summary = scraping.fetch_club_times(str(csv_path), base_url=base_url, cache_dir=cache_dir,
+                                        output=str(output), max_age=0)
+    assert (summary['requests'], summary['not_modified']) == (3, 0)
+
+    summary = scraping.fetch_club_times(str(csv_path), base_url=base_url, cache_dir=cache_dir,
+                                        output=str(output), max_age=0)
+    assert (summary['requests'], summary['not_modified']) == (3, 3)
+    assert len(output.read_text().splitlines()) == 4
+
+    summary = scraping.fetch_club_times(str(csv_path), base_url=base_url, cache_dir=cache_dir,
+                                        output=str(output), max_age=3600)
+    assert (summary['requests'], summary['cached']) == (0, 3)